@@ -1,3 +1,10 @@
-from .routes import router
-
 __all__ = ["router"]
+
+
+def __getattr__(name):
+    # Loaded on first use so that importing api.schemas (which tools do)
+    # doesn't pull in the routes and, through them, the tools themselves
+    if name == "router":
+        from .routes import router
+        return router
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
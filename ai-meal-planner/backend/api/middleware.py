@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from services.request_profiler import PROFILE_HEADER, RequestProfiler
+from tools.metrics import REQUEST_SECONDS
+
+logger = logging.getLogger(__name__)
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class RequestMetricsMiddleware:
+    """
+    Record end-to-end latency of every HTTP request.
+
+    A plain ASGI middleware rather than ``@app.middleware("http")``: it
+    adds no task or response wrapping to the request, and since it returns
+    only after the last body chunk is sent, streamed responses (NDJSON,
+    SSE) are timed to their end. Requests are labelled with the matched
+    route template, so ``/api/session/{session_id}`` is one series;
+    unmatched paths share ``route="unmatched"``.
+    """
+
+    def __init__(self, app: Callable[[Scope, Receive, Send], Awaitable[None]]):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status)
+            ).observe(time.perf_counter() - start)
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests picked by the request profiler.
+
+    The profile id is returned in the ``X-Profile-Id`` response header;
+    the rendered profile is written off the event loop after the response
+    has been sent. Profile downloads themselves are never profiled.
+    """
+
+    def __init__(self, app: Callable[[Scope, Receive, Send], Awaitable[None]], profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+        self._header = PROFILE_HEADER.encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith("/debug/profiles"):
+            await self.app(scope, receive, send)
+            return
+        header = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == self._header), None
+        )
+        run = self.profiler.start() if self.profiler.wants(header) else None
+        if run is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = self.profiler.new_id()
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_id(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            self.profiler.stop(run)
+            details = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            }
+            try:
+                await asyncio.to_thread(self.profiler.save, run, profile_id, details)
+            except Exception as e:
+                logger.error(f"Saving profile {profile_id} failed: {e}")
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Optional
-from pydantic import BaseModel
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from typing import AsyncIterator, Dict, Literal, Optional
+from pydantic import BaseModel, Field
+import asyncio
+import json
+import time
 import uuid
 import logging
 from datetime import datetime
@@ -8,24 +13,123 @@ from datetime import datetime
 from api.schemas import (
     UserPreferences,
     PriceReport,
+    ProductPrice,
     ShoppingDecision,
     GeneratePlanResponse,
     MealPlan,
+    Meal,
 )
-from tools.meal_generation import generate_meal_plan_tool
-from tools.price_analysis import analyze_prices_tool, select_best_store_tool
+from tools.meal_generation import (
+    generate_meal_plan_parallel,
+    generate_meal_plan_tool,
+    stream_meal_plan_text,
+)
+from tools.json_stream import MealPlanStreamParser
+from tools.metrics import (
+    ANALYZE_SECONDS,
+    LLM_COALESCED,
+    LLM_NOT_COALESCED,
+    PACKAGE_SOLVE_SECONDS,
+    PLAN_CACHE_HITS,
+    PLAN_CACHE_MISSES,
+    SELECT_SECONDS,
+    metrics,
+    record_error,
+)
+from tools.price_analysis import PriceTable, analyze_prices_columnar, select_best_store_tool
+from tools.basket_optimizer import InfeasibleBasketError, select_split_basket_tool
+from tools.package_solver import solve_package_quantities
+from tools.structured_output import repair_meal, repair_meal_plan
+from tools.token_usage import token_counter
+from services.job_queue import FINISHED, JobQueueFullError, plan_jobs
+from services.llm_executor import llm_executor, LLMQueueFullError
+from services.plan_cache import PlanCache, plan_cache
+from services.price_history import price_history
+from services.request_profiler import MEDIA_TYPES, request_profiler
+from services.price_collector import (
+    PriceCollectionQueueFullError,
+    merge_price_rows,
+    price_collector,
+)
+from services.session_store import session_store
+from services.single_flight import llm_single_flight
+from config.settings import settings
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# In-memory storage for sessions (use Redis/DB in production)
-sessions: Dict[str, dict] = {}
-
 
 class GeneratePlanRequest(BaseModel):
     """Request model for meal plan generation."""
     preferences: str
     days: Optional[int] = None  # Let AI decide from user query
+    collect_prices: Optional[bool] = None  # Scrape store prices server-side (default from settings)
+
+
+class GeneratePlanJobRequest(GeneratePlanRequest):
+    """Request model for background meal plan generation."""
+    priority: Literal["high", "normal", "low"] = "normal"
+    deadline_seconds: Optional[float] = Field(None, gt=0, description="Give up after this long")
+
+
+def _start_price_collection(
+    session_id: str,
+    shopping_list: list[str],
+    requested: Optional[bool],
+    session: Optional[dict] = None,
+) -> bool:
+    """Queue server-side price collection if requested; never fails the plan."""
+    if not (settings.price_collection_enabled if requested is None else requested):
+        return False
+    try:
+        price_collector.submit(session_id, shopping_list, session=session)
+        return True
+    except (PriceCollectionQueueFullError, RuntimeError) as e:
+        logger.warning(f"Price collection not started for session {session_id}: {e}")
+        return False
+
+
+def _use_fanout(days: Optional[int]) -> bool:
+    """Whether to generate a plan as an outline plus one call per meal."""
+    return settings.meal_fanout_enabled and (days is None or days >= settings.meal_fanout_min_days)
+
+
+async def _generate_meal_plan(preferences: str, days: Optional[int]) -> dict:
+    """Serve a meal plan from the cache or generate it on the LLM worker pool."""
+    cache_args = (preferences, days, settings.gemini_model, settings.temperature)
+    if plan_cache is not None:
+        cached = plan_cache.get(*cache_args)
+        if cached is not None:
+            PLAN_CACHE_HITS.inc()
+            logger.info("Meal plan served from cache")
+            return cached
+        PLAN_CACHE_MISSES.inc()
+
+    async def generate() -> dict:
+        # The Gemini SDK is blocking, so run it on the LLM worker pool
+        if _use_fanout(days):
+            result = await generate_meal_plan_parallel(
+                preferences,
+                days,  # None = AI decides in the outline
+                run=llm_executor.run,
+                concurrency=settings.meal_fanout_concurrency,
+            )
+        else:
+            result = await llm_executor.run(
+                generate_meal_plan_tool,
+                preferences=preferences,
+                days=days,  # None = AI decides
+            )
+        if plan_cache is not None:
+            plan_cache.set(*cache_args, result)
+        return result
+
+    if llm_single_flight is None:
+        return await generate()
+    # Identical requests arriving while this one is generating share its call
+    key = PlanCache.make_key(*cache_args)
+    (LLM_COALESCED if key in llm_single_flight else LLM_NOT_COALESCED).inc()
+    return await llm_single_flight.do(key, generate)
 
 
 @router.post("/api/generate-plan", response_model=GeneratePlanResponse)
@@ -38,19 +142,19 @@ async def generate_plan(request: GeneratePlanRequest):
         logger.info(f"Generating meal plan for query: {request.preferences}")
         
         # Generate meal plan using Gemini (AI decides days if not specified)
-        result = generate_meal_plan_tool(
-            preferences=request.preferences,
-            days=request.days  # None = AI decides
-        )
+        result = await _generate_meal_plan(request.preferences, request.days)
         
         # Create session
         session_id = str(uuid.uuid4())
-        sessions[session_id] = {
+        session_store.set(session_id, {
             "preferences": request.preferences,
             "meal_plan": result,
             "created_at": datetime.utcnow(),
             "status": "meal_plan_ready"
-        }
+        })
+        collecting = _start_price_collection(
+            session_id, result["shopping_list"], request.collect_prices
+        )
         
         # Format response
         meal_plan = MealPlan(
@@ -58,16 +162,196 @@ async def generate_plan(request: GeneratePlanRequest):
             shopping_list=result["shopping_list"]
         )
         
+        message = "Meal plan generated. Please check prices across stores."
+        if collecting:
+            message = "Meal plan generated. Collecting prices across stores."
         return GeneratePlanResponse(
             session_id=session_id,
             meal_plan=meal_plan,
-            message="Meal plan generated. Please check prices across stores."
+            message=message
         )
         
+    except LLMQueueFullError as e:
+        record_error("generate_plan", e)
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
+        record_error("generate_plan", e)
         raise HTTPException(status_code=500, detail=f"Error generating meal plan: {str(e)}")
 
 
+def _ndjson(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
+async def _stream_meal_plan_events(
+    preferences: str, days: Optional[int], collect_prices: Optional[bool] = None
+) -> AsyncIterator[str]:
+    """Yield NDJSON events: one per meal, then the shopping list, then done."""
+    cache_args = (preferences, days, settings.gemini_model, settings.temperature)
+    try:
+        result = plan_cache.get(*cache_args) if plan_cache is not None else None
+        if result is not None:
+            for index, meal in enumerate(result["meal_plan"]):
+                yield _ndjson({"type": "meal", "index": index, "meal": Meal(**meal).dict()})
+        elif _use_fanout(days):
+            written: asyncio.Queue = asyncio.Queue()
+            task = asyncio.create_task(generate_meal_plan_parallel(
+                preferences,
+                days,
+                run=llm_executor.run,
+                concurrency=settings.meal_fanout_concurrency,
+                on_meal=lambda index, meal: written.put_nowait((index, meal)),
+            ))
+            task.add_done_callback(lambda _: written.put_nowait(None))
+            try:
+                # Meals finish in any order; emit them in plan order
+                finished: Dict[int, Optional[dict]] = {}
+                next_index = index = 0
+                while (item := await written.get()) is not None:
+                    finished[item[0]] = item[1]
+                    while next_index in finished:
+                        meal = finished.pop(next_index)
+                        next_index += 1
+                        if meal is not None:
+                            yield _ndjson({"type": "meal", "index": index, "meal": meal})
+                            index += 1
+                result = await task
+            finally:
+                task.cancel()
+            if plan_cache is not None:
+                plan_cache.set(*cache_args, result)
+        else:
+            parser = MealPlanStreamParser()
+            index = 0
+            async for chunk in llm_executor.iterate(stream_meal_plan_text, preferences, days):
+                for meal in map(repair_meal, parser.feed(chunk)):
+                    if meal is None:
+                        continue  # Unrepairable; also dropped from the final plan
+                    yield _ndjson({"type": "meal", "index": index, "meal": meal})
+                    index += 1
+            result = repair_meal_plan(parser.close())
+            if plan_cache is not None:
+                plan_cache.set(*cache_args, result)
+
+        yield _ndjson({"type": "shopping_list", "shopping_list": result["shopping_list"]})
+
+        session_id = str(uuid.uuid4())
+        session_store.set(session_id, {
+            "preferences": preferences,
+            "meal_plan": result,
+            "created_at": datetime.utcnow(),
+            "status": "meal_plan_ready"
+        })
+        collecting = _start_price_collection(session_id, result["shopping_list"], collect_prices)
+        yield _ndjson({
+            "type": "done",
+            "session_id": session_id,
+            "price_collection": collecting,
+            "message": "Meal plan generated. Please check prices across stores."
+        })
+
+    except Exception as e:
+        record_error("generate_plan_stream", e)
+        logger.error(f"Error streaming meal plan: {e}")
+        yield _ndjson({"type": "error", "detail": f"Error generating meal plan: {str(e)}"})
+
+
+@router.post("/api/generate-plan/stream")
+async def generate_plan_stream(request: GeneratePlanRequest):
+    """
+    Stream a meal plan as newline-delimited JSON.
+
+    Emits a ``meal`` event as soon as each meal is complete, then the
+    ``shopping_list`` and finally ``done`` with the session ID.
+    """
+    logger.info(f"Streaming meal plan for query: {request.preferences}")
+    return StreamingResponse(
+        _stream_meal_plan_events(request.preferences, request.days, request.collect_prices),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.post("/api/generate-plan/async", status_code=202)
+async def generate_plan_async(request: GeneratePlanJobRequest):
+    """
+    Queue meal plan generation and return the session ID straight away.
+
+    Poll ``GET /api/session/{id}`` or subscribe to
+    ``GET /api/session/{id}/events`` until the session status is
+    ``meal_plan_ready`` (or ``failed`` / ``expired``).
+    """
+    session_id = str(uuid.uuid4())
+
+    def store_plan(session: dict, result: dict) -> None:
+        session["meal_plan"] = result
+        session["status"] = "meal_plan_ready"
+        _start_price_collection(
+            session_id, result["shopping_list"], request.collect_prices, session=session
+        )
+
+    try:
+        job = plan_jobs.submit(
+            session_id,
+            {"preferences": request.preferences, "created_at": datetime.utcnow()},
+            run=lambda: _generate_meal_plan(request.preferences, request.days),
+            on_success=store_plan,
+            priority=request.priority,
+            deadline_seconds=request.deadline_seconds,
+        )
+    except (JobQueueFullError, RuntimeError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    logger.info(f"Queued meal plan generation for session {session_id} ({request.priority})")
+    return {"session_id": session_id, "status": "queued", "job": job}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), ensure_ascii=False)}\n\n"
+
+
+async def _session_events(session_id: str) -> AsyncIterator[str]:
+    """Yield a status event on every change, then done once the job finishes."""
+    last_state = None
+    last_sent = time.monotonic()
+    while True:
+        session = session_store.get(session_id)
+        if session is None:
+            yield _sse("error", {"detail": "Session not found"})
+            return
+
+        job = session.get("job") or {"status": "done"}
+        state = (session.get("status"), job.get("status"), job.get("attempts"))
+        if state != last_state:
+            last_state, last_sent = state, time.monotonic()
+            yield _sse("status", {"session_id": session_id, "status": session.get("status"), "job": job})
+        elif time.monotonic() - last_sent > 15:
+            # Keep idle proxies from closing the connection
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
+
+        if job["status"] in FINISHED:
+            yield _sse("done", {
+                "session_id": session_id,
+                "status": session.get("status"),
+                "meal_plan": session.get("meal_plan"),
+                "error": job.get("error"),
+            })
+            return
+        await plan_jobs.wait_for_change(session_id, settings.plan_job_event_poll_seconds)
+
+
+@router.get("/api/session/{session_id}/events")
+async def session_events(session_id: str):
+    """Server-sent events for a session's background job."""
+    if session_store.get(session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return StreamingResponse(
+        _session_events(session_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/api/price-report", response_model=ShoppingDecision)
 async def receive_price_report(price_report: PriceReport):
     """
@@ -78,62 +362,201 @@ async def receive_price_report(price_report: PriceReport):
         session_id = price_report.session_id
         
         # Validate session
-        if session_id not in sessions:
+        session = session_store.get(session_id)
+        if session is None:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        session = sessions[session_id]
-        
         # Store price data
         session["price_data"] = price_report.dict()
         session["status"] = "prices_received"
         
-        # Analyze prices using ADK tool
-        price_data_list = [p.dict() for p in price_report.prices]
-        analysis = analyze_prices_tool(price_data=price_data_list)
+        # Keep what the extension saw; server-scraped prices are recorded by the collector
+        prices = price_report.prices
+        if price_history is not None:
+            price_history.record(prices, price_report.timestamp.date())
         
-        # Select best store using ADK tool
-        decision = select_best_store_tool(
-            analysis=analysis,
-            user_preferences=session["preferences"]
-        )
+        # Fill in what the extension didn't check with server-scraped prices
+        if price_report.include_server_prices and session.get("server_prices"):
+            prices = merge_price_rows(
+                prices, [ProductPrice(**row) for row in session["server_prices"]]
+            )
+        
+        # ...and then with the latest recorded prices, instead of scraping again
+        if price_report.include_history_prices and price_history is not None:
+            shopping_list = session.get("meal_plan", {}).get("shopping_list") or [
+                row.ingredient for row in prices
+            ]
+            stores = dict.fromkeys([*settings.supported_stores, *(row.store for row in prices)])
+            prices = merge_price_rows(prices, [
+                ProductPrice(**row) for row in price_history.latest(
+                    shopping_list, stores, settings.price_history_max_age_days
+                )
+            ])
+        
+        # Price each ingredient as the packages needed to cover its quantity,
+        # then analyze on a columnar view of the report
+        with PACKAGE_SOLVE_SECONDS.time():
+            table = PriceTable.from_rows(solve_package_quantities(prices))
+        with ANALYZE_SECONDS.time():
+            analysis = analyze_prices_columnar(table)
+        
+        with SELECT_SECONDS.time():
+            if price_report.optimize == "split_basket":
+                # Buy each ingredient where it is cheapest once delivery is counted
+                decision = select_split_basket_tool(
+                    table,
+                    delivery_fees=settings.delivery_fees_eur,
+                    default_delivery_fee=settings.default_delivery_fee_eur,
+                    min_order=settings.min_order_eur,
+                    min_order_penalty=settings.min_order_penalty_eur,
+                    max_stores=price_report.max_stores or settings.split_basket_max_stores,
+                    time_budget_ms=settings.split_basket_time_budget_ms,
+                    comparisons=analysis["comparisons"],
+                )
+            else:
+                # Select best store using ADK tool
+                decision = select_best_store_tool(
+                    analysis=analysis,
+                    user_preferences=session["preferences"]
+                )
         
         # Store decision
         session["decision"] = decision
         session["status"] = "decision_made"
+        session_store.set(session_id, session)
         
         # Format response
         return ShoppingDecision(**decision)
         
     except HTTPException:
         raise
+    except InfeasibleBasketError as e:
+        # e.g. max_stores=1 when no single store stocks everything
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
+        record_error("price_report", e)
         raise HTTPException(status_code=500, detail=f"Error processing prices: {str(e)}")
 
 
+@router.post("/api/session/{session_id}/collect-prices", status_code=202)
+async def collect_prices(session_id: str):
+    """
+    Scrape prices for the session's shopping list on the server.
+
+    Progress and partial results appear on the session as
+    ``price_collection`` and ``server_prices``; submit a price report
+    (possibly with no prices of its own) to get a shopping decision.
+    """
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if "meal_plan" not in session:
+        raise HTTPException(status_code=409, detail="Meal plan is not ready yet")
+    try:
+        status = price_collector.submit(session_id, session["meal_plan"]["shopping_list"])
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    except (PriceCollectionQueueFullError, RuntimeError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"session_id": session_id, "price_collection": status}
+
+
+@router.get("/api/prices/history")
+async def price_trend(
+    ingredient: str,
+    store: Optional[str] = None,
+    days: int = Query(30, ge=1, le=3650),
+):
+    """Daily best unit price of an ingredient per store, from the price history."""
+    if price_history is None:
+        raise HTTPException(status_code=404, detail="Price history is disabled")
+    return {
+        "ingredient": ingredient,
+        "days": days,
+        "stores": price_history.trend(ingredient, store, days),
+    }
+
+
 @router.get("/api/session/{session_id}")
 async def get_session(session_id: str):
     """Get session data for debugging/monitoring."""
-    if session_id not in sessions:
+    session = session_store.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return sessions[session_id]
+    return session
 
 
 @router.delete("/api/session/{session_id}")
 async def delete_session(session_id: str):
     """Clean up session data."""
-    if session_id in sessions:
-        del sessions[session_id]
+    if session_store.delete(session_id):
         return {"message": "Session deleted"}
     
     raise HTTPException(status_code=404, detail="Session not found")
 
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Request, stage, token, error and cache metrics in the Prometheus text format."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _check_profile_access(token: Optional[str], header: Optional[str]) -> None:
+    if request_profiler is None:
+        raise HTTPException(status_code=404, detail="Request profiling is disabled")
+    if not request_profiler.authorized(token or header):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+@router.get("/debug/profiles")
+async def list_profiles(
+    token: Optional[str] = None, x_profile: Optional[str] = Header(None)
+):
+    """Stored request profiles, newest first."""
+    _check_profile_access(token, x_profile)
+    return {"profiles": request_profiler.list()}
+
+
+@router.get("/debug/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: Optional[Literal["html", "txt", "prof"]] = None,
+    token: Optional[str] = None,
+    x_profile: Optional[str] = Header(None),
+):
+    """
+    Download a request profile by the id from its X-Profile-Id header.
+
+    ``format=prof`` is the raw cProfile dump (snakeviz, ``python -m pstats``).
+    """
+    _check_profile_access(token, x_profile)
+    found = request_profiler.get(profile_id, format)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    data, fmt = found
+    headers = {}
+    if fmt == "prof":
+        headers["Content-Disposition"] = f'attachment; filename="{profile_id}.prof"'
+    return Response(data, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {
         "status": "healthy",
-        "active_sessions": len(sessions),
+        "active_sessions": len(session_store),
+        "session_store": session_store.stats(),
+        "llm_executor": llm_executor.stats(),
+        "llm_tokens": token_counter.stats(),
+        "plan_cache": plan_cache.stats() if plan_cache is not None else None,
+        "llm_coalescing": llm_single_flight.stats() if llm_single_flight is not None else None,
+        "price_collector": price_collector.stats(),
+        "price_history": price_history.stats() if price_history is not None else None,
+        "profiling": request_profiler.stats() if request_profiler is not None else None,
+        "plan_jobs": plan_jobs.stats(),
         "timestamp": datetime.utcnow().isoformat()
     }
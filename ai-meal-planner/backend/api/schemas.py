@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 
 
@@ -38,6 +38,23 @@ class MealPlan(BaseModel):
     shopping_list: list[str]
 
 
+class GeneratedMealPlan(BaseModel):
+    """Meal plan in the shape the LLM is asked to return."""
+    meal_plan: list[Meal] = Field(..., min_length=1)
+    shopping_list: list[str]
+
+
+class MealOutlineItem(BaseModel):
+    """A planned meal before its recipe is written."""
+    title: str
+    key_protein: Optional[str] = None
+
+
+class MealOutline(BaseModel):
+    """Meals the LLM plans first when generating them in parallel."""
+    meals: list[MealOutlineItem]
+
+
 class ProductPrice(BaseModel):
     """Price information for a product at a store."""
     ingredient: str
@@ -47,6 +64,7 @@ class ProductPrice(BaseModel):
     unit: str
     url: Optional[str] = None
     available: bool = True
+    product_name: Optional[str] = Field(None, description="Store product name, used for package size")
 
 
 class PriceReport(BaseModel):
@@ -54,6 +72,16 @@ class PriceReport(BaseModel):
     session_id: str
     prices: list[ProductPrice]
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+    optimize: Literal["single_store", "split_basket"] = Field(
+        "single_store", description="Recommend one store or split the basket across stores"
+    )
+    max_stores: Optional[int] = Field(None, ge=1, description="Store limit for split_basket")
+    include_server_prices: bool = Field(
+        True, description="Fill gaps with prices the backend scraped for this session"
+    )
+    include_history_prices: bool = Field(
+        True, description="Fill stores nobody checked with recently recorded prices"
+    )
 
 
 class StoreComparison(BaseModel):
@@ -65,6 +93,14 @@ class StoreComparison(BaseModel):
     savings: float = 0.0
 
 
+class StoreBasket(BaseModel):
+    """Part of a split basket bought at one store."""
+    store: str
+    subtotal: float
+    delivery_fee: float
+    items_count: int
+
+
 class ShoppingDecision(BaseModel):
     """Decision on where to shop."""
     recommended_store: str
@@ -73,6 +109,9 @@ class ShoppingDecision(BaseModel):
     reason: str
     comparisons: list[StoreComparison]
     items: list[dict]
+    mode: str = "single_store"
+    baskets: list[StoreBasket] = Field(default_factory=list)
+    missing_items: list[str] = Field(default_factory=list)
 
 
 class ShoppingListItem(BaseModel):
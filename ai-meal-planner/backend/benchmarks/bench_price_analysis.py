@@ -0,0 +1,73 @@
+"""
+Benchmark: dict-based vs columnar price analysis.
+
+Usage (from backend/):
+    python -m benchmarks.bench_price_analysis [rows ...]
+"""
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+from api.schemas import ProductPrice
+from tools.price_analysis import (
+    PriceTable,
+    analyze_prices_columnar,
+    analyze_prices_tool,
+    select_best_store_tool,
+)
+
+STORES = ["barbora", "rimi", "maxima", "iki", "lidl"]
+
+
+def make_price_rows(rows: int, seed: int = 0) -> List[Dict]:
+    """Synthetic price report: every ingredient priced at every store."""
+    rng = random.Random(seed)
+    data = []
+    for i in range(rows):
+        price = round(rng.uniform(0.3, 15.0), 2)
+        data.append({
+            "ingredient": f"ingredient-{i // len(STORES)}",
+            "store": STORES[i % len(STORES)],
+            "price": price,
+            "unit_price": round(price * rng.uniform(0.5, 4.0), 2),
+            "unit": "kg",
+            "url": None,
+            "available": rng.random() > 0.05,
+        })
+    return data
+
+
+def _best_of(func: Callable[[], object], repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes: List[int]) -> None:
+    print(f"{'rows':>8} {'dict (ms)':>10} {'columnar (ms)':>14} {'speedup':>8}")
+    for rows in sizes:
+        data = make_price_rows(rows)
+        prices = [ProductPrice(**row) for row in data]
+
+        def legacy():
+            # What the route did before: model -> dict -> per-store dicts
+            rows_as_dicts = [p.model_dump() for p in prices]
+            select_best_store_tool(analyze_prices_tool(rows_as_dicts))
+
+        def columnar():
+            select_best_store_tool(analyze_prices_columnar(PriceTable.from_rows(prices)))
+
+        legacy_s = _best_of(legacy)
+        columnar_s = _best_of(columnar)
+        print(
+            f"{rows:>8} {legacy_s * 1000:>10.2f} {columnar_s * 1000:>14.2f} "
+            f"{legacy_s / columnar_s:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
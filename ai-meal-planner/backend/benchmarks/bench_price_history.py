@@ -0,0 +1,90 @@
+"""
+Benchmark: price history queries on memory-mapped columns.
+
+Records a year of daily price reports, then compares the columnar store's
+time-range and per-ingredient queries with scanning the same prices kept
+as JSON price reports (what ``session["price_data"]`` holds).
+
+Usage (from backend/):
+    python -m benchmarks.bench_price_history [rows_per_day ...]
+"""
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+from services.price_history import PriceHistory, ingredient_key
+
+STORES = ["barbora", "rimi", "maxima", "iki", "lidl"]
+INGREDIENTS = [
+    "vištienos krūtinėlė", "pienas", "morkos", "bulvės", "kiaušiniai", "varškė", "lašišos filė",
+    "ryžiai", "svogūnai", "sviestas", "obuoliai", "bananai", "grikiai", "miltai", "sūris",
+]
+DAYS = 365
+START = date(2025, 1, 1)
+
+
+def make_report(rows: int, rng: random.Random) -> List[Dict]:
+    return [
+        {
+            "ingredient": f"{rng.choice(INGREDIENTS)} {i % 7}",
+            "store": STORES[i % len(STORES)],
+            "price": round(rng.uniform(0.5, 9.0), 2),
+            "unit_price": round(rng.uniform(0.5, 9.0), 2),
+            "unit": "kg",
+            "product_name": f"Produktas {i}",
+        }
+        for i in range(rows)
+    ]
+
+
+def run(sizes: List[int]) -> None:
+    print(
+        f"{'rows':>9} {'record (ms/day)':>16} {'MB':>6} {'range (ms)':>11} "
+        f"{'ingredient (ms)':>16} {'latest (ms)':>12} {'JSON scan (ms)':>15}"
+    )
+    for per_day in sizes:
+        rng = random.Random(0)
+        with tempfile.TemporaryDirectory() as path:
+            history = PriceHistory(path)
+            reports = []
+            start = time.perf_counter()
+            for offset in range(DAYS):
+                report = make_report(per_day, rng)
+                history.record(report, START + timedelta(days=offset))
+                reports.append(json.dumps({"day": offset, "prices": report}))
+            record_ms = (time.perf_counter() - start) / DAYS * 1000
+            megabytes = len(history) * 24 / 1e6
+
+            end = START + timedelta(days=DAYS - 1)
+            timings = {}
+            queries = {
+                "range": lambda: history.query(start=end - timedelta(days=6), end=end),
+                "ingredient": lambda: history.query("pienas", "rimi", end - timedelta(days=29), end),
+                "latest": lambda: history.latest(INGREDIENTS, STORES, 7, end),
+            }
+            for name, query in queries.items():
+                query()  # Map the files
+                start = time.perf_counter()
+                query()
+                timings[name] = (time.perf_counter() - start) * 1000
+
+            key = ingredient_key("pienas")
+            start = time.perf_counter()
+            [
+                price for report in reports[-30:] for price in json.loads(report)["prices"]
+                if price["store"] == "rimi" and ingredient_key(price["ingredient"]) == key
+            ]
+            scan_ms = (time.perf_counter() - start) * 1000
+
+            print(
+                f"{len(history):>9} {record_ms:>16.2f} {megabytes:>6.1f} {timings['range']:>11.1f} "
+                f"{timings['ingredient']:>16.1f} {timings['latest']:>12.1f} {scan_ms:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or [100, 1_000, 5_000])
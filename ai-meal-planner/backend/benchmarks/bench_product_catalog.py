@@ -0,0 +1,96 @@
+"""
+Benchmark: fuzzy ingredient-to-product matching on the product catalog.
+
+Compares ProductCatalog lookups with a full scan that runs an edit
+distance matrix against every product name, the way the extension's
+product matcher does.
+
+Usage (from backend/):
+    python -m benchmarks.bench_product_catalog [products ...]
+"""
+import random
+import sys
+import time
+from typing import Dict, List
+
+from tools.product_catalog import ProductCatalog, fold
+
+STORES = ["barbora", "rimi", "maxima", "iki", "lidl"]
+
+NOUNS = [
+    "pienas", "pieno", "varškė", "sūris", "sviestas", "jogurtas", "kefyras", "grietinė",
+    "vištienos", "kiaulienos", "jautienos", "krūtinėlė", "šlaunelės", "nugarinė", "faršas",
+    "lašišos", "filė", "silkė", "tunas", "morkos", "bulvės", "svogūnai", "pomidorai",
+    "agurkai", "paprikos", "brokoliai", "kopūstai", "obuoliai", "bananai", "ryžiai",
+    "makaronai", "grikiai", "miltai", "duona", "kiaušiniai", "aliejus", "cukrus", "druska",
+]
+ADJECTIVES = ["šviežia", "rūkyta", "ekologiška", "lietuviška", "šaldyta", "didelė", "liesa"]
+BRANDS = ["Dvaro", "Rokiškio", "Žemaitijos", "Vilkyškių", "Biovela", "Kreka", "Rimi"]
+
+SHOPPING_LIST = [
+    "vištienos krūtinėlė 500g", "pienas 1l", "morkos 500g", "bulvės 2kg", "kiaušiniai 10vnt",
+    "varškė 200g", "lašišos filė 400g", "ryžiai 500g", "svogūnai 2vnt", "sviestas 200g",
+]
+
+
+def make_products(count: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        words = rng.sample(NOUNS, rng.choice([1, 2, 2, 3]))
+        if rng.random() < 0.5:
+            words.insert(0, rng.choice(ADJECTIVES))
+        name = f"{rng.choice(BRANDS)} {' '.join(words)} {rng.choice([100, 200, 500, 1000])} g #{i}"
+        rows.append({"store": STORES[i % len(STORES)], "product_name": name, "price": 1.0})
+    return rows
+
+
+def levenshtein(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def full_scan(rows: List[Dict], ingredient: str, store: str) -> str:
+    query = fold(ingredient)
+    candidates = [row for row in rows if row["store"] == store]
+    return min(candidates, key=lambda row: levenshtein(fold(row["product_name"]), query))["product_name"]
+
+
+def run(sizes: List[int]) -> None:
+    print(
+        f"{'products':>9} {'index (ms)':>11} {'cold (us/item)':>15} "
+        f"{'warm (us/item)':>15} {'full scan (us/item)':>20}"
+    )
+    for count in sizes:
+        rows = make_products(count)
+        catalog = ProductCatalog()
+        start = time.perf_counter()
+        catalog.add(rows)
+        index_ms = (time.perf_counter() - start) * 1000
+
+        timings = []
+        for _ in range(2):  # First pass fills the per-word cache
+            start = time.perf_counter()
+            for store in STORES:
+                catalog.match_shopping_list(SHOPPING_LIST, store)
+            timings.append((time.perf_counter() - start) / (len(STORES) * len(SHOPPING_LIST)) * 1e6)
+
+        scan_items = SHOPPING_LIST[:2] if count > 2000 else SHOPPING_LIST
+        start = time.perf_counter()
+        for ingredient in scan_items:
+            full_scan(rows, ingredient, STORES[0])
+        scan_us = (time.perf_counter() - start) / len(scan_items) * 1e6
+
+        print(
+            f"{count:>9} {index_ms:>11.1f} {timings[0]:>15.1f} "
+            f"{timings[1]:>15.1f} {scan_us:>20.0f}"
+        )
+
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 50_000])
@@ -0,0 +1,149 @@
+"""
+Benchmark: inline prompt vs system instruction vs context cache.
+
+Runs generate_meal_plan_tool against a local fake Gemini model that
+counts tokens and charges latency for them, so no API key or network
+is needed. The fake's timings are modelled, not measured: prefill costs
+PREFILL_MS_PER_TOKEN per uncached prompt token and a tenth of that per
+cached token, and decoding costs DECODE_MS_PER_TOKEN per response token.
+
+Usage (from backend/):
+    python -m benchmarks.bench_prompt [requests]
+"""
+import json
+import os
+import re
+import sys
+import textwrap
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from tools import meal_generation
+from tools.meal_generation import (
+    MEAL_PLAN_SYSTEM_INSTRUCTION,
+    build_meal_plan_prompt,
+    generate_meal_plan_tool,
+)
+from tools.token_usage import TokenCounter
+
+PREFILL_MS_PER_TOKEN = 0.02
+CACHED_PREFILL_MS_PER_TOKEN = PREFILL_MS_PER_TOKEN / 10
+DECODE_MS_PER_TOKEN = 0.2
+
+_TOKEN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+RESPONSE = json.dumps({
+    "meal_plan": [{
+        "title": "Vištienos sriuba su daržovėmis",
+        "description": "Šilta ir maistinga sriuba",
+        "recipe": ["Supjaustykite daržoves", "Virkite 30 min"],
+        "ingredients": ["vištienos krūtinėlė 500g", "morkos 2vnt", "druska"],
+        "key_protein": "vištienos krūtinėlė",
+    }] * 3,
+    "shopping_list": ["vištienos krūtinėlė 1.5kg", "morkos 6vnt", "druska"],
+}, ensure_ascii=False)
+
+PREFERENCES = [
+    "pigūs pietūs 3 dienoms",
+    "vegetariška vakarienė dviem",
+    "greiti pusryčiai šią savaitę",
+    "baltyminga mityba sportuojant",
+]
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count: words and punctuation marks."""
+    return len(_TOKEN.findall(text))
+
+
+def legacy_prompt(preferences: str, days: Optional[int]) -> str:
+    """The previous single prompt: indented rules rebuilt around each request."""
+    day_instruction = (
+        f"Generate exactly {days} meals." if days
+        else "Understand how many meals the user needs from their request."
+    )
+    role, rules = MEAL_PLAN_SYSTEM_INSTRUCTION.split("\n\n", 1)
+    return textwrap.indent(
+        f"\n{role}\n\nUser request: \"{preferences}\"\n\n{day_instruction}\n\n{rules}",
+        "    ",
+    )
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel; only generate_content is used."""
+
+    def __init__(self, system_instruction: str = "", cached: bool = False):
+        self.system_tokens = count_tokens(system_instruction) if system_instruction else 0
+        self.cached = cached
+
+    def generate_content(self, prompt: str, generation_config=None):
+        prompt_tokens = self.system_tokens + count_tokens(prompt)
+        cached_tokens = self.system_tokens if self.cached else 0
+        response_tokens = count_tokens(RESPONSE)
+        latency_ms = (
+            (prompt_tokens - cached_tokens) * PREFILL_MS_PER_TOKEN
+            + cached_tokens * CACHED_PREFILL_MS_PER_TOKEN
+            + response_tokens * DECODE_MS_PER_TOKEN
+        )
+        time.sleep(latency_ms / 1000)
+        return SimpleNamespace(
+            text=RESPONSE,
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=prompt_tokens,
+                cached_content_token_count=cached_tokens,
+                candidates_token_count=response_tokens,
+            ),
+        )
+
+
+def run_mode(model: FakeModel, build_prompt: Callable, requests: int) -> Dict[str, float]:
+    counter = TokenCounter()
+    meal_generation._get_model = lambda: model
+    meal_generation.build_meal_plan_prompt = build_prompt
+    meal_generation.token_counter = counter
+
+    latencies: List[float] = []
+    for i in range(requests):
+        preferences, days = PREFERENCES[i % len(PREFERENCES)], (i % 3) or None
+        start = time.perf_counter()
+        generate_meal_plan_tool(preferences, days)
+        latencies.append(time.perf_counter() - start)
+
+    stats = counter.stats()
+    return {
+        "prompt_tokens": stats["avg_prompt_tokens"],
+        "billed_tokens": stats["avg_uncached_prompt_tokens"],
+        "latency_ms": sorted(latencies)[len(latencies) // 2] * 1000,
+    }
+
+
+def run(requests: int) -> None:
+    modes = {
+        "inline prompt": (FakeModel(), legacy_prompt),
+        "system instruction": (FakeModel(MEAL_PLAN_SYSTEM_INSTRUCTION), build_meal_plan_prompt),
+        "context cache": (
+            FakeModel(MEAL_PLAN_SYSTEM_INSTRUCTION, cached=True), build_meal_plan_prompt
+        ),
+    }
+    print(f"{requests} requests per mode, fake model (modelled latency)\n")
+    print(f"{'mode':<20} {'prompt tok':>10} {'uncached tok':>12} {'p50 (ms)':>9}")
+    baseline = None
+    for name, (model, build_prompt) in modes.items():
+        result = run_mode(model, build_prompt, requests)
+        baseline = baseline or result
+        print(
+            f"{name:<20} {result['prompt_tokens']:>10.0f} {result['billed_tokens']:>12.0f} "
+            f"{result['latency_ms']:>9.2f}"
+        )
+    print(
+        f"\ncontext cache vs inline: {baseline['billed_tokens'] / result['billed_tokens']:.1f}x "
+        f"fewer uncached prompt tokens, "
+        f"{baseline['latency_ms'] / result['latency_ms']:.2f}x lower p50 latency"
+    )
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,186 @@
+"""
+Local stand-in for the Gemini REST API, for load tests.
+
+Answers ``models/*:generateContent`` and ``models/*:streamGenerateContent``
+with valid meal plans, outlines or single meals (whichever the prompt asks
+for), after a configurable time to first token and at a configurable
+token rate. Point the backend at it with
+``GEMINI_API_ENDPOINT=http://127.0.0.1:<port>``.
+
+Usage (from backend/):
+    python -m benchmarks.fake_gemini [--port 8090] [--latency 0.5] [--tokens-per-second 300]
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+_DAYS = re.compile(r"Generate exactly (\d+) meals")
+_MEAL_TITLE = re.compile(r'Write the meal "([^"]+)"')
+
+PROTEINS = ["vištiena", "kiauliena", "jautiena", "lašiša", "kiaušiniai", "varškė", "lęšiai"]
+SIDES = ["bulvės", "ryžiai", "grikiai", "makaronai", "morkos", "brokoliai", "kopūstai"]
+
+
+def _meal(title: str, index: int) -> Dict[str, Any]:
+    protein = PROTEINS[index % len(PROTEINS)]
+    side = SIDES[index % len(SIDES)]
+    return {
+        "title": title,
+        "description": f"Sotus patiekalas su {protein} ir {side}.",
+        "recipe": [f"Paruoškite {side}.", f"Iškepkite {protein}.", "Patiekite karštą."],
+        "ingredients": [f"{protein} 500g", f"{side} 1kg", "svogūnai 2vnt", "aliejus 50ml", "druska"],
+        "key_protein": protein,
+    }
+
+
+def fake_response_text(prompt: str) -> str:
+    """The JSON a well-behaved model would return for a meal planning prompt."""
+    match = _DAYS.search(prompt)
+    days = int(match.group(1)) if match else 3
+    if "only plan the meals" in prompt:
+        meals = [
+            {"title": f"Patiekalas {i + 1}", "key_protein": PROTEINS[i % len(PROTEINS)]}
+            for i in range(days)
+        ]
+        return json.dumps({"meals": meals}, ensure_ascii=False)
+    title = _MEAL_TITLE.search(prompt)
+    if title:
+        digits = re.findall(r"\d+", title.group(1))
+        return json.dumps(_meal(title.group(1), int(digits[0]) - 1 if digits else 0), ensure_ascii=False)
+    meals = [_meal(f"Patiekalas {i + 1}", i) for i in range(days)]
+    shopping_list = list(dict.fromkeys(item for meal in meals for item in meal["ingredients"]))
+    return json.dumps({"meal_plan": meals, "shopping_list": shopping_list}, ensure_ascii=False)
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)  # Roughly four characters per token
+
+
+def _response(text: str, prompt_tokens: int, final: bool = True) -> Dict[str, Any]:
+    candidate: Dict[str, Any] = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if final:
+        candidate["finishReason"] = "STOP"
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": _tokens(text),
+            "totalTokenCount": prompt_tokens + _tokens(text),
+        },
+    }
+
+
+class FakeGemini:
+    """
+    Fake Gemini server on a background thread.
+
+    Args:
+        latency: Seconds before the first token
+        tokens_per_second: Generation speed after the first token
+        chunk_tokens: Tokens per streamed chunk
+        port: Port to listen on (0 picks a free one)
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        tokens_per_second: float = 300.0,
+        chunk_tokens: int = 20,
+        port: int = 0,
+        host: str = "127.0.0.1",
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = chunk_tokens
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGemini":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _chunks(self, text: str) -> List[str]:
+        size = self.chunk_tokens * 4
+        return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+    def _handler(self) -> type:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:
+                pass  # Keep load test output clean
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if ":generateContent" not in self.path and ":streamGenerateContent" not in self.path:
+                    # e.g. cachedContents: the backend falls back to a system instruction
+                    self.send_error(404, "Not supported by the fake Gemini server")
+                    return
+                with fake._lock:
+                    fake.requests += 1
+
+                prompt = "".join(
+                    part.get("text", "")
+                    for content in body.get("contents", [])
+                    for part in content.get("parts", [])
+                )
+                prompt_tokens = _tokens(prompt) + 1000  # Plus the system instruction
+                text = fake_response_text(prompt)
+                time.sleep(fake.latency)
+
+                if ":streamGenerateContent" in self.path:
+                    # The REST transport reads a JSON array of responses as it arrives
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.end_headers()
+                    chunks = fake._chunks(text)
+                    self.wfile.write(b"[")
+                    for i, chunk in enumerate(chunks):
+                        time.sleep(_tokens(chunk) / fake.tokens_per_second)
+                        final = i == len(chunks) - 1
+                        payload = json.dumps(_response(chunk, prompt_tokens, final), ensure_ascii=False)
+                        self.wfile.write(payload.encode() + (b"]" if final else b",\r\n"))
+                        self.wfile.flush()
+                    return
+
+                time.sleep(_tokens(text) / fake.tokens_per_second)
+                payload = json.dumps(_response(text, prompt_tokens), ensure_ascii=False).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=300.0)
+    parser.add_argument("--chunk-tokens", type=int, default=20)
+    args = parser.parse_args()
+    server = FakeGemini(args.latency, args.tokens_per_second, args.chunk_tokens, args.port).start()
+    print(f"Fake Gemini listening on {server.url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,278 @@
+"""
+Load test: /api/generate-plan and /api/price-report under concurrency.
+
+Starts the fake Gemini server (benchmarks/fake_gemini.py) and drives the
+backend with concurrent asyncio clients: in-process through httpx's ASGI
+transport by default, or a running server with --url (start it with
+GEMINI_API_ENDPOINT pointing at a standalone fake server, pass that as
+--gemini-url, and pass the server's --pid for memory figures). Every plan request has its own preferences, so the plan
+cache and call coalescing never answer for the LLM.
+
+Scenarios:
+    generate_plan        POST /api/generate-plan; each creates a session
+    price_report_<rows>  POST /api/price-report with a fixture report of
+                         <rows> prices (bench_price_analysis.make_price_rows)
+                         against the sessions created above
+
+Prints a table to stderr and one JSON document to stdout (latency
+p50/p95/p99 in ms, RPS, errors, RSS per session); --output also appends
+it as a line to a JSONL file to track runs over time.
+
+Usage (from backend/):
+    python -m benchmarks.load_test [--requests 200] [--concurrency 32] [--latency 0.5]
+        [--report-rows 10 100 1000] [--output load_test.jsonl]
+        [--url http://127.0.0.1:8008 --gemini-url http://127.0.0.1:8090 --pid 1234]
+"""
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.fake_gemini import FakeGemini
+
+
+def rss_bytes(pid: Optional[int] = None) -> Optional[int]:
+    """Resident memory of a process (this one by default); None where /proc is missing."""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    """Latency percentiles (ms) and throughput of one scenario."""
+    summary: Dict[str, Any] = {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+    if latencies:
+        ms = np.asarray(latencies) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        summary["latency_ms"] = {
+            "p50": round(float(p50), 2),
+            "p95": round(float(p95), 2),
+            "p99": round(float(p99), 2),
+            "mean": round(float(ms.mean()), 2),
+            "max": round(float(ms.max()), 2),
+        }
+    return summary
+
+
+async def drive(
+    count: int,
+    concurrency: int,
+    request: Callable[[int], Awaitable[httpx.Response]],
+) -> Dict[str, Any]:
+    """Send ``count`` requests from ``concurrency`` concurrent clients."""
+    indexes = iter(range(count))
+    latencies: List[float] = []
+    errors = 0
+
+    async def client() -> None:
+        nonlocal errors
+        for i in indexes:
+            start = time.perf_counter()
+            try:
+                response = await request(i)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_scenarios(
+    client: httpx.AsyncClient,
+    requests: int,
+    concurrency: int,
+    days: int,
+    report_rows: List[int],
+    pid: Optional[int] = None,
+) -> Dict[str, Any]:
+    # Imports the backend's settings, so only once run_in_process has set the environment
+    from benchmarks.bench_price_analysis import make_price_rows
+
+    run_id = uuid.uuid4().hex[:8]
+    session_ids: List[str] = []
+
+    async def generate_plan(i: int) -> httpx.Response:
+        response = await client.post(
+            "/api/generate-plan", json={"preferences": f"load test {run_id} #{i}", "days": days}
+        )
+        if response.status_code == 200:
+            session_ids.append(response.json()["session_id"])
+        return response
+
+    await generate_plan(-1)  # Warm up: model, schemas, connection pool
+    gc.collect()
+    rss_before = rss_bytes(pid)
+    sessions_before = len(session_ids)
+    scenarios = {"generate_plan": await drive(requests, concurrency, generate_plan)}
+    gc.collect()
+    rss_after = rss_bytes(pid)
+    sessions = len(session_ids) - sessions_before
+
+    for rows in report_rows:
+        # Serialize each fixture once; only the session id differs per request
+        template = json.dumps(
+            {"session_id": "__SESSION__", "prices": make_price_rows(rows)}, ensure_ascii=False
+        )
+        sessions_cycle = itertools.cycle(session_ids)
+
+        async def price_report(i: int, template: str = template) -> httpx.Response:
+            body = template.replace("__SESSION__", next(sessions_cycle), 1)
+            return await client.post(
+                "/api/price-report", content=body, headers={"Content-Type": "application/json"}
+            )
+
+        if session_ids:
+            scenarios[f"price_report_{rows}"] = await drive(requests, concurrency, price_report)
+
+    memory: Dict[str, Any] = {"sessions": sessions}
+    if rss_before is not None and rss_after is not None:
+        memory.update(
+            rss_before_mb=round(rss_before / 2**20, 1),
+            rss_after_mb=round(rss_after / 2**20, 1),
+            kb_per_session=round((rss_after - rss_before) / 1024 / sessions, 1) if sessions else None,
+        )
+    return {"scenarios": scenarios, "memory": memory}
+
+
+async def run_in_process(args: argparse.Namespace, gemini_url: str) -> Dict[str, Any]:
+    # Settings are read on import, so point the backend at the fake server first
+    os.environ.setdefault("GEMINI_API_KEY", "load-test")
+    os.environ["GEMINI_API_ENDPOINT"] = gemini_url
+    os.environ["LLM_MAX_CONCURRENCY"] = str(max(args.concurrency, 32))
+    from main import app
+
+    # Per-request INFO lines would dominate the run (and urllib3 warns whenever
+    # more Gemini calls are in flight than its pool keeps connections for)
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("urllib3.connectionpool").setLevel(logging.ERROR)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=300) as client:
+            return await run_scenarios(
+                client, args.requests, args.concurrency, args.days, args.report_rows
+            )
+
+
+async def run_against_server(args: argparse.Namespace) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=300, limits=limits) as client:
+        return await run_scenarios(
+            client, args.requests, args.concurrency, args.days, args.report_rows, pid=args.pid
+        )
+
+
+def print_table(result: Dict[str, Any]) -> None:
+    out = sys.stderr
+    print(
+        f"{'scenario':<20} {'requests':>9} {'errors':>7} {'rps':>8} "
+        f"{'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}",
+        file=out,
+    )
+    for name, summary in result["scenarios"].items():
+        latency = summary.get("latency_ms", {})
+        print(
+            f"{name:<20} {summary['requests']:>9} {summary['errors']:>7} {summary['rps']:>8.1f} "
+            f"{latency.get('p50', 0):>9.1f} {latency.get('p95', 0):>9.1f} {latency.get('p99', 0):>9.1f}",
+            file=out,
+        )
+    memory = result["memory"]
+    if memory.get("kb_per_session") is not None:
+        print(
+            f"memory: {memory['rss_before_mb']} -> {memory['rss_after_mb']} MB RSS, "
+            f"{memory['kb_per_session']} KB per session",
+            file=out,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--days", type=int, default=3, help="Meals per generated plan")
+    parser.add_argument("--report-rows", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake Gemini seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=300.0)
+    parser.add_argument("--gemini-port", type=int, default=0, help="Fake Gemini port (0 = any free)")
+    parser.add_argument("--gemini-url", help="Use a running fake Gemini server instead of starting one")
+    parser.add_argument("--url", help="Load test a running server instead of an in-process app")
+    parser.add_argument("--pid", type=int, help="Server process id, for memory figures with --url")
+    parser.add_argument("--output", help="Append the JSON result to this JSONL file")
+    args = parser.parse_args()
+
+    if args.url and not args.gemini_url:
+        parser.error("--url needs --gemini-url: the server must already point at a fake Gemini server")
+    fake = None
+    if not args.gemini_url:
+        fake = FakeGemini(args.latency, args.tokens_per_second, port=args.gemini_port).start()
+    try:
+        if args.url:
+            measured = asyncio.run(run_against_server(args))
+        else:
+            measured = asyncio.run(run_in_process(args, args.gemini_url or fake.url))
+    finally:
+        if fake is not None:
+            fake.stop()
+
+    result = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "commit": _git_commit(),
+        "config": {
+            "target": args.url or "in-process",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "days": args.days,
+            "gemini_url": args.gemini_url or fake.url,
+            # Latency and rate of an external fake server are whatever it was started with
+            "gemini_latency_seconds": None if args.gemini_url else args.latency,
+            "gemini_tokens_per_second": None if args.gemini_url else args.tokens_per_second,
+            "gemini_calls": fake.requests if fake is not None else None,
+        },
+        **measured,
+    }
+    print_table(result)
+    print(json.dumps(result))
+    if args.output:
+        with open(args.output, "a") as handle:
+            handle.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
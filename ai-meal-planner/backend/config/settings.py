@@ -20,19 +20,102 @@ class Settings(BaseSettings):
     port: int = 8008
     debug: bool = False
     reload: bool = False
+    workers: int = 1  # uvicorn worker processes (>1 needs a shared session store)
     
     # Model Configuration
     gemini_model: str = "gemini-2.0-flash-exp"
     temperature: float = 0.7
+    gemini_structured_output: bool = True  # JSON mode with a response schema
+    gemini_context_cache_enabled: bool = False  # Keep the static prompt in a Gemini context cache
+    gemini_context_cache_ttl_seconds: int = 3600
+    gemini_api_endpoint: str = ""  # Override the API host, e.g. http://127.0.0.1:8090 (fake Gemini)
+    
+    # LLM Execution
+    llm_max_concurrency: int = 32  # Worker threads for blocking Gemini calls
+    llm_max_queue_size: int = 256  # Waiting calls before rejecting (0 = unbounded)
+    llm_coalesce_enabled: bool = True  # Share one call between identical concurrent requests
+    
+    # Parallel Meal Generation (outline first, then one LLM call per meal).
+    # Lower latency for long plans at N+1 calls per plan instead of 1, each
+    # resending the system instruction
+    meal_fanout_enabled: bool = False
+    meal_fanout_min_days: int = 3  # Fewer requested meals use a single call
+    meal_fanout_concurrency: int = 7  # Meal calls in flight per plan
+    
+    # Background Plan Generation (POST /api/generate-plan/async)
+    plan_job_workers: int = 4
+    plan_job_queue_size: int = 500  # Waiting jobs before rejecting (0 = unbounded)
+    plan_job_max_retries: int = 2
+    plan_job_retry_backoff_seconds: float = 1.0
+    plan_job_deadline_seconds: float = 120.0
+    plan_job_event_poll_seconds: float = 1.0  # SSE re-check interval for other workers' jobs
+    
+    # Meal Plan Cache
+    plan_cache_enabled: bool = True
+    plan_cache_backend: str = "memory"  # "memory" or "sqlite"
+    plan_cache_path: str = "plan_cache.sqlite3"
+    plan_cache_ttl_seconds: int = 86400
+    plan_cache_max_entries: int = 1000
+    plan_cache_similarity_threshold: float = 0.0  # 0 disables near-duplicate matching
+    
+    # Session Storage
+    session_store_backend: str = "auto"  # "memory", "sqlite", or "auto" (sqlite when workers > 1)
+    session_store_path: str = "sessions.sqlite3"
+    session_ttl_seconds: int = 21600
+    session_max_entries: int = 10000
+    session_expiry_interval_seconds: int = 60
     
     # Application Settings
     meal_plan_days: int = 3
     price_threshold_eur: float = 8.0
     
+    # Split-Basket Optimization
+    split_basket_max_stores: int = 2
+    split_basket_time_budget_ms: float = 20.0
+    default_delivery_fee_eur: float = 2.99
+    delivery_fees_eur: dict[str, float] = {}
+    min_order_eur: float = 0.0  # Baskets below this pay min_order_penalty_eur
+    min_order_penalty_eur: float = 0.0
+    
     # Store Configuration
     barbora_url: str = "https://www.barbora.lt/"
+    rimi_url: str = "https://www.rimi.lt/"
+    maxima_url: str = "https://www.maxima.lt/"
     supported_stores: list[str] = ["barbora", "rimi", "maxima"]
     
+    # Server-Side Scraping (limits apply per store)
+    scraper_requests_per_second: float = 2.0
+    scraper_max_connections_per_store: int = 4
+    scraper_max_retries: int = 3
+    scraper_backoff_base_seconds: float = 0.5
+    scraper_backoff_max_seconds: float = 30.0
+    scraper_timeout_seconds: float = 10.0
+    scraper_store_limits: dict[str, dict] = {}  # e.g. {"rimi": {"requests_per_second": 1}}
+    
+    # Server-Side Price Collection
+    price_collection_enabled: bool = False  # Scrape prices after every generated plan
+    price_collection_workers: int = 2  # Sessions collected concurrently
+    price_collection_queue_size: int = 100
+    product_match_min_score: float = 0.6  # Catalog match score (0-1) to keep a searched product
+    product_match_max_candidates: int = 3  # Matching products kept per ingredient and store
+    product_catalog_max_products: int = 50000  # Catalog size at which the oldest half is dropped
+    
+    # Price History (append-only columnar files in one directory)
+    price_history_enabled: bool = False
+    price_history_path: str = "price_history"
+    price_history_max_age_days: int = 7  # Oldest history price used to fill a store nobody checked
+    
+    # Metrics (GET /metrics, Prometheus text format)
+    metrics_enabled: bool = True
+    
+    # Request Profiling (X-Profile header or sampling; GET /debug/profiles)
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0  # Fraction of requests profiled without the header
+    profiling_token: str = ""  # When set, X-Profile and ?token= must carry it
+    profiling_backend: str = "auto"  # "pyinstrument", "cprofile" or "auto"
+    profiling_path: str = "profiles"
+    profiling_max_profiles: int = 50  # Oldest profiles are deleted beyond this
+    
     # CORS
     cors_origins: list[str] = [
         "http://localhost:5000",
@@ -2,16 +2,25 @@
 AI Meal Planner Backend
 FastAPI application with ADK agents for meal planning and price comparison.
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, FileResponse
 from fastapi.templating import Jinja2Templates
 import logging
+import os
 from pathlib import Path
 
 from config.settings import settings
+from api.middleware import ProfilingMiddleware, RequestMetricsMiddleware
 from api.routes import router
+from services.job_queue import plan_jobs
+from services.llm_executor import llm_executor
+from services.price_collector import price_collector
+from services.request_profiler import request_profiler
+from services.session_store import session_store
+from tools.meal_generation import configure_gemini
 
 # Configure logging
 logging.basicConfig(
@@ -20,13 +29,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Per-worker startup and shutdown."""
+    logger.info(f"🚀 AI Meal Planner API starting (worker pid {os.getpid()})...")
+    logger.info(f"📍 Running on {settings.host}:{settings.port}")
+    logger.info(f"🤖 Using model: {settings.gemini_model}")
+    logger.info(f"🏪 Supported stores: {', '.join(settings.supported_stores)}")
+    logger.info(f"🧵 LLM concurrency: {settings.llm_max_concurrency}")
+    logger.info(f"🗂️ Session store: {type(session_store).__name__}")
+
+    # LLM clients are set up per worker process, not at import time
+    configure_gemini()
+    session_store.start_expiry(settings.session_expiry_interval_seconds)
+    await price_collector.start()
+    await plan_jobs.start()
+
+    yield
+
+    logger.info("👋 AI Meal Planner API shutting down...")
+    session_store.stop_expiry()
+    await plan_jobs.stop()
+    await price_collector.stop()
+    llm_executor.shutdown(wait=False)
+
+
 # Create FastAPI app
 app = FastAPI(
     title="AI Meal Planner",
     description="Multi-store meal planning with AI-powered price comparison",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -38,6 +74,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling (X-Profile header or sampling; GET /debug/profiles)
+if request_profiler is not None:
+    app.add_middleware(ProfilingMiddleware, profiler=request_profiler)
+
+# Request latency metrics (GET /metrics)
+if settings.metrics_enabled:
+    app.add_middleware(RequestMetricsMiddleware)
+
 # Include API routes
 app.include_router(router)
 
@@ -125,21 +169,6 @@ async def root():
     """
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Run on application startup."""
-    logger.info("🚀 AI Meal Planner API starting...")
-    logger.info(f"📍 Running on {settings.host}:{settings.port}")
-    logger.info(f"🤖 Using model: {settings.gemini_model}")
-    logger.info(f"🏪 Supported stores: {', '.join(settings.supported_stores)}")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Run on application shutdown."""
-    logger.info("👋 AI Meal Planner API shutting down...")
-
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -147,5 +176,7 @@ if __name__ == "__main__":
         host=settings.host,
         port=settings.port,
         reload=settings.reload,
+        # Reload mode is single-process; uvicorn ignores workers with reload
+        workers=None if settings.reload else settings.workers,
         log_level="info"
     )
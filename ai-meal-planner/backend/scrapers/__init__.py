@@ -0,0 +1,58 @@
+from typing import Dict, Iterable, List, Optional, Type
+
+from config.settings import settings
+
+from .base import RetryableScrapeError, ScrapeError, StoreScraper, unavailable_row
+from .barbora import BarboraScraper
+from .maxima import MaximaScraper
+from .rimi import RimiScraper
+from .scheduler import ScrapeScheduler, StoreLimits
+
+# Store name -> scraper plugin
+SCRAPERS: Dict[str, Type[StoreScraper]] = {
+    BarboraScraper.name: BarboraScraper,
+    RimiScraper.name: RimiScraper,
+    MaximaScraper.name: MaximaScraper,
+}
+
+
+def create_scrapers(stores: Optional[Iterable[str]] = None) -> List[StoreScraper]:
+    """Instantiate the scrapers for the given stores (default: settings.supported_stores)."""
+    stores = list(stores) if stores is not None else settings.supported_stores
+    unknown = [store for store in stores if store not in SCRAPERS]
+    if unknown:
+        raise ValueError(f"No scraper for store(s): {', '.join(unknown)}")
+    return [SCRAPERS[store]() for store in stores]
+
+
+def create_scheduler(stores: Optional[Iterable[str]] = None, **kwargs) -> ScrapeScheduler:
+    """A scheduler for the given stores with per-store limits from settings."""
+    default = StoreLimits(
+        requests_per_second=settings.scraper_requests_per_second,
+        max_connections=settings.scraper_max_connections_per_store,
+        max_retries=settings.scraper_max_retries,
+        backoff_base_seconds=settings.scraper_backoff_base_seconds,
+        backoff_max_seconds=settings.scraper_backoff_max_seconds,
+    )
+    limits = {
+        store: default._replace(**overrides)
+        for store, overrides in settings.scraper_store_limits.items()
+    }
+    kwargs.setdefault("timeout", settings.scraper_timeout_seconds)
+    return ScrapeScheduler(create_scrapers(stores), limits, default, **kwargs)
+
+
+__all__ = [
+    "SCRAPERS",
+    "BarboraScraper",
+    "MaximaScraper",
+    "RimiScraper",
+    "RetryableScrapeError",
+    "ScrapeError",
+    "ScrapeScheduler",
+    "StoreLimits",
+    "StoreScraper",
+    "create_scheduler",
+    "create_scrapers",
+    "unavailable_row",
+]
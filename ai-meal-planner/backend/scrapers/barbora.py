@@ -0,0 +1,39 @@
+import json
+from typing import Dict, Optional
+
+from selectolax.lexbor import LexborNode
+
+from config.settings import settings
+from scrapers.base import StoreScraper
+
+
+class BarboraScraper(StoreScraper):
+    """barbora.lt: product data is JSON in each card's data-b-for-cart attribute."""
+
+    name = "barbora"
+    base_url = settings.barbora_url.rstrip("/")
+    search_path = "/paieska"
+    query_param = "q"
+
+    card_selector = 'li[data-testid^="product-card"]'
+    not_found_selector = ".b-alert--warning"
+
+    def parse_card(self, card: LexborNode) -> Optional[Dict]:
+        data_node = card.css_first("[data-b-for-cart]")
+        if data_node is None:
+            return None
+        try:
+            data = json.loads(data_node.attributes.get("data-b-for-cart") or "")
+        except ValueError:
+            return None
+
+        price = data.get("price")
+        if price is None:
+            return None
+        return {
+            "product_name": data.get("title"),
+            "price": float(price),
+            "unit_price": float(data.get("comparative_unit_price") or price),
+            "unit": data.get("comparative_unit") or "vnt",
+            "available": data.get("status") == "active",
+        }
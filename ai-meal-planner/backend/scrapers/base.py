@@ -0,0 +1,155 @@
+import re
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+
+_PRICE = re.compile(r"-?\d+(?:[.,]\d+)?")
+_UNIT = re.compile(r"/\s*(\w+)")
+
+
+class ScrapeError(Exception):
+    """A store search failed or returned a page that can't be parsed."""
+
+
+class RetryableScrapeError(ScrapeError):
+    """A transient failure (rate limited, server error, timeout) worth retrying."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_price(text: str) -> Optional[float]:
+    """"1,29 €" -> 1.29, "2,30 €/kg" -> 2.30 (None if there is no number)."""
+    match = _PRICE.search(text.replace("\xa0", " "))
+    if match is None:
+        return None
+    return float(match.group().replace(",", "."))
+
+
+def parse_unit(text: str, default: str = "vnt") -> str:
+    """"2,30 €/kg" -> "kg"."""
+    match = _UNIT.search(text)
+    return match.group(1).lower() if match else default
+
+
+def unavailable_row(ingredient: str, store: str) -> Dict:
+    """Price row saying a store doesn't sell an ingredient."""
+    return {
+        "ingredient": ingredient,
+        "store": store,
+        "price": 0.0,
+        "unit_price": 0.0,
+        "unit": "vnt",
+        "available": False,
+    }
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class StoreScraper:
+    """
+    Product search for one online store.
+
+    Subclasses set the store name, search URL and CSS selectors (the same
+    ones the extension's ``stores/*_store.ts`` classes use) and can
+    override ``parse_card`` for stores that embed product data differently.
+    Scrapers hold no connection state: the scheduler passes in a shared
+    HTTP client and enforces rate limits around ``search``.
+    """
+
+    name: str = ""
+    base_url: str = ""
+    search_path: str = "/paieska"
+    query_param: str = "q"
+
+    card_selector: str = ""
+    name_selector: str = ""
+    price_selector: str = ""
+    unit_price_selector: str = ""
+    not_found_selector: Optional[str] = None
+
+    def __init__(self, base_url: Optional[str] = None):
+        if base_url:
+            self.base_url = base_url.rstrip("/")
+
+    def search_url(self) -> str:
+        return f"{self.base_url}{self.search_path}"
+
+    async def search(self, client: httpx.AsyncClient, query: str) -> List[Dict]:
+        """
+        Search the store for an ingredient.
+
+        Args:
+            client: Shared HTTP client
+            query: Ingredient to search for
+
+        Returns:
+            Price rows in the ProductPrice shape (empty if nothing matched)
+
+        Raises:
+            RetryableScrapeError: Rate limited, server error or network failure
+            ScrapeError: Any other failure
+        """
+        try:
+            response = await client.get(self.search_url(), params={self.query_param: query})
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            raise RetryableScrapeError(f"{self.name}: {e!r}") from e
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableScrapeError(
+                f"{self.name}: HTTP {response.status_code}", _retry_after(response)
+            )
+        if response.status_code >= 400:
+            raise ScrapeError(f"{self.name}: HTTP {response.status_code}")
+        return self.parse(query, response.content, str(response.url))
+
+    def parse(self, query: str, body: bytes, url: str) -> List[Dict]:
+        """Parse a search results page into price rows."""
+        tree = LexborHTMLParser(body)
+        cards = tree.css(self.card_selector)
+        if not cards:
+            if self.not_found_selector and tree.css_first(self.not_found_selector) is not None:
+                return []
+            raise ScrapeError(f"{self.name}: no product cards in the search page")
+
+        rows = []
+        for card in cards:
+            row = self.parse_card(card)
+            if row is not None:
+                row.update(ingredient=query, store=self.name, url=url)
+                rows.append(row)
+        return rows
+
+    def parse_card(self, card: LexborNode) -> Optional[Dict]:
+        """Price fields of one product card, or None if it has no price."""
+        price_node = card.css_first(self.price_selector)
+        price = parse_price(price_node.text()) if price_node is not None else None
+        if price is None:
+            return None
+
+        name_node = card.css_first(self.name_selector) if self.name_selector else None
+        unit_node = card.css_first(self.unit_price_selector) if self.unit_price_selector else None
+        unit_price = parse_price(unit_node.text()) if unit_node is not None else None
+        return {
+            "product_name": name_node.text(strip=True) if name_node is not None else None,
+            "price": price,
+            "unit_price": unit_price if unit_price is not None else price,
+            "unit": parse_unit(unit_node.text()) if unit_node is not None else "vnt",
+            "available": True,
+        }
@@ -0,0 +1,17 @@
+from config.settings import settings
+from scrapers.base import StoreScraper
+
+
+class MaximaScraper(StoreScraper):
+    """maxima.lt search results."""
+
+    name = "maxima"
+    base_url = settings.maxima_url.rstrip("/")
+    search_path = "/paieska"
+    query_param = "q"
+
+    card_selector = ".product-item, .product-card"
+    name_selector = ".product-name, .product-title, h3"
+    price_selector = ".price, .product-price"
+    unit_price_selector = ".unit-price, .price-unit"
+    not_found_selector = ".no-results, .search-no-results"
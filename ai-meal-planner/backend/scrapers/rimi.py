@@ -0,0 +1,17 @@
+from config.settings import settings
+from scrapers.base import StoreScraper
+
+
+class RimiScraper(StoreScraper):
+    """rimi.lt e-shop search results."""
+
+    name = "rimi"
+    base_url = settings.rimi_url.rstrip("/")
+    search_path = "/e-parduotuve/lt/paieska"
+    query_param = "query"
+
+    card_selector = ".product-grid__item, .product-card"
+    name_selector = ".product-name, .product-title, h3, h4"
+    price_selector = ".price, .product-price"
+    unit_price_selector = ".unit-price, .price-per-unit"
+    not_found_selector = ".empty-state, .search-no-results"
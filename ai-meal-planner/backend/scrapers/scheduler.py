@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from scrapers.base import RetryableScrapeError, ScrapeError, StoreScraper, unavailable_row
+
+logger = logging.getLogger(__name__)
+
+
+class StoreLimits(NamedTuple):
+    """How hard one store may be hit."""
+    requests_per_second: float = 2.0
+    max_connections: int = 4
+    max_retries: int = 3
+    backoff_base_seconds: float = 0.5
+    backoff_max_seconds: float = 30.0
+
+
+class _StoreState:
+    """Rate limiter, connection cap and cooldown shared by all requests to a store."""
+
+    def __init__(self, limits: StoreLimits):
+        self.limits = limits
+        self.connections = asyncio.Semaphore(limits.max_connections)
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+        self.cooldown_until = 0.0
+
+        # Counters
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.wait_seconds = 0.0
+
+    async def wait_turn(self) -> None:
+        """Block until the rate limit and any cooldown allow another request."""
+        async with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot, self.cooldown_until)
+            interval = 1.0 / self.limits.requests_per_second if self.limits.requests_per_second else 0.0
+            self._next_slot = start + interval
+        delay = start - now
+        if delay > 0:
+            self.wait_seconds += delay
+            await asyncio.sleep(delay)
+
+    def backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Exponential backoff with full jitter; the whole store cools down."""
+        ceiling = min(
+            self.limits.backoff_max_seconds, self.limits.backoff_base_seconds * 2 ** attempt
+        )
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.limits.backoff_max_seconds))
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + delay)
+        return delay
+
+
+class ScrapeScheduler:
+    """
+    Runs store searches in parallel without overloading any store.
+
+    Every store gets its own rate limit (requests per second), cap on
+    concurrent connections and retry budget. Rate-limited or failing
+    requests back off exponentially, and the backoff applies to the whole
+    store so parallel requests don't keep hammering it. Stores are
+    independent, so a slow store doesn't hold up the others.
+    """
+
+    def __init__(
+        self,
+        scrapers: Iterable[StoreScraper],
+        limits: Optional[Dict[str, StoreLimits]] = None,
+        default_limits: Optional[StoreLimits] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        timeout: float = 10.0,
+    ):
+        self.scrapers = {scraper.name: scraper for scraper in scrapers}
+        default_limits = default_limits or StoreLimits()
+        limits = limits or {}
+        self._states = {
+            name: _StoreState(limits.get(name, default_limits)) for name in self.scrapers
+        }
+
+        self._owns_client = client is None
+        if client is None:
+            total_connections = sum(s.limits.max_connections for s in self._states.values())
+            client = httpx.AsyncClient(
+                http2=True,
+                timeout=timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=total_connections,
+                    max_keepalive_connections=total_connections,
+                ),
+                headers={
+                    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                                  "(KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+                    "Accept-Language": "lt-LT,lt;q=0.9,en;q=0.5",
+                },
+            )
+        self.client = client
+
+    async def search(self, store: str, query: str) -> List[Dict]:
+        """
+        Search one store, honoring its limits and retrying transient failures.
+
+        Raises:
+            ScrapeError: The search failed after all retries
+        """
+        scraper = self.scrapers[store]
+        state = self._states[store]
+        attempt = 0
+        while True:
+            await state.wait_turn()
+            async with state.connections:
+                state.requests += 1
+                try:
+                    return await scraper.search(self.client, query)
+                except RetryableScrapeError as e:
+                    if attempt >= state.limits.max_retries:
+                        state.failures += 1
+                        raise
+                    delay = state.backoff(attempt, e.retry_after)
+                    state.retries += 1
+                    logger.warning(f"{e}; retrying '{query}' in {delay:.2f}s")
+                except ScrapeError:
+                    state.failures += 1
+                    raise
+            attempt += 1
+
+    async def search_all_stores(
+        self, query: str, stores: Optional[Iterable[str]] = None
+    ) -> Dict[str, List[Dict] | ScrapeError]:
+        """Search every store (or the given ones) for an ingredient in parallel."""
+        names = list(stores) if stores is not None else list(self.scrapers)
+        results = await asyncio.gather(
+            *(self.search(name, query) for name in names), return_exceptions=True
+        )
+        return dict(zip(names, self._check(results)))
+
+    async def collect_prices(
+        self, ingredients: Iterable[str], stores: Optional[Iterable[str]] = None
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Build a cross-store price report in one parallel pass.
+
+        Args:
+            ingredients: Shopping list items
+            stores: Stores to query (default: all registered)
+
+        Returns:
+            (price rows in the ProductPrice shape, errors as
+            {"ingredient", "store", "error"} dicts)
+        """
+        names = list(stores) if stores is not None else list(self.scrapers)
+        ingredients = list(dict.fromkeys(ingredients))
+        jobs = [(ingredient, name) for ingredient in ingredients for name in names]
+        results = await asyncio.gather(
+            *(self.search(name, ingredient) for ingredient, name in jobs),
+            return_exceptions=True,
+        )
+
+        rows, errors = [], []
+        for (ingredient, name), result in zip(jobs, self._check(results)):
+            if isinstance(result, ScrapeError):
+                errors.append({"ingredient": ingredient, "store": name, "error": str(result)})
+            elif not result:
+                # Report "not sold here" so the analysis counts it as missing
+                rows.append(unavailable_row(ingredient, name))
+            else:
+                rows.extend(result)
+        return rows, errors
+
+    @staticmethod
+    def _check(results: List) -> List:
+        # Only scrape failures are expected; anything else is a bug
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, ScrapeError):
+                raise result
+        return results
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            name: {
+                "requests": state.requests,
+                "retries": state.retries,
+                "failures": state.failures,
+                "rate_limit_wait_seconds": round(state.wait_seconds, 3),
+            }
+            for name, state in self._states.items()
+        }
+
+    async def close(self) -> None:
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def __aenter__(self) -> "ScrapeScheduler":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
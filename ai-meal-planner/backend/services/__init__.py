@@ -0,0 +1,52 @@
+from .job_queue import JobQueue, JobQueueFullError, plan_jobs
+from .llm_executor import LLMExecutor, LLMQueueFullError, llm_executor
+from .plan_cache import (
+    CacheBackend,
+    MemoryCacheBackend,
+    PlanCache,
+    SQLiteCacheBackend,
+    plan_cache,
+)
+from .price_collector import (
+    PriceCollectionQueueFullError,
+    PriceCollector,
+    merge_price_rows,
+    price_collector,
+)
+from .price_history import PriceHistory, price_history
+from .request_profiler import RequestProfiler, request_profiler
+from .session_store import (
+    MemorySessionStore,
+    SessionStore,
+    SQLiteSessionStore,
+    session_store,
+)
+from .single_flight import SingleFlight, llm_single_flight
+
+__all__ = [
+    "JobQueue",
+    "JobQueueFullError",
+    "plan_jobs",
+    "LLMExecutor",
+    "LLMQueueFullError",
+    "llm_executor",
+    "CacheBackend",
+    "MemoryCacheBackend",
+    "PlanCache",
+    "SQLiteCacheBackend",
+    "plan_cache",
+    "PriceCollectionQueueFullError",
+    "PriceCollector",
+    "merge_price_rows",
+    "price_collector",
+    "PriceHistory",
+    "price_history",
+    "RequestProfiler",
+    "request_profiler",
+    "MemorySessionStore",
+    "SessionStore",
+    "SQLiteSessionStore",
+    "session_store",
+    "SingleFlight",
+    "llm_single_flight",
+]
@@ -0,0 +1,334 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from config.settings import settings
+from services.session_store import SessionStore, session_store
+from tools.metrics import record_error
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+# Job statuses after which nothing else happens
+FINISHED = ("done", "failed", "expired")
+
+
+class JobQueueFullError(Exception):
+    """Raised when no more jobs can be queued."""
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class _Job:
+    """A unit of background work tied to a session."""
+
+    def __init__(
+        self,
+        session_id: str,
+        run: Callable[[], Awaitable[Any]],
+        on_success: Optional[Callable[[dict, Any], None]],
+        priority: int,
+        deadline: float,
+    ):
+        self.session_id = session_id
+        self.run = run
+        self.on_success = on_success
+        self.priority = priority
+        self.deadline = deadline  # time.monotonic() value
+        self.attempts = 0
+        self.submitted = time.perf_counter()
+        self.started: Optional[float] = None
+
+
+class _Subscription:
+    """Subscribers waiting for changes to one session."""
+
+    def __init__(self):
+        self.event = asyncio.Event()
+        self.waiters = 0
+
+
+class JobQueue:
+    """
+    Background job runner with priorities, retries and deadlines.
+
+    A job's state lives on its session (``session["job"]`` plus the
+    session ``status``), so clients poll ``GET /api/session/{id}`` or
+    subscribe to changes with ``wait_for_change``, and every worker
+    process sees the same state through a shared session store.
+
+    Failed attempts are retried with exponential backoff while the job's
+    deadline allows; a job still queued at its deadline expires without
+    running.
+    """
+
+    def __init__(
+        self,
+        store: SessionStore,
+        workers: int = 4,
+        max_queue_size: int = 500,
+        max_retries: int = 2,
+        retry_backoff_seconds: float = 1.0,
+        default_deadline_seconds: float = 120.0,
+    ):
+        self.store = store
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.default_deadline_seconds = default_deadline_seconds
+
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+        self._subscriptions: Dict[str, _Subscription] = {}
+        self._retries: Dict[int, asyncio.TimerHandle] = {}  # id(job) -> pending requeue
+
+        # Counters and recent latencies (milliseconds)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+        self.retried = 0
+        self.rejected = 0
+        self.running = 0
+        self._wait_ms: Deque[float] = deque(maxlen=1000)
+        self._latency_ms: Deque[float] = deque(maxlen=1000)
+
+    async def start(self) -> None:
+        """Start the worker tasks on the running event loop."""
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel queued retries and running jobs."""
+        for handle in self._retries.values():
+            handle.cancel()
+        self._retries.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def submit(
+        self,
+        session_id: str,
+        session: dict,
+        run: Callable[[], Awaitable[Any]],
+        on_success: Optional[Callable[[dict, Any], None]] = None,
+        priority: str = "normal",
+        deadline_seconds: Optional[float] = None,
+    ) -> dict:
+        """
+        Create a session and queue a job for it.
+
+        Args:
+            session_id: New session ID
+            session: Initial session data
+            run: Coroutine factory doing the work (called once per attempt)
+            on_success: Stores the result on the session dict
+            priority: "high", "normal" or "low"
+            deadline_seconds: Give up this long after submission
+
+        Returns:
+            The job status stored on the session
+
+        Raises:
+            JobQueueFullError: Too many jobs waiting
+            RuntimeError: The queue is not running
+        """
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        if self.max_queue_size and self._queue.qsize() >= self.max_queue_size:
+            self.rejected += 1
+            raise JobQueueFullError(f"Job queue is full ({self.max_queue_size} jobs waiting)")
+
+        deadline_seconds = deadline_seconds or self.default_deadline_seconds
+        job = _Job(
+            session_id, run, on_success, PRIORITIES[priority],
+            time.monotonic() + deadline_seconds,
+        )
+        now = datetime.utcnow()
+        session["status"] = "queued"
+        session["job"] = {
+            "status": "queued",
+            "priority": priority,
+            "attempts": 0,
+            "queued_at": now,
+            "deadline_at": now + timedelta(seconds=deadline_seconds),
+        }
+        self.store.set(session_id, session)
+        self._queue.put_nowait((job.priority, next(self._sequence), job))
+        self.submitted += 1
+        return session["job"]
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                await self._execute(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job for session {job.session_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: _Job) -> None:
+        remaining = job.deadline - time.monotonic()
+        if remaining <= 0:
+            self.expired += 1
+            self._finish(job, "expired", "expired", error="Deadline passed before the job ran")
+            return
+
+        if job.started is None:
+            job.started = time.perf_counter()
+            self._wait_ms.append((job.started - job.submitted) * 1000)
+        job.attempts += 1
+        if not self._update(job, "running", "generating", attempts=job.attempts):
+            return  # Session deleted or expired
+
+        self.running += 1
+        try:
+            result = await asyncio.wait_for(job.run(), remaining)
+        except asyncio.TimeoutError:
+            # A blocking LLM call already on a worker thread cannot be
+            # interrupted; it finishes unobserved (LLM executor "abandoned")
+            logger.warning(f"Job for session {job.session_id} passed its deadline while running")
+            self.expired += 1
+            self._finish(job, "expired", "expired", error="Deadline passed while running")
+            return
+        except Exception as e:
+            self._retry_or_fail(job, e)
+            return
+        finally:
+            self.running -= 1
+
+        def store_result(session: dict) -> None:
+            if job.on_success is not None:
+                job.on_success(session, result)
+
+        self.completed += 1
+        self._finish(job, "done", None, change=store_result)
+
+    def _retry_or_fail(self, job: _Job, error: Exception) -> None:
+        delay = self.retry_backoff_seconds * 2 ** (job.attempts - 1)
+        if job.attempts > self.max_retries or time.monotonic() + delay >= job.deadline:
+            self.failed += 1
+            record_error("plan_job", error)
+            logger.error(f"Job for session {job.session_id} failed: {error}")
+            self._finish(job, "failed", "failed", error=str(error))
+            return
+
+        self.retried += 1
+        logger.warning(
+            f"Job for session {job.session_id} failed (attempt {job.attempts}), "
+            f"retrying in {delay:.1f}s: {error}"
+        )
+        self._update(job, "retrying", "queued", last_error=str(error))
+        self._retries[id(job)] = asyncio.get_running_loop().call_later(delay, self._requeue, job)
+
+    def _requeue(self, job: _Job) -> None:
+        del self._retries[id(job)]
+        self._queue.put_nowait((job.priority, next(self._sequence), job))
+
+    def _finish(
+        self,
+        job: _Job,
+        job_status: str,
+        session_status: Optional[str],
+        change: Optional[Callable[[dict], None]] = None,
+        **fields: Any,
+    ) -> None:
+        self._latency_ms.append((time.perf_counter() - job.submitted) * 1000)
+        self._update(job, job_status, session_status, change, finished_at=datetime.utcnow(), **fields)
+
+    def _update(
+        self,
+        job: _Job,
+        job_status: str,
+        session_status: Optional[str],
+        change: Optional[Callable[[dict], None]] = None,
+        **fields: Any,
+    ) -> bool:
+        """Write job progress to the session and wake subscribers."""
+        session = self.store.get(job.session_id)
+        if session is None:
+            return False
+        session["job"].update(status=job_status, **fields)
+        if session_status is not None:
+            session["status"] = session_status
+        if change is not None:
+            change(session)
+        self.store.set(job.session_id, session)
+
+        subscription = self._subscriptions.pop(job.session_id, None)
+        if subscription is not None:
+            subscription.event.set()
+        return True
+
+    async def wait_for_change(self, session_id: str, timeout: float) -> None:
+        """
+        Wait until a job in this process updates the session, or ``timeout``
+        passes (callers re-read the session either way, which also picks up
+        changes made by other worker processes).
+        """
+        subscription = self._subscriptions.setdefault(session_id, _Subscription())
+        subscription.waiters += 1
+        try:
+            await asyncio.wait_for(subscription.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # The last waiter cleans up: sessions updated by other processes,
+            # or never updated at all, must not leave a subscription behind
+            subscription.waiters -= 1
+            if not subscription.waiters and self._subscriptions.get(session_id) is subscription:
+                del self._subscriptions[session_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, counters and recent latency percentiles for /health."""
+        waits = sorted(self._wait_ms)
+        latencies = sorted(self._latency_ms)
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "running": self.running,
+            "waiting_to_retry": len(self._retries),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "expired": self.expired,
+            "retried": self.retried,
+            "rejected": self.rejected,
+            "wait_ms_p50": round(_percentile(waits, 0.5), 1),
+            "wait_ms_p95": round(_percentile(waits, 0.95), 1),
+            "latency_ms_p50": round(_percentile(latencies, 0.5), 1),
+            "latency_ms_p95": round(_percentile(latencies, 0.95), 1),
+        }
+
+
+def create_plan_job_queue(store: Optional[SessionStore] = None) -> JobQueue:
+    return JobQueue(
+        store or session_store,
+        workers=settings.plan_job_workers,
+        max_queue_size=settings.plan_job_queue_size,
+        max_retries=settings.plan_job_max_retries,
+        retry_backoff_seconds=settings.plan_job_retry_backoff_seconds,
+        default_deadline_seconds=settings.plan_job_deadline_seconds,
+    )
+
+
+plan_jobs = create_plan_job_queue()
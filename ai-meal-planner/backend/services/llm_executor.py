@@ -0,0 +1,203 @@
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMQueueFullError(RuntimeError):
+    """Raised when the LLM executor queue is at capacity."""
+
+
+class LLMExecutor:
+    """
+    Bounded thread pool for blocking LLM calls.
+
+    The Gemini SDK calls are synchronous, so running them directly inside an
+    ``async def`` route blocks the event loop. This executor runs them on a
+    fixed number of worker threads, rejects new work once the backlog reaches
+    ``max_queue_size`` and records queue depth and wait-time metrics.
+    """
+
+    def __init__(self, max_workers: int, max_queue_size: int = 0):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._abandoned = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+
+    def _get_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="llm-worker",
+            )
+        return self._pool
+
+    def _execute(self, submitted_at: float, func: Callable[..., Any]) -> Any:
+        started_at = time.perf_counter()
+        wait = started_at - submitted_at
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+
+        failed = False
+        try:
+            return func()
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._total_run += time.perf_counter() - started_at
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def _submit(self, call: Callable[[], Any]) -> "asyncio.Future[Any]":
+        with self._lock:
+            if self.max_queue_size and self._queued >= self.max_queue_size:
+                self._rejected += 1
+                raise LLMQueueFullError(
+                    f"LLM queue is full ({self._queued} calls waiting)"
+                )
+            self._queued += 1
+
+        loop = asyncio.get_running_loop()
+        future = self._get_pool().submit(self._execute, time.perf_counter(), call)
+        # A call cancelled while still queued (awaiting task cancelled,
+        # shutdown) never reaches _execute, so give its slot back here
+        future.add_done_callback(self._release_if_cancelled)
+        wrapped = asyncio.wrap_future(future, loop=loop)
+        wrapped.add_done_callback(functools.partial(self._count_abandoned, future))
+        return wrapped
+
+    def _count_abandoned(
+        self, future: "concurrent.futures.Future[Any]", wrapped: "asyncio.Future[Any]"
+    ) -> None:
+        # Cancelling the awaiting task cannot stop a call already running on
+        # a worker: it finishes in the background with nobody waiting for it
+        if wrapped.cancelled() and not future.cancelled():
+            with self._lock:
+                self._abandoned += 1
+
+    def _release_if_cancelled(self, future: "concurrent.futures.Future[Any]") -> None:
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking function on the LLM worker pool.
+
+        Args:
+            func: Blocking callable (e.g. generate_meal_plan_tool)
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns
+
+        Raises:
+            LLMQueueFullError: If the number of waiting calls reached max_queue_size
+        """
+        return await self._submit(functools.partial(func, *args, **kwargs))
+
+    async def iterate(
+        self, func: Callable[..., Iterable[Any]], *args: Any, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        """
+        Consume a blocking iterator (e.g. a streaming LLM response) on the pool.
+
+        The iterator occupies one worker for its whole lifetime and its items
+        are handed back to the event loop as they are produced.
+
+        Args:
+            func: Callable returning a blocking iterable
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Yields:
+            Items produced by the iterable
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        cancelled = threading.Event()
+
+        def pump() -> None:
+            try:
+                for item in func(*args, **kwargs):
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except BaseException as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+                raise
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+        future = self._submit(pump)
+        try:
+            while True:
+                item, error = await queue.get()
+                if item is done:
+                    if error is not None:
+                        raise error
+                    break
+                yield item
+        finally:
+            # Stop the producer early if the consumer went away
+            cancelled.set()
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of executor metrics."""
+        with self._lock:
+            started = self._completed + self._failed + self._running
+            finished = self._completed + self._failed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "queue_depth": self._queued,
+                "in_flight": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "abandoned": self._abandoned,
+                "avg_wait_ms": round(self._total_wait / started * 1000, 2) if started else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 2),
+                "avg_run_ms": round(self._total_run / finished * 1000, 2) if finished else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads."""
+        if self._pool is not None:
+            logger.info("Shutting down LLM executor...")
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+
+llm_executor = LLMExecutor(
+    max_workers=settings.llm_max_concurrency,
+    max_queue_size=settings.llm_max_queue_size,
+)
@@ -0,0 +1,326 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"\d+")
+
+
+def normalize_preferences(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def shingles(text: str, size: int = 3) -> frozenset:
+    """Character shingles of a normalized string."""
+    padded = f" {text} "
+    if len(padded) <= size:
+        return frozenset([padded])
+    return frozenset(padded[i:i + size] for i in range(len(padded) - size + 1))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    """Jaccard similarity of two shingle sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class CacheBackend:
+    """Storage interface for cached meal plans."""
+
+    def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def set(self, key: str, scope: str, text: str, value: dict) -> None:
+        raise NotImplementedError
+
+    def candidates(self, scope: str) -> List[Tuple[str, str]]:
+        """Return (key, normalized text) pairs for near-duplicate lookup."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU cache with TTL expiry."""
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str, str, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, created_at: float) -> bool:
+        return bool(self.ttl_seconds) and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry[0]):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[3]
+
+    def set(self, key: str, scope: str, text: str, value: dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), scope, text, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def candidates(self, scope: str) -> List[Tuple[str, str]]:
+        with self._lock:
+            return [
+                (key, entry[2])
+                for key, entry in self._entries.items()
+                if entry[1] == scope and not self._expired(entry[0])
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """On-disk LRU cache with TTL expiry that survives restarts."""
+
+    def __init__(self, path: str, max_entries: int = 1000, ttl_seconds: float = 86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._conn  # Create the schema eagerly
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # SQLite connections must not cross a fork, so reconnect per process
+        if self._connection is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None, timeout=30
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS plan_cache (
+                    key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_plan_cache_scope ON plan_cache(scope)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_plan_cache_accessed ON plan_cache(accessed_at)"
+            )
+            self._connection, self._pid = conn, os.getpid()
+        return self._connection
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl_seconds if self.ttl_seconds else 0.0
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM plan_cache WHERE key = ? AND created_at >= ?",
+                (key, self._cutoff()),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE plan_cache SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+        return json.loads(row[0])
+
+    def set(self, key: str, scope: str, text: str, value: dict) -> None:
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plan_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, scope, text, payload, now, now),
+            )
+            self._conn.execute("DELETE FROM plan_cache WHERE created_at < ?", (self._cutoff(),))
+            self._conn.execute(
+                """
+                DELETE FROM plan_cache WHERE key IN (
+                    SELECT key FROM plan_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+
+    def candidates(self, scope: str) -> List[Tuple[str, str]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, text FROM plan_cache WHERE scope = ? AND created_at >= ?",
+                (scope, self._cutoff()),
+            ).fetchall()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM plan_cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()[0]
+
+
+class PlanCache:
+    """
+    Exact-match and near-duplicate cache for generated meal plans.
+
+    Entries are keyed on the normalized preferences, requested days, model
+    name and temperature. When ``similarity_threshold`` is set, a miss falls
+    back to the most similar cached request (character-shingle Jaccard) with
+    the same days/model/temperature. Requests whose numbers differ
+    ("for 2 people" vs "for 4 people") are never treated as near duplicates.
+    """
+
+    def __init__(self, backend: CacheBackend, similarity_threshold: float = 0.0):
+        self.backend = backend
+        self.similarity_threshold = similarity_threshold
+        self._shingles: Dict[str, frozenset] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _scope(days: Optional[int], model: str, temperature: float) -> str:
+        return f"{days or 'auto'}|{model}|{temperature}"
+
+    @classmethod
+    def make_key(
+        cls, preferences: str, days: Optional[int], model: str, temperature: float
+    ) -> str:
+        """Stable cache key for a generation request."""
+        raw = f"{cls._scope(days, model, temperature)}|{normalize_preferences(preferences)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _shingles_for(self, text: str) -> frozenset:
+        cached = self._shingles.get(text)
+        if cached is None:
+            cached = shingles(text)
+            if len(self._shingles) > 10000:
+                self._shingles.clear()
+            self._shingles[text] = cached
+        return cached
+
+    def _find_similar(self, text: str, scope: str) -> Optional[dict]:
+        target = self._shingles_for(text)
+        numbers = _NUMBER.findall(text)
+        best_key, best_score = None, self.similarity_threshold
+        for key, candidate in self.backend.candidates(scope):
+            if _NUMBER.findall(candidate) != numbers:
+                continue
+            score = jaccard(target, self._shingles_for(candidate))
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        return self.backend.get(best_key)
+
+    def get(
+        self, preferences: str, days: Optional[int], model: str, temperature: float
+    ) -> Optional[dict]:
+        """Look up a cached plan, returning None on a miss."""
+        key = self.make_key(preferences, days, model, temperature)
+        value = self.backend.get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        if self.similarity_threshold:
+            value = self._find_similar(
+                normalize_preferences(preferences), self._scope(days, model, temperature)
+            )
+            if value is not None:
+                with self._lock:
+                    self.near_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(
+        self,
+        preferences: str,
+        days: Optional[int],
+        model: str,
+        temperature: float,
+        value: dict,
+    ) -> None:
+        """Store a generated plan."""
+        self.backend.set(
+            self.make_key(preferences, days, model, temperature),
+            self._scope(days, model, temperature),
+            normalize_preferences(preferences),
+            value,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for /health."""
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "size": len(self.backend),
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.near_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+def create_plan_cache() -> Optional[PlanCache]:
+    """Build the plan cache configured in settings (None when disabled)."""
+    if not settings.plan_cache_enabled:
+        return None
+
+    if settings.plan_cache_backend == "sqlite":
+        backend: CacheBackend = SQLiteCacheBackend(
+            settings.plan_cache_path,
+            max_entries=settings.plan_cache_max_entries,
+            ttl_seconds=settings.plan_cache_ttl_seconds,
+        )
+    else:
+        backend = MemoryCacheBackend(
+            max_entries=settings.plan_cache_max_entries,
+            ttl_seconds=settings.plan_cache_ttl_seconds,
+        )
+
+    logger.info(f"Plan cache enabled ({type(backend).__name__})")
+    return PlanCache(backend, similarity_threshold=settings.plan_cache_similarity_threshold)
+
+
+plan_cache = create_plan_cache()
@@ -0,0 +1,282 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from config.settings import settings
+from scrapers import ScrapeError, ScrapeScheduler, create_scheduler, unavailable_row
+from services.price_history import PriceHistory, price_history
+from services.session_store import SessionStore, session_store
+from tools.ingredient_parser import parse_ingredient
+from tools.product_catalog import ProductCatalog
+
+logger = logging.getLogger(__name__)
+
+
+class PriceCollectionQueueFullError(Exception):
+    """Raised when no more price collection jobs can be queued."""
+
+
+def _field(row: Any, name: str) -> Any:
+    return row.get(name) if isinstance(row, dict) else getattr(row, name)
+
+
+def merge_price_rows(extension_rows: Sequence[Any], server_rows: Sequence[Any]) -> List[Any]:
+    """
+    Combine extension-reported and server-scraped prices.
+
+    The extension sees the user's own store session (their prices, their
+    stock), so for every (ingredient, store) it reported its rows win;
+    server rows only fill in the pairs it didn't cover.
+    """
+    covered = {(_field(row, "ingredient"), _field(row, "store")) for row in extension_rows}
+    merged = list(extension_rows)
+    merged.extend(
+        row for row in server_rows
+        if (_field(row, "ingredient"), _field(row, "store")) not in covered
+    )
+    return merged
+
+
+class PriceCollector:
+    """
+    Background price collection for generated meal plans.
+
+    Jobs (one per session) wait in a bounded queue and are taken by a few
+    worker tasks. Each job searches every store for every shopping list
+    item at once through the scrape scheduler, which keeps each store
+    within its own rate and connection limits. Rows are written to the
+    session as each search completes, so ``GET /api/session/{id}`` shows
+    partial results and a price report can use whatever has arrived.
+
+    Searched products go into a product catalog, and only the products of
+    each search matching the ingredient best are kept (a search for "pienas" also
+    returns chocolate, which the package solver would otherwise happily
+    pick for being cheap). When nothing matches well, the store's top
+    result is kept. Kept products are appended to the price history, when
+    one is given, once the job finishes.
+
+    Session fields:
+        price_collection: status ("queued", "running", "done", "failed"), progress
+            counters, errors and timestamps
+        server_prices: ProductPrice-shaped rows scraped so far
+    """
+
+    def __init__(
+        self,
+        store: SessionStore,
+        scheduler_factory: Callable[[], ScrapeScheduler] = create_scheduler,
+        workers: int = 2,
+        max_queue_size: int = 100,
+        catalog: Optional[ProductCatalog] = None,
+        max_matches: int = 3,
+        history: Optional[PriceHistory] = None,
+    ):
+        self.store = store
+        self.scheduler_factory = scheduler_factory
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.catalog = catalog if catalog is not None else ProductCatalog()
+        self.max_matches = max_matches
+        self.history = history
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._scheduler: Optional[ScrapeScheduler] = None
+
+        # Counters
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._total_seconds = 0.0
+
+    async def start(self) -> None:
+        """Start the worker tasks on the running event loop."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(self.max_queue_size)
+        self._scheduler = self.scheduler_factory()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel running jobs and release the HTTP client."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        if self._scheduler is not None:
+            await self._scheduler.close()
+            self._scheduler = None
+
+    def submit(
+        self,
+        session_id: str,
+        ingredients: Iterable[str],
+        stores: Optional[Iterable[str]] = None,
+        session: Optional[dict] = None,
+    ) -> Dict:
+        """
+        Queue price collection for a session's shopping list.
+
+        Pass ``session`` when the caller is already updating the session
+        dict and will write it back itself.
+
+        Returns:
+            The session's price_collection status
+
+        Raises:
+            KeyError: Unknown session
+            PriceCollectionQueueFullError: Too many jobs waiting
+        """
+        if self._queue is None:
+            raise RuntimeError("Price collector is not running")
+        persist = session is None
+        if session is None:
+            session = self.store.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+
+        current = session.get("price_collection")
+        if current is not None and current["status"] in ("queued", "running"):
+            return current
+
+        ingredients = list(dict.fromkeys(ingredients))
+        stores = list(stores) if stores is not None else settings.supported_stores
+        try:
+            self._queue.put_nowait((session_id, ingredients, stores, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise PriceCollectionQueueFullError(
+                f"Price collection queue is full ({self.max_queue_size} jobs waiting)"
+            )
+
+        self.queued += 1
+        session["price_collection"] = {
+            "status": "queued",
+            "stores": stores,
+            "total": len(ingredients) * len(stores),
+            "completed": 0,
+            "errors": [],
+            "queued_at": datetime.utcnow(),
+        }
+        session["server_prices"] = []
+        if persist:
+            self.store.set(session_id, session)
+        return session["price_collection"]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._collect(*job)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Price collection for session {job[0]} failed: {e}")
+                self._update(job[0], lambda s: s["price_collection"].update(
+                    status="failed", error=str(e), finished_at=datetime.utcnow()
+                ))
+            finally:
+                self._total_seconds += time.perf_counter() - job[3]
+                self._queue.task_done()
+
+    def _update(self, session_id: str, change: Callable[[dict], None]) -> bool:
+        """Apply a change to a session and write it back (False if it is gone)."""
+        session = self.store.get(session_id)
+        if session is None or "price_collection" not in session:
+            return False
+        change(session)
+        self.store.set(session_id, session)
+        return True
+
+    async def _collect(
+        self, session_id: str, ingredients: List[str], stores: List[str], _queued_at: float
+    ) -> None:
+        if not self._update(session_id, lambda s: s["price_collection"].update(
+            status="running", started_at=datetime.utcnow()
+        )):
+            return  # Session expired while queued
+
+        collected: List[Dict] = []
+
+        async def search(ingredient: str, store: str) -> None:
+            # Search by product name; keep the quantity on the row for package sizing
+            query = parse_ingredient(ingredient).name
+            try:
+                rows = self._best_products(ingredient, store, await self._scheduler.search(store, query))
+                for row in rows:
+                    row["ingredient"] = ingredient
+                collected.extend(rows)
+                rows = rows or [unavailable_row(ingredient, store)]
+                error = None
+            except ScrapeError as e:
+                rows, error = [], {"ingredient": ingredient, "store": store, "error": str(e)}
+
+            def record(session: dict) -> None:
+                session["server_prices"].extend(rows)
+                progress = session["price_collection"]
+                progress["completed"] += 1
+                if error is not None:
+                    progress["errors"].append(error)
+
+            self._update(session_id, record)
+
+        await asyncio.gather(*(
+            search(ingredient, store) for ingredient in ingredients for store in stores
+        ))
+        if self.history is not None:
+            self.history.record(collected)
+        self._update(session_id, lambda s: s["price_collection"].update(
+            status="done", finished_at=datetime.utcnow()
+        ))
+
+    def _best_products(self, ingredient: str, store: str, rows: List[Dict]) -> List[Dict]:
+        """Keep the searched products that match the ingredient best."""
+        if not rows:
+            return rows
+        self.catalog.add(rows)
+        # Only this search's rows: the catalog's older products may be gone
+        # from the store, and their prices would go to history as new.
+        # Near ties are kept (brands, package sizes) for the package solver to choose from.
+        matches = self.catalog.match(
+            ingredient, store, limit=self.max_matches, within=0.05, among=rows
+        )
+        if not matches:
+            return rows[:1]
+        return [dict(match.product) for match in matches]
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue counters for /health."""
+        finished = self.completed + self.failed
+        return {
+            "running": bool(self._tasks),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queued": self.queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_job_seconds": round(self._total_seconds / finished, 3) if finished else 0.0,
+            "stores": self._scheduler.stats() if self._scheduler is not None else {},
+            "catalog": self.catalog.stats(),
+        }
+
+
+def create_price_collector(store: Optional[SessionStore] = None) -> PriceCollector:
+    return PriceCollector(
+        store or session_store,
+        workers=settings.price_collection_workers,
+        max_queue_size=settings.price_collection_queue_size,
+        catalog=ProductCatalog(
+            min_score=settings.product_match_min_score,
+            max_products=settings.product_catalog_max_products,
+        ),
+        max_matches=settings.product_match_max_candidates,
+        history=price_history,
+    )
+
+
+price_collector = create_price_collector()
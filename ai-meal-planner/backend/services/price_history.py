@@ -0,0 +1,417 @@
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from tools.ingredient_parser import parse_ingredient
+from tools.product_catalog import normalize_name
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# One append-only file per column, 24 bytes per observation
+_COLUMNS: Dict[str, Any] = {
+    "day": np.int32,  # Days since 1970-01-01
+    "store": np.int16,
+    "item": np.int32,  # Ingredient key, see ingredient_key()
+    "product": np.int32,  # Store product name, -1 when unknown
+    "unit": np.int16,
+    "price": np.float32,
+    "unit_price": np.float32,
+}
+_STRING_KINDS = ("store", "item", "product", "unit")
+_STRINGS_FILE = "strings.jsonl"
+_LOCK_FILE = ".lock"
+_EPOCH = date(1970, 1, 1)
+
+
+def _field(row: Any, name: str, default: Any = None) -> Any:
+    return row.get(name, default) if isinstance(row, dict) else getattr(row, name, default)
+
+
+def _day_number(day: date) -> int:
+    return (day - _EPOCH).days
+
+
+def _day(number: int) -> date:
+    return _EPOCH + timedelta(days=int(number))
+
+
+def ingredient_key(ingredient: str) -> str:
+    """History key of an ingredient: "Morkų 500g" and "morkos 1kg" -> "mork"."""
+    return " ".join(normalize_name(parse_ingredient(ingredient).name))
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """Exclusive lock shared by every worker process appending to the history."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class PriceHistory:
+    """
+    Append-only store of observed prices, one row per (store, product, day).
+
+    Each column lives in its own flat binary file and is read through a
+    read-only NumPy memory map, so a query touches only the columns it
+    filters on and the OS page cache does the caching. Strings (stores,
+    ingredient keys, product names, units) are interned into an append-only
+    JSON lines table and stored as integer ids.
+
+    Rows are appended in day order, which keeps the day column sorted: a
+    time range is two binary searches, and per-ingredient and per-store
+    filters are vectorized comparisons on the rows inside it. Observing the
+    same product again on the same day appends a new row; queries keep the
+    last one.
+
+    Appends from several uvicorn workers are serialized with a file lock.
+    A crash between column writes leaves some columns a row longer than
+    others; readers use the shortest column and the next append trims the
+    rest.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._strings: Dict[str, List[str]] = {kind: [] for kind in _STRING_KINDS}
+        self._ids: Dict[str, Dict[str, int]] = {kind: {} for kind in _STRING_KINDS}
+        self._strings_offset = 0
+        self._view: Optional[Tuple[int, Dict[str, np.ndarray], bool]] = None
+
+        # Counters
+        self.recorded = 0
+        self.filled = 0
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def __len__(self) -> int:
+        return self._row_count()
+
+    def _row_count(self) -> int:
+        counts = []
+        for name, dtype in _COLUMNS.items():
+            try:
+                size = os.path.getsize(self._file(f"{name}.bin"))
+            except FileNotFoundError:
+                return 0
+            counts.append(size // np.dtype(dtype).itemsize)
+        return min(counts)
+
+    def _load_strings(self) -> None:
+        """Read string table lines appended since the last load (by any worker)."""
+        try:
+            with open(self._file(_STRINGS_FILE), "rb") as handle:
+                handle.seek(self._strings_offset)
+                data = handle.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b"\n") + 1  # Ignore a partly written last line
+        for line in data[:end].splitlines():
+            kind, text = json.loads(line)
+            # Ids are positions within a kind, so every worker agrees on them
+            self._ids[kind].setdefault(text, len(self._strings[kind]))
+            self._strings[kind].append(text)
+        self._strings_offset += end
+
+    def _snapshot(self) -> Tuple[Dict[str, np.ndarray], bool]:
+        """Memory-mapped columns of every complete row, and whether days are sorted."""
+        with self._lock:
+            count = self._row_count()
+            # Strings are written before the rows using them
+            self._load_strings()
+            if self._view is None or self._view[0] != count:
+                columns = {
+                    name: (
+                        np.memmap(self._file(f"{name}.bin"), dtype=dtype, mode="r", shape=(count,))
+                        if count else np.empty(0, dtype=dtype)
+                    )
+                    for name, dtype in _COLUMNS.items()
+                }
+                days = columns["day"]
+                self._view = (count, columns, bool(np.all(days[1:] >= days[:-1])))
+            return self._view[1], self._view[2]
+
+    def record(self, rows: Iterable[Any], day: Optional[date] = None) -> int:
+        """
+        Append observed prices.
+
+        Unavailable products and rows without a price are skipped.
+
+        Args:
+            rows: ProductPrice models or dicts
+            day: Day the prices were seen (default: today, UTC)
+
+        Returns:
+            Number of rows appended
+        """
+        observations = []
+        for row in rows:
+            price = float(_field(row, "price") or 0.0)
+            if not _field(row, "available", True) or price <= 0:
+                continue
+            item = ingredient_key(_field(row, "ingredient"))
+            if not item:
+                continue
+            observations.append((
+                _field(row, "store"), item, _field(row, "product_name"), _field(row, "unit") or "vnt",
+                price, float(_field(row, "unit_price") or price),
+            ))
+        if not observations:
+            return 0
+
+        day_number = _day_number(day or datetime.utcnow().date())
+        with self._lock, _file_lock(self._file(_LOCK_FILE)):
+            self._sync_strings()
+            new_strings: List[Tuple[str, str]] = []
+
+            def intern(kind: str, text: str) -> int:
+                string_id = self._ids[kind].get(text)
+                if string_id is None:
+                    string_id = self._ids[kind][text] = len(self._strings[kind])
+                    self._strings[kind].append(text)
+                    new_strings.append((kind, text))
+                return string_id
+
+            values: Dict[str, List] = {name: [] for name in _COLUMNS}
+            for store, item, product, unit, price, unit_price in observations:
+                values["day"].append(day_number)
+                values["store"].append(intern("store", store))
+                values["item"].append(intern("item", item))
+                values["product"].append(intern("product", product) if product else -1)
+                values["unit"].append(intern("unit", unit))
+                values["price"].append(price)
+                values["unit_price"].append(unit_price)
+
+            if new_strings:
+                lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in new_strings)
+                encoded = lines.encode("utf-8")
+                with open(self._file(_STRINGS_FILE), "ab") as handle:
+                    handle.write(encoded)
+                self._strings_offset += len(encoded)
+
+            count = self._row_count()
+            for name, dtype in _COLUMNS.items():
+                with open(self._file(f"{name}.bin"), "ab") as handle:
+                    handle.truncate(count * np.dtype(dtype).itemsize)  # Drop a torn append
+                    handle.write(np.asarray(values[name], dtype=dtype).tobytes())
+
+        self.recorded += len(observations)
+        return len(observations)
+
+    def _sync_strings(self) -> None:
+        """Catch up with other workers' strings and drop a torn last line."""
+        self._load_strings()
+        path = self._file(_STRINGS_FILE)
+        if os.path.exists(path) and os.path.getsize(path) > self._strings_offset:
+            with open(path, "r+b") as handle:
+                handle.truncate(self._strings_offset)
+
+    def _string_ids(self, kind: str, texts: Iterable[str]) -> np.ndarray:
+        ids = self._ids[kind]
+        return np.array([ids[text] for text in texts if text in ids], dtype=np.int64)
+
+    def _select(
+        self,
+        columns: Dict[str, np.ndarray],
+        days_sorted: bool,
+        start: Optional[date],
+        end: Optional[date],
+        items: Optional[np.ndarray] = None,
+        stores: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Indices of rows within a day range and matching items and stores."""
+        days = columns["day"]
+        low = _day_number(start) if start is not None else np.iinfo(np.int32).min
+        high = _day_number(end) if end is not None else np.iinfo(np.int32).max
+        if days_sorted:
+            index = np.arange(
+                np.searchsorted(days, low, side="left"), np.searchsorted(days, high, side="right")
+            )
+        else:
+            index = np.flatnonzero((days >= low) & (days <= high))
+        if items is not None:
+            index = index[np.isin(columns["item"][index], items)]
+        if stores is not None:
+            index = index[np.isin(columns["store"][index], stores)]
+        return index
+
+    @staticmethod
+    def _first_per_group(
+        columns: Dict[str, np.ndarray], index: np.ndarray, fields: Sequence[str], order_by: np.ndarray
+    ) -> np.ndarray:
+        """Per group of equal ``fields``, the row with the smallest ``order_by``."""
+        if len(index) <= 1:
+            return index
+        keys = [columns[field][index] for field in fields]
+        order = np.lexsort([order_by, *reversed(keys)])
+        keys = [key[order] for key in keys]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = np.any([key[1:] != key[:-1] for key in keys], axis=0)
+        return np.sort(index[order[first]])
+
+    def _last_observations(self, columns: Dict[str, np.ndarray], index: np.ndarray) -> np.ndarray:
+        """Drop same-day re-observations of a product, keeping the last."""
+        return self._first_per_group(columns, index, ("store", "item", "product", "day"), -index)
+
+    def _rows(self, columns: Dict[str, np.ndarray], index: np.ndarray) -> List[Dict[str, Any]]:
+        """Rows as dicts; columns are gathered once and converted in bulk."""
+        days = {number: _day(number).isoformat() for number in np.unique(columns["day"][index]).tolist()}
+        stores, items, products, units = (self._strings[kind] for kind in _STRING_KINDS)
+        return [
+            {
+                "day": days[day],
+                "store": stores[store],
+                "ingredient": items[item],
+                "product_name": products[product] if product >= 0 else None,
+                "price": round(price, 2),
+                "unit_price": round(unit_price, 2),
+                "unit": units[unit],
+            }
+            for day, store, item, product, unit, price, unit_price in zip(
+                *(columns[name][index].tolist() for name in _COLUMNS)
+            )
+        ]
+
+    def query(
+        self,
+        ingredient: Optional[str] = None,
+        store: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Observed prices, oldest first.
+
+        Args:
+            ingredient: Only this ingredient (quantity and inflection ignored)
+            store: Only this store
+            start: First day, inclusive
+            end: Last day, inclusive
+
+        Returns:
+            Rows with day, store, ingredient key, product_name, price, unit_price and unit
+        """
+        columns, days_sorted = self._snapshot()
+        items = self._string_ids("item", [ingredient_key(ingredient)]) if ingredient is not None else None
+        stores = self._string_ids("store", [store]) if store is not None else None
+        index = self._last_observations(columns, self._select(columns, days_sorted, start, end, items, stores))
+        return self._rows(columns, index)
+
+    def latest(
+        self,
+        ingredients: Iterable[str],
+        stores: Iterable[str],
+        max_age_days: int = 7,
+        today: Optional[date] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Most recent prices for a shopping list, to fill stores nobody checked.
+
+        For every ingredient and store, returns the products seen on the last
+        day within ``max_age_days`` that the ingredient was priced there.
+
+        Returns:
+            ProductPrice-shaped rows with ``ingredient`` set to the shopping
+            list item and the observation ``day``
+        """
+        by_key: Dict[str, List[str]] = {}
+        for ingredient in ingredients:
+            by_key.setdefault(ingredient_key(ingredient), []).append(ingredient)
+        columns, days_sorted = self._snapshot()
+        today = today or datetime.utcnow().date()
+        index = self._select(
+            columns, days_sorted, today - timedelta(days=max_age_days), today,
+            self._string_ids("item", by_key), self._string_ids("store", stores),
+        )
+        index = self._last_observations(columns, index)
+        if len(index) == 0:
+            return []
+
+        # Keep each (ingredient, store)'s newest day
+        days = columns["day"][index]
+        pairs = columns["item"][index].astype(np.int64) << 16 | columns["store"][index].astype(np.int64)
+        unique_pairs, inverse = np.unique(pairs, return_inverse=True)
+        newest = np.full(len(unique_pairs), np.iinfo(np.int32).min, dtype=np.int64)
+        np.maximum.at(newest, inverse, days)
+        index = index[days == newest[inverse]]
+
+        rows = []
+        for row in self._rows(columns, index):
+            for ingredient in by_key[row["ingredient"]]:
+                rows.append({**row, "ingredient": ingredient, "available": True})
+        self.filled += len(rows)
+        return rows
+
+    def trend(
+        self,
+        ingredient: str,
+        store: Optional[str] = None,
+        days: int = 30,
+        today: Optional[date] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Daily best unit price of an ingredient per store.
+
+        Returns:
+            Store -> days (oldest first) with the cheapest product per unit
+        """
+        columns, days_sorted = self._snapshot()
+        today = today or datetime.utcnow().date()
+        items = self._string_ids("item", [ingredient_key(ingredient)])
+        stores = self._string_ids("store", [store]) if store is not None else None
+        index = self._select(columns, days_sorted, today - timedelta(days=days - 1), today, items, stores)
+        index = self._last_observations(columns, index)
+        index = self._first_per_group(columns, index, ("store", "day"), columns["unit_price"][index])
+
+        trend: Dict[str, List[Dict[str, Any]]] = {}
+        for row in self._rows(columns, index):
+            trend.setdefault(row.pop("store"), []).append(row)
+        for series in trend.values():
+            series.sort(key=lambda row: row["day"])
+        return trend
+
+    def stats(self) -> Dict[str, Any]:
+        """History size for /health."""
+        columns, _ = self._snapshot()
+        days = columns["day"]
+        return {
+            "rows": len(days),
+            "stores": len(self._strings["store"]),
+            "ingredients": len(self._strings["item"]),
+            "products": len(self._strings["product"]),
+            "first_day": _day(days.min()).isoformat() if len(days) else None,
+            "last_day": _day(days.max()).isoformat() if len(days) else None,
+            "recorded": self.recorded,
+            "filled": self.filled,
+        }
+
+
+def create_price_history() -> Optional[PriceHistory]:
+    """Open the price history configured in settings (None when disabled)."""
+    if not settings.price_history_enabled:
+        return None
+    logger.info(f"Price history enabled ({settings.price_history_path})")
+    return PriceHistory(settings.price_history_path)
+
+
+price_history = create_price_history()
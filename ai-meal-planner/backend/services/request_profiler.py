@@ -0,0 +1,244 @@
+import cProfile
+import glob
+import hmac
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import random
+import re
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+try:
+    from pyinstrument import Profiler as Pyinstrument
+except ImportError:  # Optional: pip install ".[profiling]"
+    Pyinstrument = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+_PROFILE_ID = re.compile(r"^[0-9a-f]{12}$")
+MEDIA_TYPES = {
+    "html": "text/html; charset=utf-8",
+    "txt": "text/plain; charset=utf-8",
+    "prof": "application/octet-stream",
+}
+
+
+class _CProfileRun:
+    backend = "cprofile"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+
+    def render(self) -> Dict[str, bytes]:
+        text = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=text)
+        stats.sort_stats("cumulative").print_stats(80)
+        # .prof is the pstats dump format: snakeviz, ``python -m pstats``
+        return {"txt": text.getvalue().encode(), "prof": marshal.dumps(stats.stats)}
+
+
+class _PyinstrumentRun:
+    backend = "pyinstrument"
+
+    def __init__(self):
+        self._profiler = Pyinstrument(async_mode="enabled")
+        self._profiler.start()
+
+    def stop(self) -> None:
+        self._profiler.stop()
+
+    def render(self) -> Dict[str, bytes]:
+        return {
+            "html": self._profiler.output_html().encode(),
+            "txt": self._profiler.output_text(unicode=True).encode(),
+        }
+
+
+class RequestProfiler:
+    """
+    Opt-in profiling of individual requests on live workers.
+
+    A request is profiled when it carries an ``X-Profile`` header (holding
+    the token, when one is configured) or is picked by the sample rate.
+    Only one request per worker is profiled at a time; others run
+    normally. Profiles are written to a directory shared by the workers,
+    keeping the newest ``max_profiles``, and served by
+    ``GET /debug/profiles/{id}``.
+
+    pyinstrument, when installed, follows the request across ``await``s
+    and renders an HTML call tree. The cProfile fallback records
+    everything the event loop thread runs while the request is in flight,
+    including other requests' coroutines; LLM calls on the executor
+    threads show up as time spent awaiting them.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: float = 0.0,
+        token: str = "",
+        max_profiles: int = 50,
+        backend: str = "auto",
+    ):
+        if backend == "auto":
+            backend = "pyinstrument" if Pyinstrument is not None else "cprofile"
+        elif backend == "pyinstrument" and Pyinstrument is None:
+            raise ValueError("Profiling backend 'pyinstrument' is not installed")
+        self.path = path
+        self.sample_rate = sample_rate
+        self.token = token
+        self.max_profiles = max_profiles
+        self.backend = backend
+        os.makedirs(path, exist_ok=True)
+        self._running = False
+
+        # Counters
+        self.profiled = 0
+        self.skipped_busy = 0
+
+    def authorized(self, token: Optional[str]) -> bool:
+        """Whether a header or query token may trigger or read profiles."""
+        if not self.token:
+            return True
+        return token is not None and hmac.compare_digest(token, self.token)
+
+    def wants(self, header: Optional[str]) -> bool:
+        """Whether to profile a request with this X-Profile header value."""
+        if header is not None:
+            return self.authorized(header)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self) -> Optional[Any]:
+        """Start profiling, or None while another request is being profiled."""
+        if self._running:
+            self.skipped_busy += 1
+            return None
+        self._running = True
+        return _PyinstrumentRun() if self.backend == "pyinstrument" else _CProfileRun()
+
+    def stop(self, run: Any) -> None:
+        run.stop()
+        self._running = False
+        self.profiled += 1
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex[:12]
+
+    def save(self, run: Any, profile_id: str, details: Dict[str, Any]) -> None:
+        """
+        Render a stopped profile to disk and drop the oldest beyond the limit.
+
+        Blocking (rendering takes a while for big profiles): run it off the
+        event loop.
+        """
+        outputs = run.render()
+        for fmt, data in outputs.items():
+            with open(os.path.join(self.path, f"{profile_id}.{fmt}"), "wb") as handle:
+                handle.write(data)
+        meta = {
+            "id": profile_id,
+            "backend": run.backend,
+            "formats": sorted(outputs),
+            "created_at": datetime.utcnow().isoformat(),
+            **details,
+        }
+        # Metadata last: a profile is listed once all its files exist
+        with open(os.path.join(self.path, f"{profile_id}.json"), "w") as handle:
+            json.dump(meta, handle)
+        self._prune()
+
+    def _prune(self) -> None:
+        for meta_path in self._meta_paths()[self.max_profiles:]:
+            for path in glob.glob(meta_path[: -len(".json")] + ".*"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # Pruned by another worker
+
+    def _meta_paths(self) -> List[str]:
+        """Profile metadata files, newest first."""
+        paths = []
+        for path in glob.glob(os.path.join(self.path, "*.json")):
+            try:
+                paths.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue
+        return [path for _, path in sorted(paths, reverse=True)]
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Stored profiles, newest first."""
+        profiles = []
+        for path in self._meta_paths():
+            try:
+                with open(path) as handle:
+                    profiles.append(json.load(handle))
+            except (FileNotFoundError, ValueError):
+                continue
+        return profiles
+
+    def get(self, profile_id: str, fmt: Optional[str] = None) -> Optional[Tuple[bytes, str]]:
+        """
+        A stored profile's contents.
+
+        Args:
+            profile_id: Id from the X-Profile-Id response header
+            fmt: "html", "txt" or "prof" (default: html when available, else txt)
+
+        Returns:
+            (data, format), or None if the profile or format doesn't exist
+        """
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        formats = [fmt] if fmt else ["html", "txt"]
+        for candidate in formats:
+            if candidate not in MEDIA_TYPES:
+                continue
+            try:
+                with open(os.path.join(self.path, f"{profile_id}.{candidate}"), "rb") as handle:
+                    return handle.read(), candidate
+            except FileNotFoundError:
+                continue
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Profiling counters for /health."""
+        return {
+            "backend": self.backend,
+            "sample_rate": self.sample_rate,
+            "profiled": self.profiled,
+            "skipped_busy": self.skipped_busy,
+            "stored": len(self._meta_paths()),
+        }
+
+
+def create_request_profiler() -> Optional[RequestProfiler]:
+    """Build the request profiler configured in settings (None when disabled)."""
+    if not settings.profiling_enabled:
+        return None
+    profiler = RequestProfiler(
+        settings.profiling_path,
+        sample_rate=settings.profiling_sample_rate,
+        token=settings.profiling_token,
+        max_profiles=settings.profiling_max_profiles,
+        backend=settings.profiling_backend,
+    )
+    if not settings.profiling_token:
+        logger.warning("Request profiling is enabled without PROFILING_TOKEN")
+    logger.info(f"Request profiling enabled ({profiler.backend}, sample rate {profiler.sample_rate})")
+    return profiler
+
+
+request_profiler = create_request_profiler()
@@ -0,0 +1,267 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class SessionStore:
+    """
+    Storage interface for workflow sessions.
+
+    Sessions expire ``ttl_seconds`` after their last write or read. Callers
+    that modify a session dict must write it back with ``set`` so shared
+    backends see the change.
+    """
+
+    def __init__(self, ttl_seconds: float = 21600, max_sessions: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.expired = 0
+        self.evicted = 0
+        self._expiry_task: Optional[asyncio.Task] = None
+
+    def get(self, session_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def set(self, session_id: str, data: dict) -> None:
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    def purge_expired(self) -> int:
+        """Drop expired sessions, returning how many were removed."""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        """Number of live sessions: expired ones count as gone before they are purged."""
+        raise NotImplementedError
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """Session counters for /health."""
+        return {
+            "backend": type(self).__name__,
+            "active": len(self),
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    async def _expire_periodically(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                removed = self.purge_expired()
+                if removed:
+                    logger.info(f"Expired {removed} sessions")
+            except Exception as e:
+                logger.error(f"Session expiry failed: {e}")
+
+    def start_expiry(self, interval: float) -> None:
+        """Start background expiry on the running event loop."""
+        if self._expiry_task is None:
+            self._expiry_task = asyncio.create_task(self._expire_periodically(interval))
+
+    def stop_expiry(self) -> None:
+        """Cancel background expiry."""
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            self._expiry_task = None
+
+
+class MemorySessionStore(SessionStore):
+    """In-process LRU session store with TTL expiry."""
+
+    def __init__(self, ttl_seconds: float = 21600, max_sessions: int = 10000):
+        super().__init__(ttl_seconds, max_sessions)
+        self._sessions: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expired(self, touched_at: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - touched_at > self.ttl_seconds
+
+    def get(self, session_id: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if self._expired(entry[0], now):
+                del self._sessions[session_id]
+                self.expired += 1
+                return None
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def set(self, session_id: str, data: dict) -> None:
+        with self._lock:
+            self._sessions[session_id] = (time.time(), data)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        removed = 0
+        with self._lock:
+            # Entries are ordered by last access, so stop at the first live one
+            while self._sessions:
+                session_id, (touched_at, _) = next(iter(self._sessions.items()))
+                if not self._expired(touched_at, now):
+                    break
+                del self._sessions[session_id]
+                removed += 1
+            self.expired += removed
+        return removed
+
+    def __len__(self) -> int:
+        now = time.time()
+        with self._lock:
+            # Expired entries are the least recently used, so they lead the order
+            expired = 0
+            for touched_at, _ in self._sessions.values():
+                if not self._expired(touched_at, now):
+                    break
+                expired += 1
+            return len(self._sessions) - expired
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store backed by a SQLite file in WAL mode.
+
+    Every uvicorn worker opens the same file, so any worker can serve any
+    session. Session data is stored as JSON; datetimes come back as ISO
+    strings.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 21600, max_sessions: int = 10000):
+        super().__init__(ttl_seconds, max_sessions)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._conn  # Create the schema eagerly
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # SQLite connections must not cross a fork, so reconnect per process
+        if self._connection is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None, timeout=30
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    touched_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_touched ON sessions(touched_at)")
+            self._connection, self._pid = conn, os.getpid()
+        return self._connection
+
+    def _cutoff(self, now: float) -> float:
+        return now - self.ttl_seconds if self.ttl_seconds else 0.0
+
+    def get(self, session_id: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE id = ? AND touched_at >= ?",
+                (session_id, self._cutoff(now)),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE sessions SET touched_at = ? WHERE id = ?", (now, session_id)
+            )
+        return json.loads(row[0])
+
+    def set(self, session_id: str, data: dict) -> None:
+        payload = json.dumps(data, default=_json_default, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                (session_id, payload, time.time()),
+            )
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            return cursor.rowcount > 0
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            expired = self._conn.execute(
+                "DELETE FROM sessions WHERE touched_at < ?", (self._cutoff(time.time()),)
+            ).rowcount
+            evicted = self._conn.execute(
+                """
+                DELETE FROM sessions WHERE id IN (
+                    SELECT id FROM sessions ORDER BY touched_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_sessions,),
+            ).rowcount
+        self.expired += expired
+        self.evicted += evicted
+        return expired + evicted
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE touched_at >= ?",
+                (self._cutoff(time.time()),),
+            ).fetchone()[0]
+
+
+def create_session_store() -> SessionStore:
+    """Build the session store configured in settings."""
+    backend = settings.session_store_backend
+    if backend == "auto":
+        # Worker processes only share sessions through an external store
+        backend = "sqlite" if settings.workers > 1 else "memory"
+
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            settings.session_store_path,
+            ttl_seconds=settings.session_ttl_seconds,
+            max_sessions=settings.session_max_entries,
+        )
+    return MemorySessionStore(
+        ttl_seconds=settings.session_ttl_seconds,
+        max_sessions=settings.session_max_entries,
+    )
+
+
+session_store = create_session_store()
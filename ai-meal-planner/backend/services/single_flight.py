@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight calls.
+
+    The first caller for a key starts the call; callers arriving with the
+    same key while it is still running await the same result instead of
+    starting their own. Once it finishes the key is forgotten, so later
+    callers start a fresh call (completed results are the plan cache's job).
+
+    The shared call runs as its own task: a caller that is cancelled (e.g.
+    a job hitting its deadline) stops waiting without cancelling the call
+    for everyone else.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def __contains__(self, key: str) -> bool:
+        """Whether a call for this key is in flight (so ``do`` would join it)."""
+        return key in self._in_flight
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``func`` once for all concurrent callers with the same key.
+
+        Args:
+            key: Identity of the call (e.g. PlanCache.make_key of the request)
+            func: Coroutine factory, only called by the first caller
+
+        Returns:
+            The shared call's result (the same object for every caller)
+
+        Raises:
+            Whatever the shared call raised, to every caller
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+            logger.info(f"Coalesced with an in-flight call ({len(self._in_flight)} in flight)")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every caller was cancelled
+
+    def stats(self) -> Dict[str, Any]:
+        """Call counters for /health."""
+        requests = self.calls + self.coalesced
+        return {
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / requests, 3) if requests else 0.0,
+        }
+
+
+def create_llm_single_flight() -> Optional[SingleFlight]:
+    if not settings.llm_coalesce_enabled:
+        return None
+    return SingleFlight()
+
+
+llm_single_flight = create_llm_single_flight()
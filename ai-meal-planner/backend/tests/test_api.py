@@ -1,6 +1,9 @@
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 from main import app
+from api import routes
 
 client = TestClient(app)
 
@@ -46,3 +49,54 @@ def test_price_report_invalid_session():
     
     response = client.post("/api/price-report", json=payload)
     assert response.status_code == 404
+
+
+def test_generate_plan_stream(monkeypatch):
+    """Test streaming meal plan generation emits meals, shopping list and session."""
+    text = json.dumps({
+        "meal_plan": [
+            {"title": "A", "description": "a", "recipe": [], "ingredients": ["pienas 1l"]},
+            {"title": "B", "description": "b", "recipe": [], "ingredients": ["druska"]},
+        ],
+        "shopping_list": ["pienas 1l", "druska"],
+    })
+    monkeypatch.setattr(
+        routes, "stream_meal_plan_text",
+        lambda preferences, days: (text[i:i + 10] for i in range(0, len(text), 10))
+    )
+
+    payload = {"preferences": "stream test meals", "days": 2}
+    response = client.post("/api/generate-plan/stream", json=payload)
+    assert response.status_code == 200
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [e["type"] for e in events] == ["meal", "meal", "shopping_list", "done"]
+    assert events[1]["meal"]["title"] == "B"
+    assert client.get(f"/api/session/{events[-1]['session_id']}").status_code == 200
+
+
+def test_generate_plan_stream_fanout(monkeypatch):
+    """In fan-out mode the stream uses per-meal calls and still emits meals in plan order."""
+    import time
+    from tools import meal_generation
+
+    outline = [{"title": title, "key_protein": "pienas"} for title in "ABC"]
+
+    def fake_meal(preferences, outline, index):
+        time.sleep(0.05 * (len(outline) - index))  # Last meal finishes first
+        title = outline[index]["title"]
+        if title == "B":
+            return None  # Unusable meals are skipped, not left as gaps
+        return {"title": title, "description": title, "recipe": [], "ingredients": ["pienas 1l"]}
+
+    monkeypatch.setattr(routes.settings, "meal_fanout_enabled", True)
+    monkeypatch.setattr(meal_generation, "generate_meal_outline", lambda preferences, days: outline)
+    monkeypatch.setattr(meal_generation, "generate_meal", fake_meal)
+
+    payload = {"preferences": "fan-out stream", "days": 3}
+    response = client.post("/api/generate-plan/stream", json=payload)
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [e["type"] for e in events] == ["meal", "meal", "shopping_list", "done"]
+    assert [(e["index"], e["meal"]["title"]) for e in events[:2]] == [(0, "A"), (1, "C")]
+    assert events[2]["shopping_list"] == ["pienas 2l"]
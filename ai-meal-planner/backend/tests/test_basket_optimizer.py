@@ -0,0 +1,150 @@
+import itertools
+import random
+import time
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from api.schemas import ShoppingDecision
+from services.session_store import session_store
+from tools.basket_optimizer import BasketCosts, CostMatrix, optimize_basket, select_split_basket_tool
+from tools.price_analysis import PriceTable, analyze_prices_columnar
+
+
+def _rows(prices, unavailable=()):
+    """prices: {ingredient: {store: price}}"""
+    return [
+        {
+            "ingredient": ingredient,
+            "store": store,
+            "price": price,
+            "unit_price": price,
+            "unit": "vnt",
+            "available": (ingredient, store) not in unavailable,
+        }
+        for ingredient, by_store in prices.items()
+        for store, price in by_store.items()
+    ]
+
+
+def _brute_force(cost, fees, max_stores):
+    best = np.inf
+    n_items, n_stores = cost.shape
+    for assign in itertools.product(range(n_stores), repeat=n_items):
+        used = set(assign)
+        if len(used) > max_stores:
+            continue
+        total = sum(cost[i, s] for i, s in enumerate(assign)) + sum(fees[s] for s in used)
+        best = min(best, total)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_exact_matches_brute_force(seed):
+    """Small instances are solved to optimality."""
+    rng = random.Random(seed)
+    stores = ["barbora", "rimi", "maxima"]
+    prices = {f"item{i}": {s: round(rng.uniform(0.5, 5), 2) for s in stores} for i in range(5)}
+    unavailable = {(f"item{rng.randrange(5)}", rng.choice(stores)) for _ in range(3)}
+    fees = {"barbora": 1.5, "rimi": 2.0, "maxima": 0.5}
+
+    matrix = CostMatrix(PriceTable.from_rows(_rows(prices, unavailable)))
+    costs = BasketCosts.for_stores(matrix.stores, fees)
+    result = optimize_basket(matrix, costs, max_stores=2)
+
+    expected = _brute_force(matrix.cost, costs.delivery_fee, 2)
+    assert result["exact"]
+    assert result["total_cost"] == pytest.approx(expected)
+
+
+def test_missing_items_are_infeasible_not_free():
+    """A store missing an item cannot win by leaving it out."""
+    prices = {
+        "pienas": {"barbora": 1.0, "rimi": 1.2},
+        "sviestas": {"barbora": 3.0, "rimi": 2.5},
+    }
+    table = PriceTable.from_rows(_rows(prices, unavailable={("sviestas", "barbora")}))
+    decision = select_split_basket_tool(table, delivery_fees={}, default_delivery_fee=5.0,
+                                        max_stores=1)
+
+    assert decision["recommended_store"] == "rimi"
+    assert decision["total_cost"] == pytest.approx(1.2 + 2.5 + 5.0)
+
+
+def test_split_decision_shape():
+    """Split decisions carry per-store baskets and validate as ShoppingDecision."""
+    prices = {
+        "pienas": {"barbora": 1.0, "rimi": 3.0},
+        "sviestas": {"barbora": 6.0, "rimi": 2.0},
+        "druska": {"barbora": 0.5},
+    }
+    table = PriceTable.from_rows(_rows(prices))
+    analysis = analyze_prices_columnar(table)
+    decision = select_split_basket_tool(
+        table, delivery_fees={"barbora": 0.5, "rimi": 0.5}, max_stores=2,
+        comparisons=analysis["comparisons"],
+    )
+
+    assert decision["recommended_store"] == "barbora + rimi"
+    assert {(i["name"], i["store"]) for i in decision["items"]} == {
+        ("pienas", "barbora"), ("druska", "barbora"), ("sviestas", "rimi")
+    }
+    assert decision["total_cost"] == pytest.approx(1.0 + 0.5 + 2.0 + 1.0)
+    ShoppingDecision(**decision)
+
+
+def test_min_order_penalty_discourages_small_baskets():
+    """A tiny second basket is not worth a minimum-order penalty."""
+    prices = {
+        "pienas": {"barbora": 1.0, "rimi": 1.1},
+        "sviestas": {"barbora": 2.0, "rimi": 1.9},
+    }
+    table = PriceTable.from_rows(_rows(prices))
+    decision = select_split_basket_tool(
+        table, delivery_fees={}, min_order=10.0, min_order_penalty=3.0, max_stores=2
+    )
+    assert len(decision["baskets"]) == 1
+
+
+def test_large_instance_within_budget():
+    """Many stores fall back to the heuristic and stay fast."""
+    rng = random.Random(0)
+    stores = [f"store{s}" for s in range(30)]
+    prices = {f"item{i}": {s: rng.uniform(0.5, 10) for s in stores} for i in range(100)}
+    table = PriceTable.from_rows(_rows(prices))
+
+    start = time.perf_counter()
+    decision = select_split_basket_tool(table, delivery_fees={}, default_delivery_fee=3.0,
+                                        max_stores=5, time_budget_ms=20)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.05
+    assert 1 <= len(decision["baskets"]) <= 5
+
+
+def test_route_rejects_store_limit_nobody_can_meet():
+    """max_stores=1 with no store stocking everything is a 422, not a server error."""
+    session_store.set("split-infeasible", {
+        "preferences": "pigiai",
+        "meal_plan": {"meal_plan": [], "shopping_list": ["pienas", "sviestas"]},
+        "created_at": datetime.utcnow(),
+        "status": "meal_plan_ready",
+    })
+    prices = {"pienas": {"barbora": 1.0, "rimi": 1.2}, "sviestas": {"barbora": 3.0, "rimi": 2.5}}
+    rows = _rows(prices, unavailable={("sviestas", "barbora"), ("pienas", "rimi")})
+
+    response = TestClient(app).post("/api/price-report", json={
+        "session_id": "split-infeasible",
+        "prices": rows,
+        "optimize": "split_basket",
+        "max_stores": 1,
+        "include_server_prices": False,
+        "include_history_prices": False,
+    })
+
+    assert response.status_code == 422
+    assert "1 store(s) or fewer" in response.json()["detail"]
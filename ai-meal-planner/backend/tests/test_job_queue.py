@@ -0,0 +1,163 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from main import app
+from api import routes
+from config.settings import settings
+from services.job_queue import JobQueue
+from services.llm_executor import LLMExecutor
+from services.session_store import MemorySessionStore
+
+
+def store_result(session, result):
+    session["result"] = result
+    session["status"] = "ready"
+
+
+async def wait_idle(queue: JobQueue):
+    while queue.stats()["queue_depth"] or queue.running or queue.stats()["waiting_to_retry"]:
+        await asyncio.sleep(0.005)
+
+
+async def test_runs_by_priority():
+    store = MemorySessionStore()
+    queue = JobQueue(store, workers=1)
+    await queue.start()
+    order = []
+    release = asyncio.Event()
+
+    async def blocker():
+        await release.wait()
+
+    def job(name):
+        async def run():
+            order.append(name)
+        return run
+
+    queue.submit("blocker", {}, blocker)
+    await asyncio.sleep(0)  # Let the worker pick up the blocker
+    queue.submit("low", {}, job("low"), priority="low")
+    queue.submit("normal", {}, job("normal"))
+    queue.submit("high", {}, job("high"), priority="high")
+    release.set()
+    await wait_idle(queue)
+    await queue.stop()
+
+    assert order == ["high", "normal", "low"]
+    assert store.get("high")["job"]["status"] == "done"
+
+
+async def test_retries_then_succeeds():
+    store = MemorySessionStore()
+    queue = JobQueue(store, workers=1, max_retries=2, retry_backoff_seconds=0.01)
+    await queue.start()
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 2:
+            raise RuntimeError("LLM returned invalid JSON")
+        return {"ok": True}
+
+    queue.submit("s1", {}, flaky, on_success=store_result)
+    await wait_idle(queue)
+    await queue.stop()
+
+    session = store.get("s1")
+    assert session["status"] == "ready" and session["result"] == {"ok": True}
+    assert session["job"]["attempts"] == 2
+    assert session["job"]["last_error"] == "LLM returned invalid JSON"
+    assert queue.stats()["retried"] == 1
+
+
+async def test_fails_after_retries_and_expires_at_deadline():
+    store = MemorySessionStore()
+    queue = JobQueue(store, workers=1, max_retries=1, retry_backoff_seconds=0.01)
+    await queue.start()
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    queue.submit("broken", {}, broken)
+    queue.submit("slow", {}, slow, deadline_seconds=0.05)
+    await wait_idle(queue)
+    await queue.stop()
+
+    assert store.get("broken")["status"] == "failed"
+    assert store.get("broken")["job"]["attempts"] == 2
+    assert store.get("slow")["status"] == "expired"
+    stats = queue.stats()
+    assert stats["failed"] == 1 and stats["expired"] == 1
+    assert stats["latency_ms_p95"] > 0
+
+
+async def test_expired_plan_jobs_free_the_llm_queue(monkeypatch):
+    """Jobs cancelled at their deadline give back the LLM queue slots they held."""
+    executor = LLMExecutor(max_workers=1, max_queue_size=3)
+    monkeypatch.setattr(routes, "llm_executor", executor)
+    monkeypatch.setattr(routes, "llm_single_flight", None)  # Coalescing off
+    monkeypatch.setattr(routes, "plan_cache", None)
+    monkeypatch.setattr(settings, "meal_fanout_enabled", False)
+    monkeypatch.setattr(routes, "generate_meal_plan_tool", lambda **kwargs: time.sleep(0.3))
+
+    store = MemorySessionStore()
+    queue = JobQueue(store, workers=4, max_retries=0)
+    await queue.start()
+    for i in range(4):  # One call runs, three wait for the single LLM worker
+        queue.submit(
+            f"s{i}", {}, lambda: routes._generate_meal_plan("pigiai", 3), deadline_seconds=0.1
+        )
+    await wait_idle(queue)
+    await queue.stop()
+
+    assert all(store.get(f"s{i}")["status"] == "expired" for i in range(4))
+    stats = executor.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["abandoned"] == 1  # The running call finishes unobserved
+    assert await executor.run(lambda: "done") == "done"
+    executor.shutdown()
+
+
+async def test_subscriptions_are_removed_when_waiters_leave():
+    queue = JobQueue(MemorySessionStore())
+
+    # Nothing updates these sessions in this process: both waits time out
+    await asyncio.gather(
+        queue.wait_for_change("other-worker", 0.01),
+        queue.wait_for_change("other-worker", 0.03),
+        queue.wait_for_change("never-updated", 0.01),
+    )
+
+    assert queue._subscriptions == {}
+
+
+def test_async_generate_plan_with_polling_and_events(monkeypatch):
+    """POST returns at once; the plan appears on the session and in the SSE stream."""
+    plan = {"meal_plan": [], "shopping_list": ["pienas 1l"]}
+
+    async def fake_generate(preferences, days):
+        await asyncio.sleep(0.05)
+        return plan
+
+    monkeypatch.setattr(routes, "_generate_meal_plan", fake_generate)
+
+    with TestClient(app) as client:
+        response = client.post("/api/generate-plan/async", json={"preferences": "pigiai", "priority": "high"})
+        assert response.status_code == 202
+        session_id = response.json()["session_id"]
+        assert response.json()["job"]["status"] == "queued"
+
+        with client.stream("GET", f"/api/session/{session_id}/events") as stream:
+            events = [line for line in stream.iter_lines() if line.startswith("event:")]
+
+        session = client.get(f"/api/session/{session_id}").json()
+
+    assert events[0] == "event: status" and events[-1] == "event: done"
+    assert session["status"] == "meal_plan_ready"
+    assert session["meal_plan"] == plan
+    assert session["job"]["status"] == "done"
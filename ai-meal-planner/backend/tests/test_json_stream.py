@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from tools.json_stream import MealPlanStreamParser
+from tools.meal_generation import parse_json_from_response
+
+PLAN = {
+    "meal_plan": [
+        {
+            "title": "Vištienos sriuba",
+            "description": "Šilta sriuba su \"daržovėmis\" {ir} [prieskoniais]\\n",
+            "recipe": ["Supjaustykite", "Virkite"],
+            "ingredients": ["vištienos krūtinėlė 500g", "morkos 2vnt"],
+            "key_protein": "vištienos krūtinėlė",
+        },
+        {
+            "title": "Omletas",
+            "description": "Greitas pusryčiai",
+            "recipe": ["Išplakite"],
+            "ingredients": ["kiaušiniai 6vnt"],
+            "key_protein": "kiaušiniai",
+        },
+    ],
+    "shopping_list": ["vištienos krūtinėlė 500g", "morkos 2vnt", "kiaušiniai 6vnt"],
+}
+
+
+def _response_text() -> str:
+    return "```json\n" + json.dumps(PLAN, ensure_ascii=False, indent=2) + "\n```"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 100000])
+def test_meals_emitted_incrementally(chunk_size):
+    """Meals are returned as soon as they close, regardless of chunking."""
+    text = _response_text()
+    parser = MealPlanStreamParser()
+    meals = []
+    first_meal_at = None
+
+    for offset in range(0, len(text), chunk_size):
+        meals.extend(parser.feed(text[offset:offset + chunk_size]))
+        if meals and first_meal_at is None:
+            first_meal_at = offset
+
+    assert meals == PLAN["meal_plan"]
+    assert parser.close() == PLAN
+    if chunk_size == 1:
+        assert first_meal_at < text.index('"Omletas"')
+
+
+def test_shopping_list_before_meals():
+    """Arrays other than meal_plan are not mistaken for meals."""
+    doc = {"shopping_list": ["druska"], "meal_plan": [{"title": "A"}]}
+    parser = MealPlanStreamParser()
+    assert parser.feed(json.dumps(doc)) == [{"title": "A"}]
+    assert parser.close() == doc
+
+
+def test_incomplete_response_raises():
+    """close() fails if the object never finished."""
+    parser = MealPlanStreamParser()
+    parser.feed('{"meal_plan": [{"title": "A"}')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_parse_json_from_response():
+    """The non-streaming parser handles fenced and bare JSON."""
+    assert parse_json_from_response(_response_text()) == PLAN
+    assert parse_json_from_response(json.dumps(PLAN)) == PLAN
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.llm_executor import LLMExecutor, LLMQueueFullError
+
+
+async def test_run_does_not_block_event_loop():
+    """Blocking calls run on worker threads while the loop keeps serving."""
+    executor = LLMExecutor(max_workers=4)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    results = await asyncio.gather(
+        executor.run(time.sleep, 0.1),
+        executor.run(lambda: "done"),
+        ticker(),
+    )
+
+    assert results[1] == "done"
+    assert ticks == 5
+    executor.shutdown()
+
+
+async def test_concurrency_is_bounded_and_metrics_recorded():
+    """At most max_workers calls run at once, the rest wait in the queue."""
+    executor = LLMExecutor(max_workers=2)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+
+    await asyncio.gather(*(executor.run(work) for _ in range(6)))
+
+    stats = executor.stats()
+    assert peak == 2
+    assert stats["completed"] == 6
+    assert stats["queue_depth"] == 0
+    assert stats["in_flight"] == 0
+    assert stats["max_wait_ms"] > 0
+    executor.shutdown()
+
+
+async def test_queue_full_rejects():
+    """Calls beyond max_queue_size are rejected instead of piling up."""
+    executor = LLMExecutor(max_workers=1, max_queue_size=1)
+    release = threading.Event()
+
+    first = asyncio.ensure_future(executor.run(release.wait))
+    await asyncio.sleep(0.05)  # first call is now running
+    second = asyncio.ensure_future(executor.run(lambda: None))
+    await asyncio.sleep(0)
+
+    with pytest.raises(LLMQueueFullError):
+        await executor.run(lambda: None)
+
+    release.set()
+    await asyncio.gather(first, second)
+    assert executor.stats()["rejected"] == 1
+    executor.shutdown()
+
+
+async def test_cancelled_queued_calls_release_their_slots():
+    """Cancelling a call that never started frees its queue slot."""
+    executor = LLMExecutor(max_workers=1, max_queue_size=3)
+    release = threading.Event()
+
+    first = asyncio.ensure_future(executor.run(release.wait))
+    await asyncio.sleep(0.05)  # first call is now running
+    try:
+        queued = [asyncio.ensure_future(executor.run(lambda: None)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert executor.stats()["queue_depth"] == 3
+
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        assert executor.stats()["queue_depth"] == 0
+    finally:
+        release.set()
+    await first
+    assert await executor.run(lambda: "done") == "done"
+    executor.shutdown()
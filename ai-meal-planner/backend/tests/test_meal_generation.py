@@ -0,0 +1,151 @@
+import json
+import time
+from types import SimpleNamespace
+
+from tools import meal_generation
+from tools.meal_generation import MEAL_PLAN_SYSTEM_INSTRUCTION, build_meal_plan_prompt
+from tools.shopping_list import aggregate_shopping_list
+from tools.token_usage import TokenCounter
+
+
+MEAL = {
+    "title": "Omletas", "description": "", "ingredients": ["pienas 1l"],
+    "recipe": ["Kepkite"], "key_protein": "kiaušiniai",
+}
+
+
+class FakeModel:
+    def __init__(self, name=None, system_instruction=None, cached_content=None):
+        self.system_instruction = system_instruction
+        self.cached_content = cached_content
+        self.prompts = []
+
+    @classmethod
+    def from_cached_content(cls, cache):
+        return cls(cached_content=cache)
+
+    def generate_content(self, prompt, generation_config=None):
+        self.prompts.append(prompt)
+        return SimpleNamespace(
+            text=json.dumps({"meal_plan": [MEAL], "shopping_list": ["pienas 1l"]}),
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=1200, cached_content_token_count=1150,
+                candidates_token_count=300,
+            ),
+        )
+
+
+def reset_model(monkeypatch):
+    monkeypatch.setattr(meal_generation, "_model", None)
+    monkeypatch.setattr(meal_generation, "_model_key", None)
+    monkeypatch.setattr(meal_generation.genai, "GenerativeModel", FakeModel)
+
+
+def test_request_prompt_leaves_rules_to_system_instruction():
+    prompt = build_meal_plan_prompt("pigūs pietūs", 3)
+
+    assert prompt == 'User request: "pigūs pietūs"\n\nGenerate exactly 3 meals.'
+    assert "INGREDIENT FORMATTING RULES" in MEAL_PLAN_SYSTEM_INSTRUCTION
+    assert '"shopping_list": [' in MEAL_PLAN_SYSTEM_INSTRUCTION
+
+
+def test_model_is_reused_and_usage_counted(monkeypatch):
+    reset_model(monkeypatch)
+    counter = TokenCounter()
+    monkeypatch.setattr(meal_generation, "token_counter", counter)
+
+    meal_generation.generate_meal_plan_tool("pigūs pietūs", 3)
+    meal_generation.generate_meal_plan_tool("vakarienė", None)
+
+    model = meal_generation._get_model()
+    assert model.system_instruction == MEAL_PLAN_SYSTEM_INSTRUCTION
+    assert len(model.prompts) == 2
+    assert counter.stats()["prompt_tokens"] == 2400
+    assert counter.stats()["avg_uncached_prompt_tokens"] == 50.0
+    assert counter.stats()["avg_response_tokens"] == 300.0
+
+
+def test_context_cache_falls_back_to_system_instruction(monkeypatch):
+    reset_model(monkeypatch)
+    monkeypatch.setattr(meal_generation.settings, "gemini_context_cache_enabled", True)
+
+    def too_small(**kwargs):
+        raise ValueError("Cached content is too small")
+
+    monkeypatch.setattr(meal_generation.caching.CachedContent, "create", too_small)
+    assert meal_generation._get_model().system_instruction == MEAL_PLAN_SYSTEM_INSTRUCTION
+
+    reset_model(monkeypatch)
+    monkeypatch.setattr(
+        meal_generation.caching.CachedContent, "create",
+        lambda **kwargs: SimpleNamespace(name="cachedContents/meal", **kwargs),
+    )
+    model = meal_generation._get_model()
+    assert model.cached_content.system_instruction == MEAL_PLAN_SYSTEM_INSTRUCTION
+
+
+class FanoutModel:
+    """Answers outline and single-meal prompts; each call takes 0.1 s."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt, generation_config=None):
+        time.sleep(0.1)
+        self.prompts.append(prompt)
+        if "only plan the meals" in prompt:
+            body = {"meals": [{"title": f"Patiekalas {i}", "key_protein": "vištiena"} for i in range(7)]}
+        else:
+            title = prompt.split('Write the meal "', 1)[1].split('"', 1)[0]
+            body = {"title": title, "description": "", "recipe": ["Kepkite"],
+                    "ingredients": ["vištienos krūtinėlė 300g", "druska"], "key_protein": "vištiena"}
+        return SimpleNamespace(text=json.dumps(body), usage_metadata=None)
+
+
+async def test_parallel_generation_writes_meals_concurrently(monkeypatch):
+    model = FanoutModel()
+    monkeypatch.setattr(meal_generation, "_get_model", lambda: model)
+
+    start = time.perf_counter()
+    plan = await meal_generation.generate_meal_plan_parallel("savaitės vakarienės", concurrency=7)
+    elapsed = time.perf_counter() - start
+
+    assert [meal["title"] for meal in plan["meal_plan"]] == [f"Patiekalas {i}" for i in range(7)]
+    # Outline plus one round of meals, not eight sequential calls
+    assert elapsed < 0.5
+    assert len(model.prompts) == 8
+    assert '"Patiekalas 1"' in model.prompts[1]  # Each meal knows the rest of the plan
+    assert plan["shopping_list"] == ["vištienos krūtinėlė 2.1kg", "druska"]
+
+
+def test_shopping_list_aggregation():
+    assert aggregate_shopping_list([
+        "pienas 500ml", "Pienas 300ml", "druska", "morkos 2vnt", "morkos 300g",
+        "bulvės 1.5kg", "bulvės 800g", "kiaušiniai 6vnt", "kiaušiniai 4vnt", "druska",
+    ]) == ["pienas 800ml", "druska", "morkos 500g", "bulvės 2.3kg", "kiaušiniai 10vnt"]
+
+
+class Chunk:
+    """A streamed response chunk; like the SDK, ``text`` raises without parts."""
+
+    def __init__(self, text=None):
+        self._text = text
+
+    @property
+    def text(self):
+        if self._text is None:
+            raise ValueError("The `response.text` quick accessor requires a valid `Part`")
+        return self._text
+
+
+def test_stream_skips_chunks_without_text_and_is_timed(monkeypatch):
+    text = json.dumps({"meal_plan": [MEAL], "shopping_list": ["pienas 1l"]})
+    chunks = [Chunk(text[:20]), Chunk(), Chunk(text[20:]), Chunk()]  # Safety and finish-only chunks
+    model = SimpleNamespace(
+        generate_content=lambda prompt, generation_config=None, stream=False: iter(chunks)
+    )
+    monkeypatch.setattr(meal_generation, "_get_model", lambda: model)
+    timed = meal_generation.LLM_SECONDS.count
+
+    assert "".join(meal_generation.stream_meal_plan_text("pusryčiai", 1)) == text
+    assert meal_generation.LLM_SECONDS.count == timed + 1
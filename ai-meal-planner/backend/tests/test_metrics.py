@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from main import app
+from api import routes
+from services.session_store import session_store
+from tools.metrics import MetricsRegistry
+
+
+def sample(text, line_start):
+    """Value of the first exposition line starting with ``line_start`` (0 if none)."""
+    line = next((line for line in text.splitlines() if line.startswith(line_start)), " 0")
+    return float(line.rsplit(" ", 1)[1])
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors", ("type",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    errors.labels('Value"Error').inc()
+    errors.labels('Value"Error').inc(2)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    assert registry.render().splitlines() == [
+        "# HELP errors_total Errors",
+        "# TYPE errors_total counter",
+        'errors_total{type="Value\\"Error"} 3',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 3.65",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_price_report_records_request_and_stage_latency():
+    client = TestClient(app)
+    before = client.get("/metrics").text
+    session_store.set("metrics", {
+        "preferences": "pigiai",
+        "meal_plan": {"meal_plan": [], "shopping_list": ["ryžiai 1kg"]},
+        "created_at": datetime.utcnow(),
+        "status": "meal_plan_ready",
+    })
+
+    response = client.post("/api/price-report", json={
+        "session_id": "metrics",
+        "prices": [{"ingredient": "ryžiai 1kg", "store": "iki", "price": 1.29,
+                    "unit_price": 1.29, "unit": "kg"}],
+    })
+    assert response.status_code == 200
+
+    text = client.get("/metrics").text
+    for stage in ("package_solve", "analyze", "select"):
+        series = f'meal_planner_stage_duration_seconds_count{{stage="{stage}"}}'
+        assert sample(text, series) == sample(before, series) + 1
+    assert sample(
+        text,
+        'meal_planner_request_duration_seconds_count{method="POST",route="/api/price-report",status="200"}',
+    ) >= 1
+
+
+def test_cache_hits_and_errors_are_counted(monkeypatch):
+    client = TestClient(app)
+    before = client.get("/metrics").text
+
+    def broken(preferences, days):
+        raise RuntimeError("Gemini is down")
+
+    monkeypatch.setattr(routes, "generate_meal_plan_tool", broken)
+    monkeypatch.setattr(routes.settings, "meal_fanout_enabled", False)
+    response = client.post("/api/generate-plan", json={"preferences": "metrikų testas", "days": 1})
+    assert response.status_code == 500
+
+    text = client.get("/metrics").text
+    errors = 'meal_planner_errors_total{stage="generate_plan",type="RuntimeError"}'
+    misses = 'meal_planner_cache_requests_total{cache="plan",result="miss"}'
+    assert sample(text, errors) == sample(before, errors) + 1
+    assert sample(text, misses) == sample(before, misses) + 1
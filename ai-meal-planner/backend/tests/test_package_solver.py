@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from tools.ingredient_parser import (
+    package_size_from_unit_price,
+    parse_ingredient,
+    parse_package_size,
+)
+from tools.package_solver import cheapest_packages, solve_package_quantities
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("pienas 800ml", ("pienas", 800.0, "ml")),
+    ("morkos 1.2kg", ("morkos", 1200.0, "g")),
+    ("pienas 1l", ("pienas", 1000.0, "ml")),
+    ("vištienos krūtinėlė 500g", ("vištienos krūtinėlė", 500.0, "g")),
+    ("kiaušiniai 6vnt", ("kiaušiniai", 6.0, "vnt")),
+    ("druska", ("druska", 1.0, "none")),
+])
+def test_parse_ingredient(text, expected):
+    assert tuple(parse_ingredient(text)[:3]) == expected
+
+
+def test_parse_package_size():
+    assert parse_package_size("Pienas 2,5% 1L") == (1000.0, "ml")
+    assert parse_package_size("Varškė 200 g") == (200.0, "g")
+    assert parse_package_size("Druska") is None
+    assert package_size_from_unit_price(1.5, 3.0, "kg") == (500.0, "g")
+
+
+def test_cheapest_packages_combines_sizes():
+    """800 ml from 500 ml @ 1.00 and 1 l @ 1.30 -> one litre pack."""
+    assert cheapest_packages(800, ((500, 1.0), (1000, 1.3))) == (1.3, (0, 1))
+    # 1.5 kg from 1 kg @ 2.00 and 500 g @ 1.20 -> 1 kg + 500 g
+    cost, counts = cheapest_packages(1500, ((1000, 2.0), (500, 1.2)))
+    assert cost == pytest.approx(3.2)
+    assert counts == (1, 1)
+
+
+def test_solve_package_quantities_uses_real_basket_cost():
+    """A store with a cheap small pack is not cheaper if you need several."""
+    rows = [
+        {"ingredient": "pienas 1.5l", "store": "barbora", "price": 0.9, "unit_price": 1.8,
+         "unit": "l"},
+        {"ingredient": "pienas 1.5l", "store": "rimi", "price": 1.6, "unit_price": 1.07,
+         "unit": "l", "product_name": "Pienas 1,5 l"},
+        {"ingredient": "druska", "store": "rimi", "price": 0.4, "unit_price": 0.4, "unit": "kg"},
+    ]
+    lines = {(l["ingredient"], l["store"]): l for l in solve_package_quantities(rows)}
+
+    assert lines[("pienas 1.5l", "barbora")]["quantity"] == 3
+    assert lines[("pienas 1.5l", "barbora")]["price"] == pytest.approx(2.7)
+    assert lines[("pienas 1.5l", "rimi")]["quantity"] == 1
+    assert lines[("druska", "rimi")]["price"] == 0.4
+
+
+def test_thousands_of_lines_in_milliseconds():
+    rows = [
+        {"ingredient": f"produktas{i % 500} {100 + i % 7 * 150}g", "store": f"s{i % 5}",
+         "price": 1.0 + i % 3, "unit_price": 4.0 + i % 5, "unit": "kg"}
+        for i in range(5000)
+    ]
+    start = time.perf_counter()
+    solve_package_quantities(rows)
+    assert time.perf_counter() - start < 0.2
+
+
+def test_mixed_packages_are_itemized():
+    """1.5 l as 1 l + 500 ml: each product is listed with its own count and url."""
+    from tools.price_analysis import PriceTable, analyze_prices_columnar, select_best_store_tool
+
+    rows = [
+        {"ingredient": "pienas 1.5l", "store": "rimi", "price": 1.2, "unit_price": 1.2,
+         "unit": "l", "product_name": "Pienas 1 l", "url": "https://rimi.lt/pienas-1l"},
+        {"ingredient": "pienas 1.5l", "store": "rimi", "price": 0.7, "unit_price": 1.4,
+         "unit": "l", "product_name": "Pienas 500 ml", "url": "https://rimi.lt/pienas-500ml"},
+    ]
+    [line] = solve_package_quantities(rows)
+    assert line["price"] == pytest.approx(1.9)
+    assert line["quantity"] == 2 and line["url"] is None
+    assert line["unit_price"] == pytest.approx(1.9 / 1.5)
+
+    decision = select_best_store_tool(
+        analyze_prices_columnar(PriceTable.from_rows(solve_package_quantities(rows)))
+    )
+    items = sorted((i["url"], i["quantity"], i["price"]) for i in decision["items"])
+    assert items == [("https://rimi.lt/pienas-1l", 1, 1.2), ("https://rimi.lt/pienas-500ml", 1, 0.7)]
+    assert sum(i["price"] for i in decision["items"]) == pytest.approx(decision["total_cost"])
@@ -0,0 +1,64 @@
+import time
+
+from services.plan_cache import (
+    MemoryCacheBackend,
+    PlanCache,
+    SQLiteCacheBackend,
+    normalize_preferences,
+)
+
+PLAN = {"meal_plan": [{"title": "Sriuba"}], "shopping_list": ["morkos 500g"]}
+
+
+def test_normalize_preferences():
+    """Case, punctuation and whitespace do not affect the key."""
+    assert normalize_preferences("  Healthy meals,  for 2 people! ") == "healthy meals for 2 people"
+
+
+def test_exact_match_hit_and_miss():
+    """Keys include days, model and temperature."""
+    cache = PlanCache(MemoryCacheBackend())
+    cache.set("healthy meals for 2 people", 3, "gemini", 0.7, PLAN)
+
+    assert cache.get("Healthy meals for 2 people.", 3, "gemini", 0.7) == PLAN
+    assert cache.get("healthy meals for 2 people", 5, "gemini", 0.7) is None
+    assert cache.get("healthy meals for 2 people", 3, "gemini", 0.2) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_lru_and_ttl_eviction():
+    """Least recently used entries are evicted first and old entries expire."""
+    backend = MemoryCacheBackend(max_entries=2, ttl_seconds=0.05)
+    cache = PlanCache(backend)
+    cache.set("a", 3, "m", 0.7, PLAN)
+    cache.set("b", 3, "m", 0.7, PLAN)
+    cache.get("a", 3, "m", 0.7)
+    cache.set("c", 3, "m", 0.7, PLAN)
+
+    assert cache.get("b", 3, "m", 0.7) is None
+    assert cache.get("a", 3, "m", 0.7) == PLAN
+
+    time.sleep(0.06)
+    assert cache.get("a", 3, "m", 0.7) is None
+
+
+def test_near_duplicate_lookup():
+    """Similar requests hit, requests with different numbers do not."""
+    cache = PlanCache(MemoryCacheBackend(), similarity_threshold=0.7)
+    cache.set("healthy meals for 2 people", 3, "m", 0.7, PLAN)
+
+    assert cache.get("healthy meals for 2 people tonight", 3, "m", 0.7) == PLAN
+    assert cache.get("healthy meals for 4 people", 3, "m", 0.7) is None
+    assert cache.stats()["near_hits"] == 1
+
+
+def test_sqlite_backend_survives_reopen(tmp_path):
+    """Entries persist across backend instances."""
+    path = str(tmp_path / "cache.sqlite3")
+    PlanCache(SQLiteCacheBackend(path)).set("3 dinners this week", None, "m", 0.7, PLAN)
+
+    cache = PlanCache(SQLiteCacheBackend(path, max_entries=1))
+    assert cache.get("3 dinners this week", None, "m", 0.7) == PLAN
+    cache.set("something else", None, "m", 0.7, PLAN)
+    assert len(cache.backend) == 1
@@ -0,0 +1,45 @@
+import pytest
+
+from api.schemas import ProductPrice, ShoppingDecision
+from benchmarks.bench_price_analysis import make_price_rows
+from tools.price_analysis import (
+    PriceTable,
+    analyze_prices_columnar,
+    analyze_prices_tool,
+    select_best_store_tool,
+)
+
+
+@pytest.mark.parametrize("rows", [1, 7, 500])
+def test_columnar_matches_dict_analysis(rows):
+    """The columnar path produces the same shopping decision."""
+    data = make_price_rows(rows, seed=rows)
+    expected = select_best_store_tool(analyze_prices_tool(data))
+
+    for source in (data, [ProductPrice(**row) for row in data]):
+        decision = select_best_store_tool(analyze_prices_columnar(PriceTable.from_rows(source)))
+        assert decision["recommended_store"] == expected["recommended_store"]
+        assert decision["items"] == expected["items"]
+        assert decision["total_cost"] == pytest.approx(expected["total_cost"])
+        assert decision["total_savings"] == pytest.approx(expected["total_savings"])
+        for got, want in zip(decision["comparisons"], expected["comparisons"]):
+            assert got == pytest.approx(want)
+        ShoppingDecision(**decision)
+
+
+def test_unavailable_items_not_counted():
+    """Unavailable items add nothing to the total and count as missing."""
+    data = [
+        {"ingredient": "pienas", "store": "rimi", "price": 1.0, "unit_price": 1.0, "unit": "l"},
+        {"ingredient": "sviestas", "store": "rimi", "price": 3.0, "unit_price": 15.0,
+         "unit": "kg", "available": False},
+    ]
+    analysis = analyze_prices_columnar(PriceTable.from_rows(data))
+    assert analysis["stores"]["rimi"] == {
+        "total_cost": 1.0, "items_available": 1, "items_missing": 1
+    }
+
+
+def test_empty_report_raises():
+    with pytest.raises(ValueError):
+        analyze_prices_columnar(PriceTable.from_rows([]))
@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from main import app
+from scrapers import ScrapeError
+from services.price_collector import PriceCollector, merge_price_rows
+from services.session_store import MemorySessionStore, session_store
+
+
+class FakeScheduler:
+    """Stands in for ScrapeScheduler: fixed prices, one failing store."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.queries = []
+
+    async def search(self, store, query):
+        self.queries.append((store, query))
+        await asyncio.sleep(self.delay)
+        if store == "maxima":
+            raise ScrapeError("maxima: HTTP 403")
+        if query == "trumai":
+            return []
+        return [{"ingredient": query, "store": store, "price": 1.0, "unit_price": 1.0,
+                 "unit": "kg", "available": True}]
+
+    async def close(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+def test_merge_prefers_extension_rows():
+    extension = [{"ingredient": "pienas 1l", "store": "barbora", "price": 1.5}]
+    server = [
+        {"ingredient": "pienas 1l", "store": "barbora", "price": 1.0},
+        {"ingredient": "pienas 1l", "store": "rimi", "price": 1.2},
+    ]
+
+    merged = merge_price_rows(extension, server)
+
+    assert [(r["store"], r["price"]) for r in merged] == [("barbora", 1.5), ("rimi", 1.2)]
+
+
+async def test_collects_all_stores_into_session():
+    store = MemorySessionStore()
+    store.set("s1", {"meal_plan": {}})
+    scheduler = FakeScheduler()
+    collector = PriceCollector(store, scheduler_factory=lambda: scheduler)
+    await collector.start()
+
+    status = collector.submit("s1", ["bulvės 1kg", "trumai", "bulvės 1kg"], ["barbora", "maxima"])
+    assert status["status"] == "queued" and status["total"] == 4
+    await collector._queue.join()
+    await collector.stop()
+
+    session = store.get("s1")
+    progress = session["price_collection"]
+    assert progress["status"] == "done" and progress["completed"] == 4
+    assert [e["ingredient"] for e in progress["errors"]] == ["bulvės 1kg", "trumai"]
+    # Searched by name, reported under the original shopping list item
+    assert ("barbora", "bulvės") in scheduler.queries
+    rows = {(r["ingredient"], r["available"]) for r in session["server_prices"]}
+    assert rows == {("bulvės 1kg", True), ("trumai", False)}
+    assert collector.stats()["completed"] == 1
+
+
+async def test_partial_results_visible_while_running():
+    store = MemorySessionStore()
+    store.set("s1", {})
+    collector = PriceCollector(store, scheduler_factory=lambda: FakeScheduler(delay=0.05))
+    await collector.start()
+
+    collector.submit("s1", ["a", "b"], ["barbora"])
+    # A second submit while running doesn't queue another job
+    assert collector.submit("s1", ["a", "b"], ["barbora"])["status"] in ("queued", "running")
+    await asyncio.sleep(0.01)
+    assert store.get("s1")["price_collection"]["status"] == "running"
+    await collector._queue.join()
+    await collector.stop()
+
+    assert collector.queued == 1
+    assert len(store.get("s1")["server_prices"]) == 2
+
+
+def test_price_report_uses_server_prices():
+    """A report without its own prices is answered from server-scraped ones."""
+    session_store.set("collected", {
+        "preferences": "pigiai",
+        "meal_plan": {"meal_plan": [], "shopping_list": ["bulvės"]},
+        "created_at": datetime.utcnow(),
+        "status": "meal_plan_ready",
+        "server_prices": [
+            {"ingredient": "bulvės", "store": "rimi", "price": 0.89, "unit_price": 0.89,
+             "unit": "kg", "available": True},
+            {"ingredient": "bulvės", "store": "barbora", "price": 0.99, "unit_price": 0.99,
+             "unit": "kg", "available": True},
+        ],
+    })
+    client = TestClient(app)
+
+    response = client.post("/api/price-report", json={
+        "session_id": "collected",
+        "prices": [{"ingredient": "bulvės", "store": "barbora", "price": 0.79,
+                    "unit_price": 0.79, "unit": "kg"}],
+    })
+
+    assert response.status_code == 200
+    data = response.json()
+    # The extension's barbora price overrides the scraped one
+    assert data["recommended_store"] == "barbora"
+    assert data["total_cost"] == 0.79
+    assert {c["store"] for c in data["comparisons"]} == {"barbora", "rimi"}
@@ -0,0 +1,115 @@
+import os
+from datetime import date, datetime
+
+from fastapi.testclient import TestClient
+
+from main import app
+from api import routes
+from services.price_history import PriceHistory
+from services.session_store import session_store
+
+DAY = date(2026, 3, 10)
+
+
+def row(ingredient, store, price, product_name=None, unit="kg", available=True):
+    return {"ingredient": ingredient, "store": store, "price": price, "unit_price": price,
+            "unit": unit, "product_name": product_name, "available": available}
+
+
+def test_record_and_query_by_range_ingredient_and_store(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    history.record([row("morkos 500g", "rimi", 0.99, "Morkos 1kg")], date(2026, 3, 1))
+    history.record([
+        row("Morkų 1kg", "rimi", 0.89, "Morkos 1kg"),
+        row("morkos", "barbora", 1.09, "Morkos, 1 kg"),
+        row("pienas 1l", "rimi", 1.19, "Pienas 2,5% 1L", unit="l"),
+        row("pienas 1l", "iki", 0.0, available=False),
+    ], DAY)
+    # Seen again the same day: the last observation wins
+    history.record([row("morkos", "rimi", 0.79, "Morkos 1kg")], DAY)
+
+    assert len(history) == 5
+    assert history.query("morkos 2kg", "rimi") == [
+        {"day": "2026-03-01", "store": "rimi", "ingredient": "mork", "product_name": "Morkos 1kg",
+         "price": 0.99, "unit_price": 0.99, "unit": "kg"},
+        {"day": "2026-03-10", "store": "rimi", "ingredient": "mork", "product_name": "Morkos 1kg",
+         "price": 0.79, "unit_price": 0.79, "unit": "kg"},
+    ]
+    assert [r["store"] for r in history.query("morkos", start=DAY, end=DAY)] == ["barbora", "rimi"]
+    assert history.query("sviestas") == []
+    assert history.stats()["rows"] == 5
+
+
+def test_latest_fills_recent_prices_per_store(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    history.record([row("bulvės", "rimi", 0.99, "Bulvės 2kg"), row("bulvės", "maxima", 0.69)],
+                   date(2026, 2, 1))
+    history.record([row("bulvės", "rimi", 0.89, "Bulvės 2kg"), row("bulvės", "rimi", 1.49, "Bulvės 1kg")],
+                   date(2026, 3, 8))
+    history.record([row("pienas", "rimi", 1.19)], date(2026, 3, 9))
+
+    rows = history.latest(["bulvės 2kg"], ["rimi", "maxima", "barbora"], max_age_days=7, today=DAY)
+
+    # Maxima's price is older than a week; rimi's newest day has two products
+    assert [(r["ingredient"], r["store"], r["product_name"], r["price"]) for r in rows] == [
+        ("bulvės 2kg", "rimi", "Bulvės 2kg", 0.89),
+        ("bulvės 2kg", "rimi", "Bulvės 1kg", 1.49),
+    ]
+    assert history.stats()["filled"] == 2
+
+
+def test_trend_keeps_cheapest_unit_price_per_day(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    for day, prices in [(8, (1.29, 0.99)), (9, (1.19, 1.09)), (10, (0.89, 1.09))]:
+        history.record([row("pienas", "rimi", prices[0], "Pienas A", unit="l"),
+                        row("pienas", "rimi", prices[1], "Pienas B", unit="l")], date(2026, 3, day))
+
+    trend = history.trend("pienas 1l", days=2, today=DAY)
+
+    assert trend == {"rimi": [
+        {"day": "2026-03-09", "ingredient": "pien", "product_name": "Pienas B",
+         "price": 1.09, "unit_price": 1.09, "unit": "l"},
+        {"day": "2026-03-10", "ingredient": "pien", "product_name": "Pienas A",
+         "price": 0.89, "unit_price": 0.89, "unit": "l"},
+    ]}
+
+
+def test_history_survives_reopen_and_torn_appends(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    history.record([row("ryžiai", "iki", 1.59, "Ryžiai 1kg")], DAY)
+    # A crash after writing only some columns of the next row
+    with open(os.path.join(tmp_path, "day.bin"), "ab") as handle:
+        handle.write(b"\x00\x00")
+
+    reopened = PriceHistory(str(tmp_path))
+    assert [r["price"] for r in reopened.query("ryžiai")] == [1.59]
+    reopened.record([row("ryžiai", "iki", 1.49, "Ryžiai 1kg")], date(2026, 3, 11))
+    assert [r["price"] for r in reopened.query("ryžiai")] == [1.59, 1.49]
+    # The first instance sees the other's appends
+    assert history.query("ryžiai", start=date(2026, 3, 11))[0]["price"] == 1.49
+
+
+def test_price_report_records_and_fills_from_history(tmp_path, monkeypatch):
+    history = PriceHistory(str(tmp_path))
+    history.record([row("vištiena", "rimi", 4.99, "Vištienos filė 1kg")], datetime.utcnow().date())
+    monkeypatch.setattr(routes, "price_history", history)
+    session_store.set("history", {
+        "preferences": "pigiai",
+        "meal_plan": {"meal_plan": [], "shopping_list": ["vištiena 1kg"]},
+        "created_at": datetime.utcnow(),
+        "status": "meal_plan_ready",
+    })
+    client = TestClient(app)
+
+    response = client.post("/api/price-report", json={
+        "session_id": "history",
+        "prices": [{"ingredient": "vištiena 1kg", "store": "barbora", "price": 5.49,
+                    "unit_price": 5.49, "unit": "kg"}],
+    })
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["recommended_store"] == "rimi"
+    assert {c["store"] for c in data["comparisons"]} == {"barbora", "rimi"}
+    trend = client.get("/api/prices/history", params={"ingredient": "vištiena"}).json()
+    assert set(trend["stores"]) == {"barbora", "rimi"}
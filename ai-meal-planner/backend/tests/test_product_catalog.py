@@ -0,0 +1,92 @@
+from services.price_collector import PriceCollector
+from services.session_store import MemorySessionStore
+from tools.product_catalog import ProductCatalog, bounded_levenshtein, normalize_name
+
+
+def row(store, name, price=1.0):
+    return {"store": store, "product_name": name, "price": price, "unit_price": price,
+            "unit": "vnt", "available": True}
+
+
+def make_catalog():
+    catalog = ProductCatalog()
+    catalog.add([
+        row("rimi", "Pienas 2,5% 1L", 0.99),
+        row("rimi", "Pieno šokoladas 100 g", 0.79),
+        row("rimi", "Vištienos krūtinėlės filė, 1 kg", 6.49),
+        row("rimi", "Vištienos šlaunelės 1 kg", 3.99),
+        row("barbora", "Vištienos krūtinėlė 500 g", 3.59),
+        row("barbora", "Morkos, 1 kg", 0.69),
+    ])
+    return catalog
+
+
+def test_normalization_folds_diacritics_and_inflections():
+    assert normalize_name("Vištienos krūtinėlės 500 g") == normalize_name("vistienos krutinele")
+    assert normalize_name("morkų") == normalize_name("Morkos, 1 kg") == ("mork",)
+    assert normalize_name("kiaušiniai 10 vnt.") == normalize_name("kiaušinių")
+    assert bounded_levenshtein("krutinel", "krutinelx", 1) == 1
+    assert bounded_levenshtein("pien", "sokolad", 1) == 2
+
+
+def test_best_products_per_store():
+    catalog = make_catalog()
+
+    milk = catalog.match("pienas 1l", "rimi")
+    assert milk[0].product["product_name"] == "Pienas 2,5% 1L"
+    assert [m.product["product_name"] for m in catalog.match("pienas 1l", "rimi", within=0.05)] == [
+        "Pienas 2,5% 1L"
+    ]
+    # Typos and missing diacritics, limited to one store
+    chicken = catalog.match("vistenos krutinele 500g", "barbora")
+    assert [m.product["product_name"] for m in chicken] == ["Vištienos krūtinėlė 500 g"]
+    assert catalog.match("bananai", "rimi") == []
+
+    lists = catalog.match_shopping_list(["morkos 500g", "vištienos krūtinėlė"], limit=1)
+    assert lists["morkos 500g"][0].store == "barbora"
+    assert lists["vištienos krūtinėlė"][0].score == 1.0
+
+
+def test_known_products_are_refreshed():
+    catalog = make_catalog()
+
+    assert catalog.add([row("rimi", "PIENAS 2,5% 1l", 1.09)]) == 0
+    assert catalog.match("pienas", "rimi")[0].product["price"] == 1.09
+    assert catalog.stats() == {
+        "products": 6, "stores": 2, "words": 7, "max_products": 50_000, "evicted": 0
+    }
+
+
+def test_full_catalog_drops_the_oldest_products():
+    catalog = ProductCatalog(max_products=4)
+    catalog.add([row("rimi", "Pienas 1L"), row("rimi", "Morkos 1 kg"), row("rimi", "Sūris 200 g")])
+    catalog.add([row("rimi", "Pienas 1L", 1.09), row("rimi", "Sviestas 200 g")])  # Refreshes milk
+
+    catalog.add([row("rimi", "Ryžiai 1 kg")])
+
+    assert catalog.stats()["products"] == 3
+    assert catalog.stats()["evicted"] == 2
+    assert catalog.match("morkos", "rimi") == [] and catalog.match("sūris", "rimi") == []
+    assert catalog.match("pienas", "rimi")[0].product["price"] == 1.09
+    assert catalog.match("ryžiai", "rimi")[0].product["product_name"] == "Ryžiai 1 kg"
+
+
+def test_collector_keeps_matching_products():
+    collector = PriceCollector(MemorySessionStore(), catalog=make_catalog())
+    searched = [row("rimi", "Pieno šokoladas 100 g", 0.79), row("rimi", "Pienas 2,5% 1L", 0.99)]
+
+    kept = collector._best_products("pienas 1l", "rimi", searched)
+    unknown = collector._best_products("trumai", "rimi", [row("rimi", "Sūris 200 g")])
+
+    assert [r["product_name"] for r in kept] == ["Pienas 2,5% 1L"]
+    assert [r["product_name"] for r in unknown] == ["Sūris 200 g"]
+
+
+def test_collector_keeps_only_products_of_this_search():
+    # The catalog knows a cheaper milk from an earlier scrape
+    collector = PriceCollector(MemorySessionStore(), catalog=make_catalog())
+    searched = [row("rimi", "Pienas 3,5% 1L", 1.19), row("rimi", "Pieno šokoladas 100 g", 0.79)]
+
+    kept = collector._best_products("pienas 1l", "rimi", searched)
+
+    assert [(r["product_name"], r["price"]) for r in kept] == [("Pienas 3,5% 1L", 1.19)]
@@ -0,0 +1,45 @@
+import marshal
+
+from fastapi.testclient import TestClient
+
+from main import app
+from api import routes
+from api.middleware import ProfilingMiddleware
+from services.request_profiler import RequestProfiler
+
+
+def profiled_client(tmp_path, monkeypatch, **options):
+    profiler = RequestProfiler(str(tmp_path), backend="cprofile", **options)
+    monkeypatch.setattr(routes, "request_profiler", profiler)
+    return TestClient(ProfilingMiddleware(app, profiler)), profiler
+
+
+def test_header_profiles_one_request_for_download(tmp_path, monkeypatch):
+    client, profiler = profiled_client(tmp_path, monkeypatch, token="secret")
+
+    assert "x-profile-id" not in client.get("/health").headers
+    assert "x-profile-id" not in client.get("/health", headers={"X-Profile": "wrong"}).headers
+    response = client.get("/health", headers={"X-Profile": "secret"})
+    profile_id = response.headers["x-profile-id"]
+
+    assert client.get(f"/debug/profiles/{profile_id}").status_code == 403
+    text = client.get(f"/debug/profiles/{profile_id}", params={"token": "secret"})
+    assert text.headers["content-type"].startswith("text/plain")
+    assert "health_check" in text.text
+    raw = client.get(f"/debug/profiles/{profile_id}?format=prof", headers={"X-Profile": "secret"})
+    assert isinstance(marshal.loads(raw.content), dict)
+
+    listed = client.get("/debug/profiles", params={"token": "secret"}).json()["profiles"]
+    assert [(p["id"], p["path"], p["status"]) for p in listed] == [(profile_id, "/health", 200)]
+    assert profiler.stats()["profiled"] == 1
+
+
+def test_sampling_keeps_only_the_newest_profiles(tmp_path, monkeypatch):
+    client, profiler = profiled_client(tmp_path, monkeypatch, sample_rate=1.0, max_profiles=2)
+
+    ids = [client.get("/health").headers["x-profile-id"] for _ in range(4)]
+
+    assert {p["id"] for p in profiler.list()} == set(ids[-2:])
+    assert client.get(f"/debug/profiles/{ids[0]}").status_code == 404
+    assert client.get("/debug/profiles/../../etc/passwd").status_code == 404
+    assert len(list(tmp_path.iterdir())) == 2 * 3  # txt, prof and metadata each
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from scrapers import (
+    BarboraScraper,
+    RimiScraper,
+    ScrapeError,
+    ScrapeScheduler,
+    StoreLimits,
+    create_scrapers,
+)
+
+FAST = StoreLimits(requests_per_second=0, max_connections=4, backoff_base_seconds=0.01)
+
+
+def barbora_page(*products):
+    cards = "".join(
+        f"""<li data-testid="product-card-{i}"><div data-b-for-cart='{json.dumps(p)}'></div></li>"""
+        for i, p in enumerate(products)
+    )
+    return f"<html><body><ul>{cards}</ul></body></html>"
+
+
+RIMI_PAGE = """
+<div class="product-grid__item">
+  <p class="product-name">Bulvės, 1 kg</p>
+  <div class="price">0,89 €</div>
+  <p class="price-per-unit">0,89 €/kg</p>
+</div>
+<div class="product-grid__item"><p class="product-name">Be kainos</p></div>
+"""
+
+
+def test_barbora_parses_cart_json():
+    """Barbora cards are read from their data-b-for-cart JSON."""
+    page = barbora_page(
+        {"title": "Pienas 1 l", "price": 1.29, "comparative_unit_price": 1.29,
+         "comparative_unit": "l", "status": "active"},
+        {"title": "Pienas 2 l", "price": 2.29, "comparative_unit_price": 1.15,
+         "comparative_unit": "l", "status": "inactive"},
+    )
+    rows = BarboraScraper("http://stand-in").parse("pienas", page.encode(), "http://stand-in/x")
+
+    assert [r["product_name"] for r in rows] == ["Pienas 1 l", "Pienas 2 l"]
+    assert rows[1]["unit_price"] == 1.15 and rows[1]["unit"] == "l"
+    assert rows[1]["available"] is False
+    assert rows[0]["ingredient"] == "pienas" and rows[0]["store"] == "barbora"
+
+
+def test_card_selectors_parse_rimi_page():
+    """Selector-based stores read name, price and unit price; cards without a price are skipped."""
+    rows = RimiScraper("http://stand-in").parse("bulvės", RIMI_PAGE.encode(), "u")
+
+    assert rows == [{
+        "product_name": "Bulvės, 1 kg", "price": 0.89, "unit_price": 0.89, "unit": "kg",
+        "available": True, "ingredient": "bulvės", "store": "rimi", "url": "u",
+    }]
+
+
+def test_not_found_page_and_unparsable_page():
+    scraper = BarboraScraper("http://stand-in")
+    not_found = b'<div class="b-alert--warning">Nerasta</div>'
+
+    assert scraper.parse("nieko", not_found, "u") == []
+    with pytest.raises(ScrapeError):
+        scraper.parse("nieko", b"<html>captcha</html>", "u")
+
+
+def test_create_scrapers_rejects_unknown_store():
+    assert [s.name for s in create_scrapers(["rimi", "barbora"])] == ["rimi", "barbora"]
+    with pytest.raises(ValueError):
+        create_scrapers(["iki"])
+
+
+async def test_scheduler_retries_after_rate_limit():
+    """429 responses are retried after backoff; other 4xx fail straight away."""
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.params["q"])
+        if request.url.params["q"] == "gone":
+            return httpx.Response(404)
+        if calls.count("pienas") == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, text=barbora_page({"title": "Pienas", "price": 1.0, "status": "active"}))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    async with ScrapeScheduler([BarboraScraper("http://stand-in")], default_limits=FAST, client=client) as scheduler:
+        rows = await scheduler.search("barbora", "pienas")
+        with pytest.raises(ScrapeError):
+            await scheduler.search("barbora", "gone")
+
+    assert rows[0]["price"] == 1.0
+    assert calls == ["pienas", "pienas", "gone"]
+    assert scheduler.stats()["barbora"]["retries"] == 1
+    assert scheduler.stats()["barbora"]["failures"] == 1
+    await client.aclose()
+
+
+async def test_scheduler_enforces_connection_cap_and_rate_limit():
+    in_flight = {"now": 0, "max": 0}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.02)
+        in_flight["now"] -= 1
+        return httpx.Response(200, text=RIMI_PAGE)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    limits = {"rimi": StoreLimits(requests_per_second=50, max_connections=2)}
+    scheduler = ScrapeScheduler([RimiScraper("http://stand-in")], limits, client=client)
+
+    started = time.monotonic()
+    await asyncio.gather(*(scheduler.search("rimi", f"item {i}") for i in range(10)))
+    elapsed = time.monotonic() - started
+
+    assert in_flight["max"] == 2
+    # 10 requests at 50/s need at least 9 intervals of 20 ms
+    assert elapsed >= 0.17
+    await client.aclose()
+
+
+async def test_collect_prices_across_stores():
+    """One pass over all stores; empty results become unavailable rows, failures become errors."""
+    def handler(request):
+        query = request.url.params.get("q") or request.url.params.get("query")
+        if request.url.host == "rimi" and query == "bulvės":
+            return httpx.Response(200, text=RIMI_PAGE)
+        if request.url.host == "rimi":
+            return httpx.Response(403)
+        if query == "bulvės":
+            return httpx.Response(200, text=barbora_page({"title": "Bulvės", "price": 0.99, "status": "active"}))
+        return httpx.Response(200, text='<div class="b-alert--warning"></div>')
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    scheduler = ScrapeScheduler(
+        [BarboraScraper("http://barbora"), RimiScraper("http://rimi")], default_limits=FAST, client=client
+    )
+    rows, errors = await scheduler.collect_prices(["bulvės", "trumai"])
+
+    by_key = {(r["ingredient"], r["store"]): r for r in rows}
+    assert by_key[("bulvės", "barbora")]["price"] == 0.99
+    assert by_key[("bulvės", "rimi")]["price"] == 0.89
+    assert by_key[("trumai", "barbora")]["available"] is False
+    assert errors == [{"ingredient": "trumai", "store": "rimi", "error": "rimi: HTTP 403"}]
+    await client.aclose()
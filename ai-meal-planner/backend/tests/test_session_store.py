@@ -0,0 +1,87 @@
+import asyncio
+import time
+from datetime import datetime
+
+from services.session_store import MemorySessionStore, SQLiteSessionStore
+
+
+def test_memory_store_lru_bound():
+    """The least recently used session is evicted past max_sessions."""
+    store = MemorySessionStore(max_sessions=2)
+    store.set("a", {"status": "meal_plan_ready"})
+    store.set("b", {"status": "meal_plan_ready"})
+    store.get("a")
+    store.set("c", {"status": "meal_plan_ready"})
+
+    assert "b" not in store
+    assert "a" in store and "c" in store
+    assert store.stats()["evicted"] == 1
+
+
+def test_memory_store_ttl_and_purge():
+    """Idle sessions expire and purge_expired removes them."""
+    store = MemorySessionStore(ttl_seconds=0.05)
+    store.set("old", {})
+    time.sleep(0.06)
+    store.set("new", {})
+
+    assert store.purge_expired() == 1
+    assert store.get("old") is None
+    assert store.get("new") == {}
+
+
+def test_len_counts_live_sessions_on_every_backend(tmp_path):
+    """Expired sessions are not counted, whether or not they were purged yet."""
+    for store in (
+        MemorySessionStore(ttl_seconds=0.05),
+        SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=0.05),
+    ):
+        store.set("old", {})
+        time.sleep(0.06)
+        store.set("new", {})
+
+        assert len(store) == 1, type(store).__name__
+        assert store.purge_expired() == 1 and len(store) == 1
+
+
+def test_sqlite_store_shared_between_instances(tmp_path):
+    """Two stores on the same file (e.g. two workers) see each other's writes."""
+    path = str(tmp_path / "sessions.sqlite3")
+    worker_a = SQLiteSessionStore(path)
+    worker_b = SQLiteSessionStore(path)
+
+    worker_a.set("s1", {"status": "meal_plan_ready", "created_at": datetime(2025, 1, 1)})
+    session = worker_b.get("s1")
+    assert session == {"status": "meal_plan_ready", "created_at": "2025-01-01T00:00:00"}
+
+    session["status"] = "decision_made"
+    worker_b.set("s1", session)
+    assert worker_a.get("s1")["status"] == "decision_made"
+
+    assert worker_a.delete("s1")
+    assert worker_b.get("s1") is None
+    assert not worker_b.delete("s1")
+
+
+def test_sqlite_store_purge_bounds_size(tmp_path):
+    """purge_expired drops expired sessions and enforces max_sessions."""
+    store = SQLiteSessionStore(str(tmp_path / "s.sqlite3"), ttl_seconds=60, max_sessions=2)
+    for session_id in ("a", "b", "c"):
+        store.set(session_id, {})
+        time.sleep(0.01)
+
+    assert store.purge_expired() == 1
+    assert len(store) == 2
+    assert store.get("a") is None
+
+
+async def test_background_expiry():
+    """The expiry task purges sessions without any request touching them."""
+    store = MemorySessionStore(ttl_seconds=0.01)
+    store.set("a", {})
+    store.start_expiry(interval=0.02)
+    await asyncio.sleep(0.05)
+    store.stop_expiry()
+
+    assert len(store) == 0
+    assert store.stats()["expired"] == 1
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from api import routes
+from services.single_flight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    started = 0
+
+    async def generate():
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0.05)
+        return {"meal_plan": []}
+
+    results = await asyncio.gather(*(flight.do("key", generate) for _ in range(5)))
+    other = await flight.do("other", generate)
+
+    assert started == 2
+    assert all(result is results[0] for result in results)
+    assert other == {"meal_plan": []}
+    assert flight.stats() == {"in_flight": 0, "calls": 2, "coalesced": 4, "coalesced_ratio": 0.667}
+
+
+async def test_errors_reach_every_caller_and_are_not_remembered():
+    flight = SingleFlight()
+
+    async def broken():
+        await asyncio.sleep(0.01)
+        raise ValueError("invalid JSON")
+
+    results = await asyncio.gather(
+        flight.do("key", broken), flight.do("key", broken), return_exceptions=True
+    )
+    assert [str(r) for r in results] == ["invalid JSON", "invalid JSON"]
+
+    async def fixed():
+        return "ok"
+
+    assert await flight.do("key", fixed) == "ok"
+
+
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def generate():
+        await asyncio.sleep(0.05)
+        return "plan"
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(flight.do("key", generate), 0.01)
+    assert await flight.do("key", generate) == "plan"
+    assert flight.stats()["calls"] == 1
+
+
+def test_identical_requests_get_own_sessions_from_one_llm_call(monkeypatch):
+    """A burst of the same prompt makes one Gemini call but separate sessions."""
+    calls = []
+
+    def fake_tool(preferences, days):
+        calls.append(preferences)
+        time.sleep(0.1)
+        return {"meal_plan": [], "shopping_list": ["ryžiai 1kg"]}
+
+    monkeypatch.setattr(routes, "generate_meal_plan_tool", fake_tool)
+    monkeypatch.setattr(routes, "plan_cache", None)
+    monkeypatch.setattr(routes.settings, "meal_fanout_enabled", False)
+
+    async def burst():
+        return await asyncio.gather(*(
+            routes.generate_plan(routes.GeneratePlanRequest(preferences=prompt))
+            for prompt in ("Pigūs pietūs", "pigūs pietūs!", "pigūs  pietūs")
+        ))
+
+    responses = asyncio.run(burst())
+
+    assert len(calls) == 1
+    assert len({r.session_id for r in responses}) == 3
+    health = TestClient(app).get("/health").json()
+    assert health["llm_coalescing"]["coalesced"] >= 2
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from google.generativeai.types import generation_types
+
+from tools.meal_generation import _generation_config
+from tools.structured_output import meal_plan_response_schema, parse_meal_plan
+
+MEAL = {
+    "title": "Omletas",
+    "description": "Greiti pusryčiai",
+    "ingredients": ["kiaušiniai 6vnt", "pienas 1l"],
+    "recipe": ["Išplakite", "Kepkite"],
+    "key_protein": "kiaušiniai",
+}
+
+
+def test_response_schema_is_accepted_by_gemini():
+    schema = meal_plan_response_schema()
+    meal = schema["properties"]["meal_plan"]["items"]
+
+    assert schema["required"] == ["meal_plan", "shopping_list"]
+    assert meal["properties"]["key_protein"] == {"type": "string", "nullable": True}
+    assert "key_protein" not in meal["required"]
+    config = generation_types.to_generation_config_dict(_generation_config())
+    assert config["response_mime_type"] == "application/json"
+
+
+def test_valid_response_parses_from_bytes():
+    text = json.dumps({"meal_plan": [MEAL], "shopping_list": ["kiaušiniai 6vnt"]})
+
+    assert parse_meal_plan(text.encode()) == {
+        "meal_plan": [MEAL], "shopping_list": ["kiaušiniai 6vnt"]
+    }
+
+
+def test_invalid_meals_are_repaired_or_dropped():
+    text = "```json\n" + json.dumps({
+        "meal_plan": [
+            {**MEAL, "ingredients": "morkos 2vnt, sviestas 0,5kg", "recipe": "1. Nulupkite\n2. Virkite",
+             "description": None, "key_protein": 7},
+            {"title": "Be ingredientų", "recipe": []},
+            "ne patiekalas",
+        ],
+    }, ensure_ascii=False) + "\n```"
+
+    plan = parse_meal_plan(text)
+
+    assert plan["meal_plan"] == [{
+        "title": "Omletas",
+        "description": "",
+        "ingredients": ["morkos 2vnt", "sviestas 0,5kg"],
+        "recipe": ["Nulupkite", "Virkite"],
+        "key_protein": "7",
+    }]
+    # No shopping list in the response: aggregated from the kept meals
+    assert plan["shopping_list"] == ["morkos 2vnt", "sviestas 500g"]
+
+
+def test_truncated_response_keeps_complete_meals():
+    text = json.dumps({"meal_plan": [MEAL, MEAL]}, ensure_ascii=False)[:-40]
+
+    plan = parse_meal_plan(text)
+
+    assert plan["meal_plan"] == [MEAL]
+
+
+def test_empty_plan_raises():
+    # Well-formed JSON takes the fast path; it must not return a plan with no meals
+    with pytest.raises(ValueError):
+        parse_meal_plan('{"meal_plan": [], "shopping_list": ["pienas 1l"]}')
+
+
+def test_unusable_response_raises():
+    with pytest.raises(ValueError):
+        parse_meal_plan('{"meal_plan": [{"title": "A"}], "shopping_list": []}')
+    with pytest.raises(ValueError):
+        parse_meal_plan("Atsiprašau, negaliu padėti.")
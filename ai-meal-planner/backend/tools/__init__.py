@@ -1,8 +1,37 @@
-from .meal_generation import generate_meal_plan_tool
-from .price_analysis import analyze_prices_tool, select_best_store_tool
+from .meal_generation import generate_meal_plan_parallel, generate_meal_plan_tool
+from .price_analysis import (
+    PriceTable,
+    analyze_prices_columnar,
+    analyze_prices_tool,
+    select_best_store_tool,
+)
+from .ingredient_parser import parse_ingredient, parse_package_size
+from .package_solver import cheapest_packages, solve_package_quantities
+from .basket_optimizer import InfeasibleBasketError, optimize_basket, select_split_basket_tool
+from .product_catalog import ProductCatalog, ProductMatch
+from .shopping_list import aggregate_shopping_list
+from .token_usage import TokenCounter, token_counter
+from .metrics import MetricsRegistry, metrics
 
 __all__ = [
     "generate_meal_plan_tool",
+    "generate_meal_plan_parallel",
     "analyze_prices_tool",
+    "analyze_prices_columnar",
+    "PriceTable",
     "select_best_store_tool",
+    "InfeasibleBasketError",
+    "optimize_basket",
+    "select_split_basket_tool",
+    "parse_ingredient",
+    "parse_package_size",
+    "cheapest_packages",
+    "solve_package_quantities",
+    "ProductCatalog",
+    "ProductMatch",
+    "aggregate_shopping_list",
+    "TokenCounter",
+    "token_counter",
+    "MetricsRegistry",
+    "metrics",
 ]
@@ -0,0 +1,349 @@
+import time
+from itertools import combinations
+from math import comb
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tools.price_analysis import PriceTable
+
+# Enumerate every store subset when there are at most this many of them
+EXACT_SUBSET_LIMIT = 2048
+
+
+class InfeasibleBasketError(ValueError):
+    """Raised when no allowed store combination stocks the whole shopping list."""
+
+
+class CostMatrix:
+    """
+    Cheapest available price of every ingredient at every store.
+
+    ``cost[i, s]`` is ``inf`` when ingredient ``i`` is unavailable at store
+    ``s``; ``row[i, s]`` is the PriceTable row of that cheapest product.
+    """
+
+    def __init__(self, table: PriceTable):
+        ingredient_codes: Dict[str, int] = {}
+        ingredient_idx = np.fromiter(
+            (ingredient_codes.setdefault(name, len(ingredient_codes)) for name in table.ingredients),
+            np.intp,
+            len(table),
+        )
+        n_ingredients = len(ingredient_codes)
+        n_stores = len(table.store_names)
+
+        self.ingredients = list(ingredient_codes)
+        self.stores = table.store_names
+        self.cost = np.full((n_ingredients, n_stores), np.inf)
+        self.row = np.full((n_ingredients, n_stores), -1, dtype=np.intp)
+
+        rows = np.flatnonzero(table.available)
+        if len(rows):
+            cell = ingredient_idx[rows] * n_stores + table.store_idx[rows]
+            order = np.lexsort((table.price[rows], cell))
+            cells, first = np.unique(cell[order], return_index=True)
+            best = rows[order[first]]
+            self.cost.flat[cells] = table.price[best]
+            self.row.flat[cells] = best
+
+
+class BasketCosts:
+    """Per-store delivery fee and minimum-order penalty."""
+
+    def __init__(
+        self,
+        delivery_fee: np.ndarray,
+        min_order: np.ndarray,
+        min_order_penalty: np.ndarray,
+    ):
+        self.delivery_fee = delivery_fee
+        self.min_order = min_order
+        self.min_order_penalty = min_order_penalty
+
+    @classmethod
+    def for_stores(
+        cls,
+        stores: Sequence[str],
+        delivery_fees: Dict[str, float],
+        default_delivery_fee: float = 0.0,
+        min_order: float = 0.0,
+        min_order_penalty: float = 0.0,
+    ) -> "BasketCosts":
+        return cls(
+            delivery_fee=np.array([delivery_fees.get(s, default_delivery_fee) for s in stores]),
+            min_order=np.full(len(stores), min_order),
+            min_order_penalty=np.full(len(stores), min_order_penalty),
+        )
+
+
+def _evaluate(
+    cost: np.ndarray, costs: BasketCosts, stores: Tuple[int, ...]
+) -> Tuple[float, Optional[np.ndarray]]:
+    """Cheapest assignment restricted to a store subset (inf if infeasible)."""
+    sub = cost[:, stores]
+    local = np.argmin(sub, axis=1)
+    item_cost = sub[np.arange(len(sub)), local]
+    if not np.isfinite(item_cost).all():
+        return np.inf, None
+
+    assign = np.asarray(stores)[local]
+    return _total(cost, costs, assign), assign
+
+
+def _total(cost: np.ndarray, costs: BasketCosts, assign: np.ndarray) -> float:
+    n_stores = cost.shape[1]
+    item_cost = cost[np.arange(len(assign)), assign]
+    subtotal = np.bincount(assign, weights=item_cost, minlength=n_stores)
+    used = np.bincount(assign, minlength=n_stores) > 0
+    penalty = used & (subtotal < costs.min_order)
+    return float(
+        item_cost.sum()
+        + costs.delivery_fee[used].sum()
+        + costs.min_order_penalty[penalty].sum()
+    )
+
+
+def _repair_min_order(
+    cost: np.ndarray, costs: BasketCosts, assign: np.ndarray, total: float
+) -> Tuple[float, np.ndarray]:
+    """
+    Move the cheapest extra items into stores that fall short of their
+    minimum order, keeping the move only if it lowers the total.
+    """
+    if not costs.min_order_penalty.any():
+        return total, assign
+
+    n_items = len(assign)
+    item_cost = cost[np.arange(n_items), assign]
+    subtotal = np.bincount(assign, weights=item_cost, minlength=cost.shape[1])
+    for store in np.unique(assign):
+        shortfall = costs.min_order[store] - subtotal[store]
+        if shortfall <= 0 or not costs.min_order_penalty[store]:
+            continue
+        movable = np.flatnonzero((assign != store) & np.isfinite(cost[:, store]))
+        if not len(movable):
+            continue
+        # Prefer items that cost least extra to buy here
+        delta = cost[movable, store] - item_cost[movable]
+        order = movable[np.argsort(delta, kind="stable")]
+        needed = np.searchsorted(np.cumsum(cost[order, store]), shortfall) + 1
+        candidate = assign.copy()
+        candidate[order[:needed]] = store
+        candidate_total = _total(cost, costs, candidate)
+        if candidate_total < total:
+            total, assign = candidate_total, candidate
+            item_cost = cost[np.arange(n_items), assign]
+            subtotal = np.bincount(assign, weights=item_cost, minlength=cost.shape[1])
+    return total, assign
+
+
+def _solve_subset(
+    cost: np.ndarray, costs: BasketCosts, stores: Tuple[int, ...]
+) -> Tuple[float, Optional[np.ndarray]]:
+    total, assign = _evaluate(cost, costs, stores)
+    if assign is None:
+        return total, None
+    return _repair_min_order(cost, costs, assign, total)
+
+
+def _exact(
+    cost: np.ndarray, costs: BasketCosts, max_stores: int
+) -> Tuple[float, Optional[np.ndarray]]:
+    best_total, best_assign = np.inf, None
+    for k in range(1, max_stores + 1):
+        for stores in combinations(range(cost.shape[1]), k):
+            total, assign = _solve_subset(cost, costs, stores)
+            if total < best_total:
+                best_total, best_assign = total, assign
+    return best_total, best_assign
+
+
+def _local_search(
+    cost: np.ndarray, costs: BasketCosts, max_stores: int, deadline: float
+) -> Tuple[float, Optional[np.ndarray]]:
+    n_stores = cost.shape[1]
+    current: Tuple[int, ...] = ()
+    best_total, best_assign = np.inf, None
+
+    # Greedy: add the store that lowers the total most. Until the set covers
+    # every ingredient, add the store that covers the most missing ones.
+    while len(current) < max_stores and time.perf_counter() < deadline:
+        step_key, step = None, None
+        for store in range(n_stores):
+            if store in current:
+                continue
+            stores = tuple(sorted(current + (store,)))
+            total, assign = _solve_subset(cost, costs, stores)
+            if assign is not None:
+                key = (1, -total)
+            else:
+                key = (0, int(np.isfinite(cost[:, stores].min(axis=1)).sum()))
+            if step_key is None or key > step_key:
+                step_key, step = key, (stores, total, assign)
+        if step is None:
+            break
+        stores, total, assign = step
+        if assign is not None and total >= best_total:
+            break
+        current = stores
+        if assign is not None:
+            best_total, best_assign = total, assign
+
+    # Swap moves: replace one chosen store with an unchosen one
+    improved = best_assign is not None
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        chosen = tuple(int(s) for s in np.unique(best_assign))
+        for out in chosen:
+            for store in range(n_stores):
+                if store in chosen or time.perf_counter() >= deadline:
+                    continue
+                stores = tuple(sorted(set(chosen) - {out} | {store}))
+                total, assign = _solve_subset(cost, costs, stores)
+                if total < best_total - 1e-9:
+                    best_total, best_assign, improved = total, assign, True
+                    break
+            if improved:
+                break
+    return best_total, best_assign
+
+
+def optimize_basket(
+    matrix: CostMatrix,
+    costs: BasketCosts,
+    max_stores: int,
+    time_budget_ms: float = 20.0,
+) -> Dict:
+    """
+    Choose which store to buy each ingredient from.
+
+    Minimizes item cost plus delivery fees and minimum-order penalties of
+    the stores used, with at most ``max_stores`` stores. Every store subset
+    is enumerated when there are few enough of them (exact for delivery
+    fees; minimum-order shortfalls are repaired greedily within a subset),
+    otherwise a greedy construction plus swap local search runs until the
+    time budget is spent.
+
+    Args:
+        matrix: Cheapest price per ingredient and store
+        costs: Delivery fees and minimum-order rules per store
+        max_stores: Maximum number of stores to order from
+        time_budget_ms: Search budget for the heuristic path
+
+    Returns:
+        Dict with total cost, per-ingredient store assignment, ingredients
+        that no store has, and whether the result is exact
+    """
+    available = np.isfinite(matrix.cost).any(axis=1)
+    cost = matrix.cost[available]
+    max_stores = max(1, min(max_stores, cost.shape[1]))
+
+    n_subsets = sum(comb(cost.shape[1], k) for k in range(1, max_stores + 1))
+    exact = n_subsets <= EXACT_SUBSET_LIMIT
+    if not len(cost):
+        total, assign = 0.0, np.empty(0, dtype=np.intp)
+    elif exact:
+        total, assign = _exact(cost, costs, max_stores)
+    else:
+        deadline = time.perf_counter() + time_budget_ms / 1000
+        total, assign = _local_search(cost, costs, max_stores, deadline)
+
+    ingredient_idx = np.flatnonzero(available)
+    return {
+        "feasible": assign is not None,
+        "exact": exact,
+        "total_cost": float(total),
+        "ingredient_idx": ingredient_idx,
+        "assignment": assign,
+        "missing": [matrix.ingredients[i] for i in np.flatnonzero(~available)],
+    }
+
+
+def select_split_basket_tool(
+    table: PriceTable,
+    delivery_fees: Dict[str, float],
+    default_delivery_fee: float = 0.0,
+    min_order: float = 0.0,
+    min_order_penalty: float = 0.0,
+    max_stores: int = 2,
+    time_budget_ms: float = 20.0,
+    comparisons: Optional[List[Dict]] = None,
+) -> Dict:
+    """
+    Split-basket shopping decision: buy each ingredient where it is cheapest
+    overall once delivery fees are counted.
+
+    Args:
+        table: PriceTable built from the price report
+        delivery_fees: Delivery fee per store name
+        default_delivery_fee: Fee for stores missing from delivery_fees
+        min_order: Basket subtotal below which min_order_penalty applies
+        min_order_penalty: Extra charge for a basket under min_order
+        max_stores: Maximum number of stores to order from
+        time_budget_ms: Search budget for large instances
+        comparisons: Single-store comparisons to include in the decision
+
+    Returns:
+        Shopping decision in the ShoppingDecision shape, with per-store baskets
+
+    Raises:
+        InfeasibleBasketError: No max_stores stores together stock every ingredient
+    """
+    matrix = CostMatrix(table)
+    costs = BasketCosts.for_stores(
+        matrix.stores, delivery_fees, default_delivery_fee, min_order, min_order_penalty
+    )
+    result = optimize_basket(matrix, costs, max_stores, time_budget_ms)
+    if not result["feasible"]:
+        raise InfeasibleBasketError(
+            f"No combination of {max_stores} store(s) or fewer stocks the whole shopping list"
+        )
+
+    assign = result["assignment"]
+    ingredient_idx = result["ingredient_idx"]
+    rows = matrix.row[ingredient_idx, assign]
+
+    baskets = []
+    items = []
+    for store in np.unique(assign).tolist():
+        store_rows = rows[assign == store].tolist()
+        subtotal = float(table.price[store_rows].sum())
+        fee = float(costs.delivery_fee[store])
+        if subtotal < costs.min_order[store]:
+            fee += float(costs.min_order_penalty[store])
+        baskets.append({
+            "store": matrix.stores[store],
+            "subtotal": subtotal,
+            "delivery_fee": fee,
+            "items_count": len(store_rows),
+        })
+        items.extend(table.items(store_rows, store=matrix.stores[store]))
+
+    total_cost = result["total_cost"]
+    single_store_totals = [
+        c["total_cost"] + float(costs.delivery_fee[matrix.stores.index(c["store"])])
+        for c in comparisons or []
+        if c["items_missing"] == 0
+    ]
+    total_savings = min(single_store_totals) - total_cost if single_store_totals else 0.0
+
+    store_names = [b["store"] for b in baskets]
+    reason = f"Splitting the basket across {', '.join(s.capitalize() for s in store_names)} "
+    reason += f"costs €{total_cost:.2f} including delivery."
+    if single_store_totals:
+        reason += f" You save €{total_savings:.2f} compared to the best single store."
+    if result["missing"]:
+        reason += f" Not available anywhere: {', '.join(result['missing'])}."
+
+    return {
+        "recommended_store": " + ".join(store_names),
+        "total_cost": total_cost,
+        "total_savings": total_savings,
+        "reason": reason,
+        "comparisons": comparisons or [],
+        "items": items,
+        "mode": "split_basket",
+        "baskets": baskets,
+        "missing_items": result["missing"],
+    }
@@ -0,0 +1,130 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+# "bulvės 500g", "pienas 1l", "morkos 1.2kg", "kiaušiniai 6vnt"
+_INGREDIENT_QUANTITY = re.compile(
+    r"^(?P<name>.+?)\s+(?P<amount>\d+(?:[.,]\d+)?)\s*(?P<unit>kg|g|ml|l|vnt)\.?$",
+    re.IGNORECASE,
+)
+# "Bulvės 1kg", "Varškė 200 g", "Pienas 2,5% 1L", "Kiaušiniai 10 vnt."
+_PACKAGE_SIZE = re.compile(
+    r"(?P<amount>\d+(?:[.,]\d+)?)\s*(?P<unit>kg|g|ml|l|vnt)(?![a-ząčęėįšųūž])",
+    re.IGNORECASE,
+)
+
+# Unit -> (factor to base unit, base unit)
+UNIT_FACTORS = {
+    "kg": (1000.0, "g"),
+    "g": (1.0, "g"),
+    "l": (1000.0, "ml"),
+    "ml": (1.0, "ml"),
+    "vnt": (1.0, "vnt"),
+}
+
+# Average weight per piece (grams), for recipes in pieces and products by weight
+AVERAGE_WEIGHTS = {
+    "paprik": 200,
+    "pomidor": 150,
+    "agurk": 200,
+    "svogūn": 150,
+    "bulv": 150,
+    "mork": 100,
+    "baklažan": 300,
+    "cukinij": 300,
+}
+
+
+class ParsedIngredient(NamedTuple):
+    """Ingredient name and needed amount in base units."""
+    name: str
+    amount: float  # Grams, milliliters or pieces (1 when unit is "none")
+    unit: str  # "g", "ml", "vnt" or "none"
+    original: str
+
+
+def _to_base(amount: str, unit: str) -> Tuple[float, str]:
+    factor, base = UNIT_FACTORS[unit.lower()]
+    return float(amount.replace(",", ".")) * factor, base
+
+
+@lru_cache(maxsize=8192)
+def parse_ingredient(text: str) -> ParsedIngredient:
+    """
+    Parse an LLM ingredient string like "pienas 800ml".
+
+    Args:
+        text: Ingredient with optional trailing quantity
+
+    Returns:
+        ParsedIngredient; items without a quantity (e.g. "druska") get unit "none"
+    """
+    original = text.strip()
+    match = _INGREDIENT_QUANTITY.match(original)
+    if match is None:
+        return ParsedIngredient(original, 1.0, "none", original)
+
+    amount, unit = _to_base(match.group("amount"), match.group("unit"))
+    return ParsedIngredient(match.group("name").strip(), amount, unit, original)
+
+
+@lru_cache(maxsize=8192)
+def parse_package_size(product_name: str) -> Optional[Tuple[float, str]]:
+    """
+    Parse the package size from a product name like "Varškė 200 g".
+
+    Returns:
+        (size, base unit) or None if the name has no size
+    """
+    match = _PACKAGE_SIZE.search(product_name)
+    if match is None:
+        return None
+    return _to_base(match.group("amount"), match.group("unit"))
+
+
+def package_size_from_unit_price(
+    price: float, unit_price: float, unit: str
+) -> Optional[Tuple[float, str]]:
+    """
+    Derive the package size from its price and comparative unit price.
+
+    E.g. a 1.50 EUR pack at 3.00 EUR/kg is 500 g.
+    """
+    if price <= 0 or unit_price <= 0:
+        return None
+    factor_unit = UNIT_FACTORS.get(unit.strip().lower().lstrip("€/"))
+    if factor_unit is None:
+        return None
+    factor, base = factor_unit
+    size = price / unit_price * factor
+    if base == "vnt":
+        size = max(1.0, round(size))
+    return size, base
+
+
+def estimate_piece_weight(name: str) -> Optional[float]:
+    """Average weight of one piece in grams, if known."""
+    lowered = name.lower()
+    for stem, weight in AVERAGE_WEIGHTS.items():
+        if stem in lowered:
+            return float(weight)
+    return None
+
+
+def needed_in_unit(ingredient: ParsedIngredient, package_unit: str) -> Optional[float]:
+    """
+    Convert the needed amount to the unit a product is sold in.
+
+    Returns:
+        Amount in package_unit, or None when the units cannot be compared
+    """
+    if ingredient.unit == package_unit:
+        return ingredient.amount
+    weight = estimate_piece_weight(ingredient.name)
+    if weight is None:
+        return None
+    if ingredient.unit == "vnt" and package_unit == "g":
+        return ingredient.amount * weight
+    if ingredient.unit == "g" and package_unit == "vnt":
+        return ingredient.amount / weight
+    return None
@@ -0,0 +1,126 @@
+import re
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+# Characters that change parser state outside and inside JSON strings
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_KEY_BEFORE = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*$')
+
+
+class MealPlanStreamParser:
+    """
+    Incremental parser for the meal plan JSON returned by the LLM.
+
+    Feed it text chunks as they arrive. Each object inside the top-level
+    ``"meal_plan"`` array is decoded and returned as soon as its closing
+    brace is seen, so callers can forward meals before the rest of the
+    response has been generated. Text before the first ``{`` and after the
+    matching ``}`` (markdown fences, commentary) is ignored.
+    """
+
+    def __init__(self, array_key: str = "meal_plan"):
+        self.array_key = array_key
+        self._buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._doc_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._items_depth: Optional[int] = None
+        self.document: Optional[Dict[str, Any]] = None
+
+    @property
+    def done(self) -> bool:
+        """True once the top-level JSON object has been closed."""
+        return self.document is not None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume a chunk of text.
+
+        Args:
+            chunk: Next piece of the LLM response
+
+        Returns:
+            Meal objects completed by this chunk (possibly empty)
+        """
+        if self.done:
+            return []
+
+        self._buffer += chunk
+        completed: List[Dict[str, Any]] = []
+        buffer = self._buffer
+        pos = self._pos
+
+        if self._doc_start is None:
+            start = buffer.find("{", pos)
+            if start == -1:
+                self._pos = len(buffer)
+                return completed
+            self._doc_start = pos = start
+
+        while True:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                if match.group() == "\\":
+                    if match.end() >= len(buffer):
+                        # Escape split across chunks; resume at the backslash
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                self._in_string = False
+                pos = match.end()
+                continue
+
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char = match.group()
+            index = match.start()
+            pos = match.end()
+
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._items_depth is not None and len(self._stack) == self._items_depth:
+                    self._item_start = index
+                self._stack.append(char)
+            elif char == "[":
+                if len(self._stack) == 1 and self._items_depth is None:
+                    window = max(self._doc_start, index - 256)
+                    key = _KEY_BEFORE.search(buffer, window, index)
+                    if key and key.group(1) == self.array_key:
+                        self._items_depth = len(self._stack) + 1
+                self._stack.append(char)
+            else:
+                self._stack.pop()
+                depth = len(self._stack)
+                if char == "}" and self._item_start is not None and depth == self._items_depth:
+                    completed.append(orjson.loads(buffer[self._item_start:pos]))
+                    self._item_start = None
+                elif char == "]" and depth == 1 and self._items_depth is not None:
+                    self._items_depth = -1  # Array finished; ignore later arrays
+                elif depth == 0:
+                    self.document = orjson.loads(buffer[self._doc_start:pos])
+                    break
+
+        self._pos = pos
+        return completed
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Finish parsing and return the full JSON document.
+
+        Raises:
+            ValueError: If the text did not contain a complete JSON object
+        """
+        if self.document is None:
+            raise ValueError("Incomplete JSON in LLM response")
+        return self.document
@@ -1,20 +1,270 @@
-import json
-import re
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
 import google.generativeai as genai
+import orjson
+from google.generativeai import caching
 from config.settings import settings
+from tools.json_stream import MealPlanStreamParser
+from tools.metrics import LLM_SECONDS
+from tools.shopping_list import aggregate_shopping_list
+from tools.structured_output import (
+    meal_outline_response_schema,
+    meal_plan_response_schema,
+    meal_response_schema,
+    parse_meal,
+    parse_meal_outline,
+    parse_meal_plan,
+)
+from tools.token_usage import token_counter
+
+logger = logging.getLogger(__name__)
+
+_configured_pid: Optional[int] = None
+
+# Per-process model, rebuilt when the model name changes or its context cache expires
+_model_lock = threading.Lock()
+_model: Optional["genai.GenerativeModel"] = None
+_model_key: Optional[Tuple[int, str]] = None
+_model_expires_at = float("inf")
+
+
+def configure_gemini() -> None:
+    """
+    Configure the Gemini client for the current process.
+    
+    Called from the app lifespan hook so every worker sets up its own
+    client; also called lazily so the tools work outside the app.
+    """
+    global _configured_pid
+    if _configured_pid != os.getpid():
+        options: Dict[str, Any] = {}
+        if settings.gemini_api_endpoint:
+            # A proxy or a local stand-in such as benchmarks/fake_gemini.py (REST only)
+            options = {"transport": "rest", "client_options": {"api_endpoint": settings.gemini_api_endpoint}}
+        genai.configure(api_key=settings.gemini_api_key, **options)
+        _configured_pid = os.getpid()
+
+
+def _build_model() -> Tuple["genai.GenerativeModel", float]:
+    """Create the meal planning model and the time.monotonic() at which to rebuild it."""
+    if settings.gemini_context_cache_enabled:
+        ttl = settings.gemini_context_cache_ttl_seconds
+        try:
+            cache = caching.CachedContent.create(
+                model=settings.gemini_model,
+                display_name="meal-plan-instructions",
+                system_instruction=MEAL_PLAN_SYSTEM_INSTRUCTION,
+                ttl=timedelta(seconds=ttl),
+            )
+            logger.info(f"Created Gemini context cache {cache.name} (ttl {ttl}s)")
+            # Rebuild a little before Gemini drops the cache
+            return genai.GenerativeModel.from_cached_content(cache), time.monotonic() + ttl * 0.9
+        except Exception as e:
+            # Not every model supports caching and there is a minimum cacheable size
+            logger.warning(f"Gemini context cache unavailable, using a system instruction: {e}")
+
+    model = genai.GenerativeModel(
+        settings.gemini_model,
+        system_instruction=MEAL_PLAN_SYSTEM_INSTRUCTION,
+    )
+    return model, float("inf")
 
-# Configure the API
-genai.configure(api_key=settings.gemini_api_key)
+
+def _get_model() -> "genai.GenerativeModel":
+    """The meal planning model with the static instructions already attached."""
+    global _model, _model_key, _model_expires_at
+    configure_gemini()
+    key = (os.getpid(), settings.gemini_model)
+    with _model_lock:
+        if _model is None or _model_key != key or time.monotonic() >= _model_expires_at:
+            _model, _model_expires_at = _build_model()
+            _model_key = key
+        return _model
 
 
 def parse_json_from_response(text: str) -> dict:
     """Clean and parse JSON from LLM response."""
-    match = re.search(r'```json\s*(\{.*?\})\s*```', text, re.DOTALL)
-    if match:
-        json_str = match.group(1)
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+    # Markdown fences or commentary around the object
+    parser = MealPlanStreamParser()
+    parser.feed(text)
+    return parser.close()
+
+
+# Static part of the meal generation prompt. It is identical for every
+# request, so it is sent as the model's system instruction (or stored once
+# in a Gemini context cache) instead of being rebuilt into every prompt.
+MEAL_PLAN_SYSTEM_INSTRUCTION = """\
+You are a helpful meal planning assistant for a user in Lithuania who shops at Barbora.lt.
+
+CRITICAL INSTRUCTIONS:
+- Understand the user's needs naturally (e.g., "this week" = 7 meals, "today" = 1 meal, "3 dinners" = 3 meals)
+- If unclear, provide 3 meals as a reasonable default
+- ALL text MUST be in Lithuanian language
+- Consider dietary preferences, budget constraints, and number of people if mentioned
+
+INGREDIENT FORMATTING RULES (EXTREMELY IMPORTANT):
+- ALL ingredient names MUST be in Lithuanian (e.g., "pienas" not "milk", "vištienos krūtinėlė" not "chicken breast")
+- Use SIMPLE, COMMON Lithuanian product names that are searchable on Barbora.lt
+- Format: "[ingredient name] [quantity][unit]" (e.g., "pienas 1l", "morkos 500g", "kiaušiniai 6vnt")
+- Use standard units: g (gramai), kg (kilogramai), l (litrai), ml (mililitrai), vnt (vienetai)
+- Use lowercase for ingredient names (except proper nouns and brands)
+- NO adjectives or descriptions - just the core ingredient name (e.g., "varškė 200g" not "liesa varškė 200g")
+- NO brand names in ingredient list (Barbora will find any brand)
+- For dairy with fat %, use generic terms: "varškė 200g" not "varškė 9% 200g"
+
+QUANTITY PRECISION:
+- Use grams (g) for items under 1kg: "morkos 500g" not "morkos 0.5kg"
+- Use kg for items 1kg and above: "bulvės 2kg" not "bulvės 2000g"
+- Use liters (l) for liquids 1L and above: "pienas 1l" not "pienas 1000ml"
+- Use ml for liquids under 1L: "aliejus 50ml" not "aliejus 0.05l"
+- Round to practical amounts: "500g" not "487g"
+
+SKIP QUANTITIES FOR THESE ITEMS (sold in standard packages):
+- Spices/seasonings: "druska", "pipirai", "česnakų milteliai", "kmynai", "cinamonas", "bazilikas", "oregano"
+- Condiments: "kečupas", "majonezes", "garstyčios", "actas"
+- Baking: "kepimo milteliai", "mielės", "vanilinis cukrus", "cukraus pudra"
+- Small packaged items: "želatina", "soda", "citrinų rūgštis"
+- Format: just the name without quantity (e.g., "druska" not "druska 5g")
+
+PLURAL/SINGULAR RULES:
+- Use plural form for countable items: "morkos" not "morka", "svogūnai" not "svogūnas"
+- Use singular for uncountable: "pienas", "mėsa", "druska"
+- Exception: meat cuts use genitive: "vištienos krūtinėlė", "jautienos nugarinė"
+
+COMMON BARBORA.LT PRODUCT NAMES (use these exact terms):
+- Dairy: "pienas", "grietinė", "jogurtas", "sūris", "sviestas", "varškė", "kefyras", "grietinėlė" (WITH quantities)
+- Meat: "vištienos krūtinėlė", "vištienos šlaunelės", "kiaulienos nugarinė", "jautienos maltiniai", "lašiniai", "dešrelės" (WITH quantities)
+- Fish/Seafood: "lašišos filė", "tunas savo sultyse", "silkė", "krevetės" (WITH quantities for fresh, NO quantity for canned)
+- Vegetables (fresh): "morkos", "svogūnai", "bulvės", "pomidorai", "agurkai", "paprikos", "brokoliai", "kopūstai" (WITH quantities)
+- Vegetables (frozen): "šaldyti brokoliai", "šaldyti žirneliai", "šaldyta daržovių mišinys" (WITH quantities)
+- Vegetables (canned): "kukurūzai konservuoti", "žirneliai konservuoti", "pupelės konservuoti" (WITH quantities like "200g" or "1vnt" for can)
+- Fruits: "obuoliai", "bananai", "apelsinai", "uogos" (WITH quantities)
+- Grains/Pasta: "ryžiai", "makaronai", "grikiai", "avižiniai dribsniai", "duona", "miltai" (WITH quantities)
+- Eggs: "kiaušiniai" (WITH quantities in vnt, e.g., "kiaušiniai 6vnt")
+- Spices/Herbs: "druska", "pipirai", "česnakų milteliai", "kmynai", "cinamonas", "bazilikas", "petražolės", "krapai" (NO quantities)
+- Condiments: "kečupas", "majonezes", "garstyčios", "actas", "sojos padažas" (NO quantities)
+- Oils: "aliejus", "alyvuogių aliejus", "saulėgrąžų aliejus" (WITH quantities like "50ml" or "100ml")
+- Baking: "kepimo milteliai", "mielės", "vanilinis cukrus", "cukrus", "cukraus pudra" (NO quantities for small packets, WITH quantities for sugar)
+
+Examples of GOOD formatting:
+  ✓ "vištienos krūtinėlė 500g" (meat, genitive, grams)
+  ✓ "lašišos filė 400g" (fish, genitive, grams)
+  ✓ "pienas 1l" (liquid, singular, liters)
+  ✓ "grietinė 200ml" (dairy, small amount)
+  ✓ "varškė 200g" (dairy, no fat % needed)
+  ✓ "morkos 3vnt" (countable, plural, pieces)
+  ✓ "svogūnai 2vnt" (countable, plural)
+  ✓ "kiaušiniai 6vnt" (eggs, plural, pieces)
+  ✓ "šaldyti brokoliai 500g" (frozen veg, with quantity)
+  ✓ "kukurūzai konservuoti 200g" (canned, with quantity)
+  ✓ "tunas savo sultyse" (canned fish, NO quantity - sold in standard cans)
+  ✓ "aliejus 50ml" (liquid, small amount)
+  ✓ "druska" (spice, NO quantity)
+  ✓ "pipirai" (spice, NO quantity)
+  ✓ "majonezes" (condiment, NO quantity)
+  ✓ "ryžiai 500g" (grain, practical amount)
+  ✓ "makaronai 400g" (pasta, standard package size)
+
+Examples of BAD formatting:
+  ✗ "chicken breast 500g" (English - must be Lithuanian)
+  ✗ "Vištienos krūtinėlė, šviežia, 500 gramų" (too descriptive)
+  ✗ "liesa vištienos krūtinėlė 500g" (unnecessary adjective "liesa")
+  ✗ "Žemaitijos varškė 200g" (brand name - just use "varškė 200g")
+  ✗ "varškė 9% 200g" (no fat % needed - just "varškė 200g")
+  ✗ "500g vištienos" (quantity before name)
+  ✗ "morka 1vnt" (wrong singular form - use "morkos")
+  ✗ "pienas 0.5l" (use 500ml instead)
+  ✗ "bulvės 2000g" (use 2kg instead)
+  ✗ "druska 5g" (spices should have NO quantity)
+  ✗ "pipirai 10g" (spices should have NO quantity)
+  ✗ "kečupas 200ml" (condiments should have NO quantity)
+  ✗ "tunas 200g" (canned fish should have NO quantity)
+
+For each meal, provide:
+1. "title" - Meal name in Lithuanian
+2. "description" - Short description in Lithuanian (1-2 sentences)
+3. "recipe" - Step-by-step cooking instructions in Lithuanian (array of strings)
+4. "ingredients" - List of ingredients with quantities in Lithuanian, following the format above
+5. "key_protein" - Main protein source in Lithuanian (simple name only)
+
+Also provide "shopping_list" - All unique ingredients needed across all meals, IN LITHUANIAN, following the same format rules.
+
+SHOPPING LIST AGGREGATION RULES:
+- Combine duplicate ingredients by SUMMING quantities (e.g., "pienas 500ml" + "pienas 300ml" = "pienas 800ml")
+- Keep items without quantities as single entries (e.g., "druska" appears once even if used in 3 meals)
+- Round aggregated quantities to practical amounts (e.g., "pienas 850ml" → "pienas 1l")
+- Use appropriate units after aggregation (e.g., "morkos 1200g" → "morkos 1.2kg" or round to "morkos 1.5kg")
+
+Return ONLY valid JSON in this exact format:
+{
+    "meal_plan": [
+        {
+            "title": "Vištienos sriuba su daržovėmis",
+            "description": "Šilta ir maistinga sriuba su šviežiomis daržovėmis",
+            "recipe": ["Supjaustykite daržoves kubeliais", "Pakepinkite svogūnus", "Įdėkite vištienos ir virinkite 30 min"],
+            "ingredients": ["vištienos krūtinėlė 500g", "morkos 2vnt", "svogūnai 1vnt", "bulvės 3vnt", "druska", "pipirai"],
+            "key_protein": "vištienos krūtinėlė"
+        }
+    ],
+    "shopping_list": ["vištienos krūtinėlė 500g", "morkos 2vnt", "svogūnai 1vnt", "bulvės 3vnt", "druska", "pipirai"]
+}
+"""
+
+
+def build_meal_plan_prompt(preferences: str, days: Optional[int] = None) -> str:
+    """Build the per-request part of the prompt (the rules are in the system instruction)."""
+    # Let AI decide meal count if not specified
+    if days:
+        day_instruction = f"Generate exactly {days} meals."
     else:
-        json_str = text
-    return json.loads(json_str)
+        day_instruction = "Understand how many meals the user needs from their request."
+    return f'User request: "{preferences}"\n\n{day_instruction}'
+
+
+def build_meal_outline_prompt(preferences: str, days: Optional[int] = None) -> str:
+    """Prompt for the meal outline: titles and proteins only."""
+    return (
+        f"{build_meal_plan_prompt(preferences, days)}\n\n"
+        "For now only plan the meals: return "
+        '{"meals": [{"title": ..., "key_protein": ...}]} '
+        "without descriptions, recipes, ingredients or a shopping list."
+    )
+
+
+def build_meal_prompt(preferences: str, outline: List[Dict[str, Any]], index: int) -> str:
+    """Prompt for writing one meal of an outline in full."""
+    meal = outline[index]
+    protein = f" (main protein: {meal['key_protein']})" if meal.get("key_protein") else ""
+    others = ", ".join(f'"{other["title"]}"' for i, other in enumerate(outline) if i != index)
+    prompt = f'User request: "{preferences}"\n\nWrite the meal "{meal["title"]}"{protein} in full.'
+    if others:
+        prompt += f" The plan's other meals are {others}; don't repeat their ingredients needlessly."
+    return (
+        f"{prompt}\nReturn only this meal as one JSON object with title, description, "
+        "recipe, ingredients and key_protein, without a shopping list."
+    )
+
+
+def _generation_config(
+    response_schema: Optional[Dict[str, Any]] = None,
+) -> "genai.types.GenerationConfig":
+    if not settings.gemini_structured_output:
+        return genai.types.GenerationConfig(temperature=settings.temperature)
+    return genai.types.GenerationConfig(
+        temperature=settings.temperature,
+        response_mime_type="application/json",
+        response_schema=response_schema or meal_plan_response_schema(),
+    )
 
 
 def generate_meal_plan_tool(preferences: str, days: int = None) -> dict:
@@ -27,145 +277,154 @@ def generate_meal_plan_tool(preferences: str, days: int = None) -> dict:
         
     Returns:
         Dictionary containing meal plan and shopping list
+
+    Raises:
+        ValueError: If the response held no usable meals
     """
-    config = {
-        "temperature": settings.temperature,
-    }
-    
-    # Let AI decide meal count if not specified
-    if days:
-        day_instruction = f"Generate exactly {days} meals."
-    else:
-        day_instruction = "Understand how many meals the user needs from their request."
-    
-    prompt = f"""
-    You are a helpful meal planning assistant for a user in Lithuania who shops at Barbora.lt.
+    prompt = build_meal_plan_prompt(preferences, days)
     
-    User request: "{preferences}"
-    
-    {day_instruction}
+    model = _get_model()
+    with LLM_SECONDS.time():
+        response = model.generate_content(
+            prompt,
+            generation_config=_generation_config()
+        )
+    token_counter.record(response.usage_metadata)
+    return parse_meal_plan(response.text)
 
-    CRITICAL INSTRUCTIONS:
-    - Understand the user's needs naturally (e.g., "this week" = 7 meals, "today" = 1 meal, "3 dinners" = 3 meals)
-    - If unclear, provide 3 meals as a reasonable default
-    - ALL text MUST be in Lithuanian language
-    - Consider dietary preferences, budget constraints, and number of people if mentioned
-    
-    INGREDIENT FORMATTING RULES (EXTREMELY IMPORTANT):
-    - ALL ingredient names MUST be in Lithuanian (e.g., "pienas" not "milk", "vištienos krūtinėlė" not "chicken breast")
-    - Use SIMPLE, COMMON Lithuanian product names that are searchable on Barbora.lt
-    - Format: "[ingredient name] [quantity][unit]" (e.g., "pienas 1l", "morkos 500g", "kiaušiniai 6vnt")
-    - Use standard units: g (gramai), kg (kilogramai), l (litrai), ml (mililitrai), vnt (vienetai)
-    - Use lowercase for ingredient names (except proper nouns and brands)
-    - NO adjectives or descriptions - just the core ingredient name (e.g., "varškė 200g" not "liesa varškė 200g")
-    - NO brand names in ingredient list (Barbora will find any brand)
-    - For dairy with fat %, use generic terms: "varškė 200g" not "varškė 9% 200g"
-    
-    QUANTITY PRECISION:
-    - Use grams (g) for items under 1kg: "morkos 500g" not "morkos 0.5kg"
-    - Use kg for items 1kg and above: "bulvės 2kg" not "bulvės 2000g"
-    - Use liters (l) for liquids 1L and above: "pienas 1l" not "pienas 1000ml"
-    - Use ml for liquids under 1L: "aliejus 50ml" not "aliejus 0.05l"
-    - Round to practical amounts: "500g" not "487g"
-    
-    SKIP QUANTITIES FOR THESE ITEMS (sold in standard packages):
-    - Spices/seasonings: "druska", "pipirai", "česnakų milteliai", "kmynai", "cinamonas", "bazilikas", "oregano"
-    - Condiments: "kečupas", "majonezes", "garstyčios", "actas"
-    - Baking: "kepimo milteliai", "mielės", "vanilinis cukrus", "cukraus pudra"
-    - Small packaged items: "želatina", "soda", "citrinų rūgštis"
-    - Format: just the name without quantity (e.g., "druska" not "druska 5g")
-    
-    PLURAL/SINGULAR RULES:
-    - Use plural form for countable items: "morkos" not "morka", "svogūnai" not "svogūnas"
-    - Use singular for uncountable: "pienas", "mėsa", "druska"
-    - Exception: meat cuts use genitive: "vištienos krūtinėlė", "jautienos nugarinė"
-    
-    COMMON BARBORA.LT PRODUCT NAMES (use these exact terms):
-    - Dairy: "pienas", "grietinė", "jogurtas", "sūris", "sviestas", "varškė", "kefyras", "grietinėlė" (WITH quantities)
-    - Meat: "vištienos krūtinėlė", "vištienos šlaunelės", "kiaulienos nugarinė", "jautienos maltiniai", "lašiniai", "dešrelės" (WITH quantities)
-    - Fish/Seafood: "lašišos filė", "tunas savo sultyse", "silkė", "krevetės" (WITH quantities for fresh, NO quantity for canned)
-    - Vegetables (fresh): "morkos", "svogūnai", "bulvės", "pomidorai", "agurkai", "paprikos", "brokoliai", "kopūstai" (WITH quantities)
-    - Vegetables (frozen): "šaldyti brokoliai", "šaldyti žirneliai", "šaldyta daržovių mišinys" (WITH quantities)
-    - Vegetables (canned): "kukurūzai konservuoti", "žirneliai konservuoti", "pupelės konservuoti" (WITH quantities like "200g" or "1vnt" for can)
-    - Fruits: "obuoliai", "bananai", "apelsinai", "uogos" (WITH quantities)
-    - Grains/Pasta: "ryžiai", "makaronai", "grikiai", "avižiniai dribsniai", "duona", "miltai" (WITH quantities)
-    - Eggs: "kiaušiniai" (WITH quantities in vnt, e.g., "kiaušiniai 6vnt")
-    - Spices/Herbs: "druska", "pipirai", "česnakų milteliai", "kmynai", "cinamonas", "bazilikas", "petražolės", "krapai" (NO quantities)
-    - Condiments: "kečupas", "majonezes", "garstyčios", "actas", "sojos padažas" (NO quantities)
-    - Oils: "aliejus", "alyvuogių aliejus", "saulėgrąžų aliejus" (WITH quantities like "50ml" or "100ml")
-    - Baking: "kepimo milteliai", "mielės", "vanilinis cukrus", "cukrus", "cukraus pudra" (NO quantities for small packets, WITH quantities for sugar)
-    
-    Examples of GOOD formatting:
-      ✓ "vištienos krūtinėlė 500g" (meat, genitive, grams)
-      ✓ "lašišos filė 400g" (fish, genitive, grams)
-      ✓ "pienas 1l" (liquid, singular, liters)
-      ✓ "grietinė 200ml" (dairy, small amount)
-      ✓ "varškė 200g" (dairy, no fat % needed)
-      ✓ "morkos 3vnt" (countable, plural, pieces)
-      ✓ "svogūnai 2vnt" (countable, plural)
-      ✓ "kiaušiniai 6vnt" (eggs, plural, pieces)
-      ✓ "šaldyti brokoliai 500g" (frozen veg, with quantity)
-      ✓ "kukurūzai konservuoti 200g" (canned, with quantity)
-      ✓ "tunas savo sultyse" (canned fish, NO quantity - sold in standard cans)
-      ✓ "aliejus 50ml" (liquid, small amount)
-      ✓ "druska" (spice, NO quantity)
-      ✓ "pipirai" (spice, NO quantity)
-      ✓ "majonezes" (condiment, NO quantity)
-      ✓ "ryžiai 500g" (grain, practical amount)
-      ✓ "makaronai 400g" (pasta, standard package size)
-    
-    Examples of BAD formatting:
-      ✗ "chicken breast 500g" (English - must be Lithuanian)
-      ✗ "Vištienos krūtinėlė, šviežia, 500 gramų" (too descriptive)
-      ✗ "liesa vištienos krūtinėlė 500g" (unnecessary adjective "liesa")
-      ✗ "Žemaitijos varškė 200g" (brand name - just use "varškė 200g")
-      ✗ "varškė 9% 200g" (no fat % needed - just "varškė 200g")
-      ✗ "500g vištienos" (quantity before name)
-      ✗ "morka 1vnt" (wrong singular form - use "morkos")
-      ✗ "pienas 0.5l" (use 500ml instead)
-      ✗ "bulvės 2000g" (use 2kg instead)
-      ✗ "druska 5g" (spices should have NO quantity)
-      ✗ "pipirai 10g" (spices should have NO quantity)
-      ✗ "kečupas 200ml" (condiments should have NO quantity)
-      ✗ "tunas 200g" (canned fish should have NO quantity)
+
+def generate_meal_outline(preferences: str, days: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Plan the meals (title and main protein) without writing them.
+
+    A short response, so much cheaper and faster than a full plan.
+
+    Returns:
+        One {"title", "key_protein"} dict per meal
+
+    Raises:
+        ValueError: If the response held no meal titles
+    """
+    with LLM_SECONDS.time():
+        response = _get_model().generate_content(
+            build_meal_outline_prompt(preferences, days),
+            generation_config=_generation_config(meal_outline_response_schema()),
+        )
+    token_counter.record(response.usage_metadata, "meal_outline")
+    outline = parse_meal_outline(response.text)
+    return outline[:days] if days else outline
+
+
+def generate_meal(
+    preferences: str, outline: List[Dict[str, Any]], index: int
+) -> Optional[Dict[str, Any]]:
+    """
+    Write one meal of an outline in full.
+
+    Returns:
+        The meal, or None if the response couldn't be repaired into one
+    """
+    with LLM_SECONDS.time():
+        response = _get_model().generate_content(
+            build_meal_prompt(preferences, outline, index),
+            generation_config=_generation_config(meal_response_schema()),
+        )
+    token_counter.record(response.usage_metadata, "meal")
+    meal = parse_meal(response.text)
+    if meal is None:
+        logger.warning(f"Dropped unusable meal {outline[index]['title']!r}")
+    return meal
+
+
+async def generate_meal_plan_parallel(
+    preferences: str,
+    days: Optional[int] = None,
+    run: Optional[Callable[..., Awaitable[Any]]] = None,
+    concurrency: int = 4,
+    on_meal: Optional[Callable[[int, Optional[Dict[str, Any]]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Generate a meal plan one meal per LLM call, concurrently.
+
+    A single call writes every meal and the shopping list in one long
+    sequential generation, so its latency grows with the number of meals.
+    Here a short first call plans the meals (titles and proteins), then
+    up to ``concurrency`` calls write the meals in parallel and the
+    shopping list is aggregated from their ingredients in Python. A week
+    takes about as long as the outline plus one meal.
+
+    Args:
+        preferences: Natural language user query
+        days: Optional number of meals (if None, AI decides from query)
+        run: Runs a blocking call, e.g. ``llm_executor.run`` (defaults to
+            ``asyncio.to_thread``)
+        concurrency: Most meal calls in flight at once
+        on_meal: Called on the event loop with (outline index, meal or None)
+            as each meal call finishes
+
+    Returns:
+        Dictionary containing meal plan and shopping list
+
+    Raises:
+        ValueError: If no meal could be generated
+    """
+    run = run or asyncio.to_thread
+    outline = await run(generate_meal_outline, preferences, days)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def write(index: int) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            meal = await run(generate_meal, preferences, outline, index)
+        if on_meal is not None:
+            on_meal(index, meal)
+        return meal
+
+    written = await asyncio.gather(*(write(index) for index in range(len(outline))))
+    meals = [meal for meal in written if meal is not None]
+    if not meals:
+        raise ValueError("No valid meals in LLM response")
+    return {
+        "meal_plan": meals,
+        "shopping_list": aggregate_shopping_list(
+            ingredient for meal in meals for ingredient in meal["ingredients"]
+        ),
+    }
+
+
+def stream_meal_plan_text(preferences: str, days: int = None) -> Iterator[str]:
+    """
+    Stream the raw meal plan response text from Gemini.
     
-    For each meal, provide:
-    1. "title" - Meal name in Lithuanian
-    2. "description" - Short description in Lithuanian (1-2 sentences)
-    3. "recipe" - Step-by-step cooking instructions in Lithuanian (array of strings)
-    4. "ingredients" - List of ingredients with quantities in Lithuanian, following the format above
-    5. "key_protein" - Main protein source in Lithuanian (simple name only)
-
-    Also provide "shopping_list" - All unique ingredients needed across all meals, IN LITHUANIAN, following the same format rules.
+    Blocking generator; feed the chunks to MealPlanStreamParser to get
+    meals as soon as they are complete.
     
-    SHOPPING LIST AGGREGATION RULES:
-    - Combine duplicate ingredients by SUMMING quantities (e.g., "pienas 500ml" + "pienas 300ml" = "pienas 800ml")
-    - Keep items without quantities as single entries (e.g., "druska" appears once even if used in 3 meals)
-    - Round aggregated quantities to practical amounts (e.g., "pienas 850ml" → "pienas 1l")
-    - Use appropriate units after aggregation (e.g., "morkos 1200g" → "morkos 1.2kg" or round to "morkos 1.5kg")
-
-    Return ONLY valid JSON in this exact format:
-    {{
-        "meal_plan": [
-            {{
-                "title": "Vištienos sriuba su daržovėmis",
-                "description": "Šilta ir maistinga sriuba su šviežiomis daržovėmis",
-                "recipe": ["Supjaustykite daržoves kubeliais", "Pakepinkite svogūnus", "Įdėkite vištienos ir virinkite 30 min"],
-                "ingredients": ["vištienos krūtinėlė 500g", "morkos 2vnt", "svogūnai 1vnt", "bulvės 3vnt", "druska", "pipirai"],
-                "key_protein": "vištienos krūtinėlė"
-            }}
-        ],
-        "shopping_list": ["vištienos krūtinėlė 500g", "morkos 2vnt", "svogūnai 1vnt", "bulvės 3vnt", "druska", "pipirai"]
-    }}
+    Args:
+        preferences: Natural language user query
+        days: Optional specific number of days (if None, AI decides from query)
+        
+    Yields:
+        Text chunks in generation order
     """
+    prompt = build_meal_plan_prompt(preferences, days)
     
-    model = genai.GenerativeModel(settings.gemini_model)
-    response = model.generate_content(
-        prompt,
-        generation_config=genai.types.GenerationConfig(
-            temperature=config["temperature"],
+    model = _get_model()
+    # From the request to the last chunk, like the non-streamed call
+    with LLM_SECONDS.time():
+        response = model.generate_content(
+            prompt,
+            generation_config=_generation_config(),
+            stream=True
         )
-    )
-    result = parse_json_from_response(response.text)
-    
-    return result
+        for chunk in response:
+            text = _chunk_text(chunk)
+            if text:
+                yield text
+    token_counter.record(getattr(response, "usage_metadata", None), "meal_plan_stream")
+
+
+def _chunk_text(chunk: Any) -> str:
+    """Text of a streamed chunk ("" for chunks without parts, e.g. safety or finish-only)."""
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
@@ -0,0 +1,239 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Seconds; LLM calls take seconds, price analysis well under a millisecond
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class CounterChild:
+    """One labelled series of a counter."""
+
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class HistogramChild:
+    """One labelled series of a histogram."""
+
+    __slots__ = ("_lock", "_bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        bucket = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of a block, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Metric:
+    """
+    A named metric with a fixed set of label names.
+
+    ``labels(...)`` returns the series for those label values, creating it
+    on first use. Hot paths bind their series once at import time and then
+    only touch plain attributes under a lock; nothing is allocated per
+    observation.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._samples(_labels(self.labelnames, values), values, child))
+        return lines
+
+    def _samples(self, labels: str, values: Tuple[str, ...], child) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing count (name it ``*_total``)."""
+
+    kind = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabelled series."""
+        self.labels().inc(amount)
+
+    def _samples(self, labels: str, values: Tuple[str, ...], child: CounterChild) -> List[str]:
+        return [f"{self.name}{labels} {_number(child.value)}"]
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Observe a value on the unlabelled series."""
+        self.labels().observe(value)
+
+    def _samples(self, labels: str, values: Tuple[str, ...], child: HistogramChild) -> List[str]:
+        with child._lock:
+            counts, total, count = list(child.counts), child.sum, child.count
+        lines = []
+        cumulative = 0
+        bounds = [_number(bound) for bound in self.buckets] + ["+Inf"]
+        for bound, bucket_count in zip(bounds, counts):
+            cumulative += bucket_count
+            bucket_labels = _labels(self.labelnames + ("le",), values + (bound,))
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{self.name}_sum{labels} {_number(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Metrics rendered in the Prometheus text exposition format.
+
+    Values are per process: with several uvicorn workers each one reports
+    its own, so scrape the workers individually or aggregate with
+    ``sum by``.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+REQUEST_SECONDS = metrics.histogram(
+    "meal_planner_request_duration_seconds",
+    "End-to-end HTTP request latency, including streamed bodies",
+    ("method", "route", "status"),
+)
+STAGE_SECONDS = metrics.histogram(
+    "meal_planner_stage_duration_seconds",
+    "Time spent in one stage of request handling",
+    ("stage",),
+)
+LLM_TOKENS = metrics.counter("meal_planner_llm_tokens_total", "Gemini tokens", ("kind",))
+ERRORS = metrics.counter(
+    "meal_planner_errors_total", "Errors by where they happened and exception type", ("stage", "type")
+)
+CACHE_REQUESTS = metrics.counter(
+    "meal_planner_cache_requests_total", "Cache lookups by cache and result", ("cache", "result")
+)
+
+# Series bound once for the hot paths
+LLM_SECONDS = STAGE_SECONDS.labels("llm")
+PARSE_SECONDS = STAGE_SECONDS.labels("parse")
+VALIDATE_SECONDS = STAGE_SECONDS.labels("validate")
+PACKAGE_SOLVE_SECONDS = STAGE_SECONDS.labels("package_solve")
+ANALYZE_SECONDS = STAGE_SECONDS.labels("analyze")
+SELECT_SECONDS = STAGE_SECONDS.labels("select")
+PROMPT_TOKENS = LLM_TOKENS.labels("prompt")
+CACHED_PROMPT_TOKENS = LLM_TOKENS.labels("cached_prompt")
+RESPONSE_TOKENS = LLM_TOKENS.labels("response")
+PLAN_CACHE_HITS = CACHE_REQUESTS.labels("plan", "hit")
+PLAN_CACHE_MISSES = CACHE_REQUESTS.labels("plan", "miss")
+LLM_COALESCED = CACHE_REQUESTS.labels("llm_coalescing", "hit")
+LLM_NOT_COALESCED = CACHE_REQUESTS.labels("llm_coalescing", "miss")
+
+
+def record_error(stage: str, error: BaseException) -> None:
+    """Count an error by stage and exception type."""
+    ERRORS.labels(stage, type(error).__name__).inc()
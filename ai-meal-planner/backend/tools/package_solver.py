@@ -0,0 +1,185 @@
+import math
+from functools import lru_cache, reduce
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from tools.ingredient_parser import (
+    needed_in_unit,
+    package_size_from_unit_price,
+    parse_ingredient,
+    parse_package_size,
+)
+
+# Largest DP table; bigger amounts are solved on a coarser grid
+MAX_DP_STEPS = 2000
+
+
+@lru_cache(maxsize=16384)
+def cheapest_packages(
+    needed: float, packages: Tuple[Tuple[float, float], ...]
+) -> Tuple[float, Tuple[int, ...]]:
+    """
+    Cheapest combination of packages covering at least ``needed``.
+
+    Unbounded covering knapsack solved by dynamic programming over the
+    greatest common divisor of the package sizes. When that grid would
+    exceed MAX_DP_STEPS, a coarser grid is used with package sizes rounded
+    down, so the result still covers the needed amount.
+
+    Args:
+        needed: Amount to cover, in the packages' unit
+        packages: (size, price) pairs, sizes in the same unit as needed
+
+    Returns:
+        (total cost, number of each package in input order)
+    """
+    if needed <= 0:
+        return 0.0, tuple(0 for _ in packages)
+
+    if len(packages) == 1:
+        size, price = packages[0]
+        count = math.ceil(needed / size - 1e-9)
+        return count * price, (count,)
+
+    sizes = [max(1, round(size)) for size, _ in packages]
+    step = reduce(math.gcd, sizes)
+    if needed / step > MAX_DP_STEPS:
+        step = math.ceil(needed / MAX_DP_STEPS)
+    target = math.ceil(needed / step - 1e-9)
+    sizes = [max(1, size // step) for size in sizes]
+    prices = [price for _, price in packages]
+
+    # cost[c] = cheapest way to cover at least c steps
+    cost = [0.0] + [math.inf] * target
+    choice = [-1] * (target + 1)
+    for c in range(1, target + 1):
+        best_cost, best_choice = math.inf, -1
+        for i, size in enumerate(sizes):
+            candidate = cost[c - size if c > size else 0] + prices[i]
+            if candidate < best_cost:
+                best_cost, best_choice = candidate, i
+        cost[c], choice[c] = best_cost, best_choice
+
+    counts = [0] * len(packages)
+    c = target
+    while c > 0:
+        i = choice[c]
+        counts[i] += 1
+        c = c - sizes[i] if c > sizes[i] else 0
+    return cost[target], tuple(counts)
+
+
+def _field(row: Any, name: str, default: Any = None) -> Any:
+    if isinstance(row, dict):
+        return row.get(name, default)
+    return getattr(row, name, default)
+
+
+def _package_size(row: Any) -> Optional[Tuple[float, str]]:
+    product_name = _field(row, "product_name")
+    if product_name:
+        size = parse_package_size(product_name)
+        if size is not None:
+            return size
+    return package_size_from_unit_price(
+        _field(row, "price"), _field(row, "unit_price"), _field(row, "unit") or ""
+    )
+
+
+def _solve_line(
+    ingredient: str, candidates: List[Any]
+) -> Tuple[List[Tuple[Any, int, Optional[float]]], float]:
+    """
+    Pick the cheapest way to buy one ingredient at one store.
+
+    Returns:
+        ([(product row, package count, package size or None), ...], total cost)
+    """
+    parsed = parse_ingredient(ingredient)
+
+    best: Optional[Tuple[List[Tuple[Any, int, Optional[float]]], float]] = None
+    if parsed.unit != "none":
+        by_unit: Dict[str, List[Tuple[float, float, Any]]] = {}
+        for row in candidates:
+            size = _package_size(row)
+            if size is not None and size[0] > 0:
+                by_unit.setdefault(size[1], []).append((size[0], _field(row, "price"), row))
+
+        for unit, options in by_unit.items():
+            needed = needed_in_unit(parsed, unit)
+            if needed is None:
+                continue
+            cost, counts = cheapest_packages(needed, tuple((s, p) for s, p, _ in options))
+            if best is None or cost < best[1]:
+                picks = [
+                    (row, count, size)
+                    for (size, _, row), count in zip(options, counts)
+                    if count
+                ]
+                best = (picks, cost)
+
+    if best is None:
+        # No quantity or no comparable package size: one cheapest package
+        row = min(candidates, key=lambda row: _field(row, "price"))
+        best = ([(row, 1, None)], _field(row, "price"))
+    return best
+
+
+def _line_unit_price(picks: List[Tuple[Any, int, Optional[float]]]) -> float:
+    """Unit price of everything bought for a line, weighted by the amount of each package."""
+    if len(picks) == 1:
+        return _field(picks[0][0], "unit_price")
+    amount = sum(count * size for _, count, size in picks)
+    return sum(_field(row, "unit_price") * count * size for row, count, size in picks) / amount
+
+
+def solve_package_quantities(price_data: Sequence[Any]) -> List[Dict]:
+    """
+    Collapse candidate products into one priced line per ingredient and store.
+
+    Each line's ``price`` is the cheapest cost of buying enough packages to
+    cover the quantity in the ingredient string ("pienas 800ml"), and
+    ``quantity`` is the number of packages. Package sizes come from the
+    product name when given, otherwise from price / unit_price.
+
+    The cheapest cover may mix products ("pienas 1.5l" as 1 l + 500 ml):
+    ``packages`` lists each product bought with its own count, total price
+    and url, and the line's ``url`` is only set when it is a single product.
+
+    Args:
+        price_data: Price rows (dicts or ProductPrice models)
+
+    Returns:
+        Price dicts ready for PriceTable.from_rows
+    """
+    groups: Dict[Tuple[str, str], List[Any]] = {}
+    for row in price_data:
+        groups.setdefault((_field(row, "ingredient"), _field(row, "store")), []).append(row)
+
+    lines = []
+    for (ingredient, store), rows in groups.items():
+        available = [row for row in rows if _field(row, "available", True)]
+        if not available:
+            picks, cost = [(rows[0], 1, None)], _field(rows[0], "price")
+        else:
+            picks, cost = _solve_line(ingredient, available)
+        lines.append({
+            "ingredient": ingredient,
+            "store": store,
+            "price": cost,
+            "unit_price": _line_unit_price(picks),
+            "unit": _field(picks[0][0], "unit"),
+            "url": _field(picks[0][0], "url") if len(picks) == 1 else None,
+            "available": bool(available),
+            "quantity": sum(count for _, count, _ in picks),
+            "packages": [
+                {
+                    "product_name": _field(row, "product_name"),
+                    "url": _field(row, "url"),
+                    "quantity": count,
+                    "price": count * _field(row, "price"),
+                    "unit_price": _field(row, "unit_price"),
+                }
+                for row, count, _ in picks
+            ],
+        })
+    return lines
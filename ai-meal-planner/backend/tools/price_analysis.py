@@ -1,4 +1,7 @@
-from typing import Dict, List
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
 
 
 def analyze_prices_tool(price_data: List[Dict]) -> Dict:
@@ -61,7 +64,7 @@ def select_best_store_tool(analysis: Dict, user_preferences: Dict = None) -> Dic
     Select the best store based on price analysis and user preferences.
     
     Args:
-        analysis: Price analysis from analyze_prices_tool
+        analysis: Price analysis from analyze_prices_tool or analyze_prices_columnar
         user_preferences: Optional user preferences (proximity, delivery, etc.)
         
     Returns:
@@ -82,16 +85,7 @@ def select_best_store_tool(analysis: Dict, user_preferences: Dict = None) -> Dic
     reason += f"You save €{total_savings:.2f} compared to {most_expensive['store'].capitalize()}."
     
     # Get items for the recommended store
-    store_data = analysis["stores"][cheapest_store]
-    items = [
-        {
-            "name": item["ingredient"],
-            "quantity": 1,
-            "price": item["price"],
-            "unit_price": item["unit_price"]
-        }
-        for item in store_data["items"]
-    ]
+    items = _store_items(analysis, cheapest_store)
     
     return {
         "recommended_store": cheapest_store,
@@ -101,3 +95,186 @@ def select_best_store_tool(analysis: Dict, user_preferences: Dict = None) -> Dic
         "comparisons": comparisons,
         "items": items
     }
+
+
+class PriceTable:
+    """
+    Struct-of-arrays view of a price report.
+
+    Built once from the price rows so store totals, availability counts and
+    savings can be computed with grouped NumPy reductions instead of
+    per-item dict manipulation.
+    """
+
+    def __init__(
+        self,
+        store_names: List[str],
+        store_idx: np.ndarray,
+        ingredients: List[str],
+        price: np.ndarray,
+        unit_price: np.ndarray,
+        available: np.ndarray,
+        quantity: Optional[np.ndarray] = None,
+        packages: Optional[List[List[Dict]]] = None,
+    ):
+        self.store_names = store_names
+        self.store_idx = store_idx
+        self.ingredients = ingredients
+        self.price = price
+        self.unit_price = unit_price
+        self.available = available
+        # Packages to buy per line (see tools.package_solver)
+        self.quantity = quantity if quantity is not None else np.ones(len(ingredients), np.int64)
+        # Products bought per line, when a line mixes several (see tools.package_solver)
+        self.packages = packages
+
+    def __len__(self) -> int:
+        return len(self.ingredients)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Any]) -> "PriceTable":
+        """
+        Build a table from price dicts or ProductPrice models.
+
+        Stores keep the order of their first appearance, matching
+        analyze_prices_tool.
+        """
+        n = len(rows)
+        quantity = None
+        packages = None
+        if n and isinstance(rows[0], dict):
+            get = itemgetter
+            available_values = (row.get("available", True) for row in rows)
+            if "quantity" in rows[0]:
+                quantity = np.fromiter(map(itemgetter("quantity"), rows), np.int64, n)
+            if "packages" in rows[0]:
+                packages = list(map(itemgetter("packages"), rows))
+        else:
+            get = attrgetter
+            available_values = map(attrgetter("available"), rows)
+
+        # Stores are numbered in order of first appearance
+        store_codes: Dict[str, int] = {}
+        store_idx = np.fromiter(
+            (store_codes.setdefault(store, len(store_codes)) for store in map(get("store"), rows)),
+            np.intp,
+            n,
+        )
+
+        return cls(
+            store_names=list(store_codes),
+            store_idx=store_idx,
+            ingredients=list(map(get("ingredient"), rows)),
+            price=np.fromiter(map(get("price"), rows), np.float64, n),
+            unit_price=np.fromiter(map(get("unit_price"), rows), np.float64, n),
+            available=np.fromiter(available_values, np.bool_, n),
+            quantity=quantity,
+            packages=packages,
+        )
+
+    def items(self, rows: Sequence[int], **fields: Any) -> List[Dict]:
+        """
+        Decision items for table rows: one per line, or one per product
+        when a line is bought as several products.
+
+        Args:
+            rows: Row indexes
+            **fields: Extra keys for every item (e.g. store)
+        """
+        index = np.asarray(rows, dtype=np.intp)
+        columns = zip(
+            index.tolist(),
+            self.quantity[index].tolist(),
+            self.price[index].tolist(),
+            self.unit_price[index].tolist(),
+        )
+        items = []
+        for row, quantity, price, unit_price in columns:
+            packages = self.packages[row] if self.packages is not None else None
+            if packages is not None and len(packages) > 1:
+                items.extend(
+                    {
+                        "name": self.ingredients[row],
+                        **fields,
+                        "quantity": package["quantity"],
+                        "price": package["price"],
+                        "unit_price": package["unit_price"],
+                        "product_name": package["product_name"],
+                        "url": package["url"],
+                    }
+                    for package in packages
+                )
+                continue
+            items.append({
+                "name": self.ingredients[row],
+                **fields,
+                "quantity": quantity,
+                "price": price,
+                "unit_price": unit_price
+            })
+        return items
+
+
+def analyze_prices_columnar(table: PriceTable) -> Dict:
+    """
+    Columnar equivalent of analyze_prices_tool.
+    
+    Args:
+        table: PriceTable built from the price report
+        
+    Returns:
+        Analysis with the same keys as analyze_prices_tool; per-store item
+        lists are replaced by the table itself (see select_best_store_tool)
+    """
+    if len(table) == 0:
+        raise ValueError("No price data to analyze")
+
+    n_stores = len(table.store_names)
+    totals = np.bincount(
+        table.store_idx, weights=np.where(table.available, table.price, 0.0), minlength=n_stores
+    )
+    counts = np.bincount(table.store_idx, minlength=n_stores)
+    available = np.bincount(table.store_idx, weights=table.available, minlength=n_stores)
+
+    cheapest = int(np.argmin(totals))  # First minimum, like min() over the dict
+    cheapest_cost = float(totals[cheapest])
+    savings = totals - cheapest_cost
+
+    stores = {}
+    comparisons = []
+    for i, store_name in enumerate(table.store_names):
+        stores[store_name] = {
+            "total_cost": float(totals[i]),
+            "items_available": int(available[i]),
+            "items_missing": int(counts[i] - available[i]),
+        }
+        comparisons.append({
+            "store": store_name,
+            **stores[store_name],
+            "savings": float(savings[i])
+        })
+
+    return {
+        "stores": stores,
+        "cheapest_store": table.store_names[cheapest],
+        "cheapest_cost": cheapest_cost,
+        "comparisons": comparisons,
+        "table": table,
+    }
+
+
+def _store_items(analysis: Dict, store: str) -> List[Dict]:
+    table: Optional[PriceTable] = analysis.get("table")
+    if table is None:
+        return [
+            {
+                "name": item["ingredient"],
+                "quantity": 1,
+                "price": item["price"],
+                "unit_price": item["unit_price"]
+            }
+            for item in analysis["stores"][store]["items"]
+        ]
+
+    rows = np.flatnonzero(table.store_idx == table.store_names.index(store))
+    return table.items(rows.tolist())
@@ -0,0 +1,320 @@
+import heapq
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from tools.ingredient_parser import parse_ingredient
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_QUANTITY = re.compile(r"^\d|^(?:g|kg|l|ml|vnt|proc)$")
+
+# Noun and adjective endings after diacritics folding (ų -> u, ė -> e, ...),
+# longest first: "morkos", "morka", "morkų" -> "mork"; "pieno" -> "pien"
+_ENDINGS = sorted(
+    [
+        "iuose", "uose", "osios", "ieji", "ioms", "iems", "omis", "emis", "iais",
+        "ams", "oms", "ems", "ims", "ais", "iai", "ios", "ies", "ius", "ias",
+        "iu", "io", "as", "is", "ys", "us", "ai", "os", "es", "ei", "ui", "au",
+        "a", "e", "o", "u", "i", "y",
+    ],
+    key=len,
+    reverse=True,
+)
+_MIN_STEM = 3
+
+# Ingredient words whose similar catalog words are remembered between new words
+_SIMILAR_CACHE_SIZE = 4096
+
+STOP_WORDS = frozenset(["su", "be", "ir", "arba", "bei", "per", "uz", "po", "prie", "nuo", "is", "i", "ar"])
+
+
+def fold(text: str) -> str:
+    """Lowercase, strip diacritics and punctuation: "Vištienos krūtinėlė, 500 g" -> "vistienos krutinele 500 g"."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_WORD.sub(" ", stripped).strip()
+
+
+def stem(word: str) -> str:
+    """Drop a Lithuanian inflection ending, keeping at least three letters."""
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+            return word[: -len(ending)]
+    return word
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(text: str) -> Tuple[str, ...]:
+    """Stems of the meaningful words in a product or ingredient name."""
+    return tuple(
+        stem(word) for word in fold(text).split()
+        if word not in STOP_WORDS and not _QUANTITY.match(word) and len(word) > 1
+    )
+
+
+def trigrams(token: str) -> List[str]:
+    """Character trigrams of a token padded with word boundaries."""
+    padded = f"^{token}$"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def max_edits(token: str) -> int:
+    """Typos tolerated for a word of this length."""
+    return 0 if len(token) <= 3 else 1 if len(token) <= 6 else 2
+
+
+def bounded_levenshtein(a: str, b: str, limit: int) -> int:
+    """
+    Edit distance between two strings, or ``limit + 1`` once it exceeds ``limit``.
+
+    Stops as soon as a whole DP row is over the limit, so clearly different
+    words cost a couple of rows instead of the full len(a) * len(b) matrix.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class ProductMatch(NamedTuple):
+    """A catalog product matched to an ingredient."""
+    product: Dict[str, Any]
+    store: str
+    score: float  # 0-1, higher is better
+
+
+class ProductCatalog:
+    """
+    Scraped store products indexed for fuzzy ingredient matching.
+
+    Product names are folded, stemmed and split into words. Each distinct
+    word is indexed by its character trigrams, and each word points to the
+    products containing it, per store. A lookup finds the catalog words
+    within a small edit distance of each ingredient word (trigram counting
+    narrows the candidates, bounded Levenshtein verifies them) and scores
+    the products containing them. The per-word results are cached, so a
+    lookup costs a few dictionary operations instead of an edit-distance
+    matrix against every product name.
+
+    Score: 0.8 x how much of the ingredient the product covers plus 0.2 x
+    how much of the product name is the ingredient, so "Pienas 2,5% 1L"
+    beats "Pieno šokoladas" for "pienas 1l".
+
+    Once the catalog holds ``max_products`` products, the next ``add``
+    first rebuilds it from the most recently added or refreshed half, so a
+    long-running collector doesn't keep every product it ever scraped.
+    """
+
+    def __init__(self, min_score: float = 0.6, max_products: int = 50_000):
+        self.min_score = min_score
+        self.max_products = max_products
+        self.evicted = 0
+        self._clear()
+
+    def _clear(self) -> None:
+        self._products: List[Dict[str, Any]] = []
+        self._product_sizes: List[int] = []  # Words per product name
+        self._product_keys: Dict[Tuple[str, str], int] = {}
+        self._token_ids: Dict[str, int] = {}
+        self._tokens: List[str] = []
+        self._grams: Dict[str, List[int]] = {}
+        self._postings: List[Dict[str, List[int]]] = []  # token id -> store -> product ids
+        self._similar_cache: Dict[str, List[Tuple[int, float]]] = {}
+        self._last_seen: List[int] = []  # Per product: add() sequence number
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def add(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add or refresh products from scraped price rows.
+
+        Rows are keyed by store and product name; a row for a known product
+        replaces the stored one (newer price). Rows without a product name
+        are skipped.
+
+        Returns:
+            Number of new products
+        """
+        if len(self._products) >= self.max_products:
+            self._evict()
+        added = 0
+        for row in rows:
+            added += self._add(row)
+        return added
+
+    def _add(self, row: Dict[str, Any]) -> bool:
+        name = row.get("product_name")
+        if not name:
+            return False
+        self._sequence += 1
+        store = row["store"]
+        key = (store, fold(name))
+        product_id = self._product_keys.get(key)
+        if product_id is not None:
+            self._products[product_id] = row
+            self._last_seen[product_id] = self._sequence
+            return False
+
+        product_id = len(self._products)
+        tokens = normalize_name(name)
+        self._product_keys[key] = product_id
+        self._products.append(row)
+        self._product_sizes.append(max(1, len(tokens)))
+        self._last_seen.append(self._sequence)
+        for token in set(tokens):
+            self._postings[self._token_id(token)].setdefault(store, []).append(product_id)
+        return True
+
+    def _evict(self) -> None:
+        """Rebuild the index from the most recently seen half of the products."""
+        keep = sorted(range(len(self._products)), key=self._last_seen.__getitem__)
+        keep = keep[len(keep) - self.max_products // 2:]
+        rows = [self._products[product_id] for product_id in keep]
+        self.evicted += len(self._products) - len(rows)
+        self._clear()
+        for row in rows:
+            self._add(row)
+
+    def _token_id(self, token: str) -> int:
+        token_id = self._token_ids.get(token)
+        if token_id is None:
+            token_id = self._token_ids[token] = len(self._tokens)
+            self._tokens.append(token)
+            self._postings.append({})
+            for gram in set(trigrams(token)):
+                self._grams.setdefault(gram, []).append(token_id)
+            self._similar_cache.clear()  # A new word may match earlier lookups
+        return token_id
+
+    def _similar(self, token: str) -> List[Tuple[int, float]]:
+        """Catalog words within edit distance of a word, with their similarity."""
+        cached = self._similar_cache.get(token)
+        if cached is not None:
+            return cached
+
+        limit = max_edits(token)
+        grams = trigrams(token)
+        # Each edit changes at most three trigrams
+        needed = max(1, len(grams) - 3 * limit)
+        shared: Dict[int, int] = {}
+        for gram in set(grams):
+            for token_id in self._grams.get(gram, ()):
+                shared[token_id] = shared.get(token_id, 0) + 1
+
+        similar = []
+        for token_id, count in shared.items():
+            if count < needed:
+                continue
+            candidate = self._tokens[token_id]
+            distance = bounded_levenshtein(token, candidate, limit)
+            if distance <= limit:
+                similar.append((token_id, 1.0 - distance / max(len(token), len(candidate))))
+        if len(self._similar_cache) >= _SIMILAR_CACHE_SIZE:
+            self._similar_cache.clear()
+        self._similar_cache[token] = similar
+        return similar
+
+    def match(
+        self,
+        ingredient: str,
+        store: Optional[str] = None,
+        limit: int = 3,
+        min_score: Optional[float] = None,
+        within: Optional[float] = None,
+        among: Optional[Iterable[Dict[str, Any]]] = None,
+    ) -> List[ProductMatch]:
+        """
+        Best catalog products for an ingredient.
+
+        Args:
+            ingredient: Shopping list item; its quantity is ignored ("pienas 1l")
+            store: Only match this store's products
+            limit: Most matches to return
+            min_score: Override the catalog's minimum score
+            within: Only return matches scoring at most this much below the best
+            among: Only match these products (rows as given to ``add``)
+
+        Returns:
+            Matches, best first
+        """
+        query = tuple(dict.fromkeys(normalize_name(parse_ingredient(ingredient).name)))
+        if not query:
+            return []
+        threshold = self.min_score if min_score is None else min_score
+
+        totals: Dict[int, float] = {}
+        for word in query:
+            similar = self._similar(word)
+            if len(similar) == 1:
+                # Usual case: one catalog word, no per-product maximum needed
+                best: Dict[int, float] = dict.fromkeys(
+                    self._word_products(similar[0][0], store), similar[0][1]
+                )
+            else:
+                best = {}
+                for token_id, similarity in similar:
+                    for product_id in self._word_products(token_id, store):
+                        if similarity > best.get(product_id, 0.0):
+                            best[product_id] = similarity
+            for product_id, similarity in best.items():
+                totals[product_id] = totals.get(product_id, 0.0) + similarity
+
+        if among is not None:
+            allowed = {
+                self._product_keys.get((row["store"], fold(row["product_name"])))
+                for row in among if row.get("product_name")
+            }
+            totals = {product_id: total for product_id, total in totals.items() if product_id in allowed}
+
+        # Rank plain tuples; only the winners become ProductMatch objects
+        sizes = self._product_sizes
+        coverage_weight, precision_weight = 0.8 / len(query), 0.2
+        scored = (
+            (coverage_weight * total + precision_weight * min(1.0, total / sizes[product_id]), product_id)
+            for product_id, total in totals.items()
+        )
+        top = heapq.nlargest(limit, (item for item in scored if item[0] >= threshold))
+        if within is not None and top:
+            top = [item for item in top if item[0] >= top[0][0] - within]
+        return [
+            ProductMatch(self._products[product_id], self._products[product_id]["store"], round(score, 3))
+            for score, product_id in top
+        ]
+
+    def _word_products(self, token_id: int, store: Optional[str]) -> Iterable[int]:
+        postings = self._postings[token_id]
+        if store is not None:
+            return postings.get(store, ())
+        return [product_id for product_ids in postings.values() for product_id in product_ids]
+
+    def match_shopping_list(
+        self, ingredients: Iterable[str], store: Optional[str] = None, limit: int = 3
+    ) -> Dict[str, List[ProductMatch]]:
+        """Best products for every item of a shopping list."""
+        return {ingredient: self.match(ingredient, store, limit) for ingredient in ingredients}
+
+    def stats(self) -> Dict[str, Any]:
+        """Catalog size for /health."""
+        return {
+            "products": len(self._products),
+            "stores": len({store for store, _ in self._product_keys}),
+            "words": len(self._tokens),
+            "max_products": self.max_products,
+            "evicted": self.evicted,
+        }
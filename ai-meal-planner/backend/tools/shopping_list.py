@@ -0,0 +1,61 @@
+import math
+from typing import Dict, Iterable, List, Tuple
+
+from tools.ingredient_parser import estimate_piece_weight, parse_ingredient
+
+
+def _round_up(amount: float, step: float) -> float:
+    return math.ceil(amount / step - 1e-9) * step
+
+
+def format_quantity(amount: float, unit: str) -> str:
+    """
+    Format an amount in base units the way the meal prompt asks for.
+
+    Rounds up to a practical amount and switches to kg / l from 1000:
+    487 g -> "500g", 1230 g -> "1.3kg", 850 ml -> "850ml", 2.2 vnt -> "3vnt".
+    """
+    if unit == "vnt":
+        return f"{math.ceil(amount - 1e-9)}vnt"
+    large = "kg" if unit == "g" else "l"
+    if amount >= 1000:
+        return f"{_round_up(amount / 1000, 0.1):g}{large}"
+    return f"{_round_up(amount, 50 if amount > 100 else 10):g}{unit}"
+
+
+def aggregate_shopping_list(ingredients: Iterable[str]) -> List[str]:
+    """
+    Combine meal ingredients into a shopping list.
+
+    Quantities of the same ingredient are summed ("pienas 500ml" +
+    "pienas 300ml" = "pienas 800ml"); pieces are converted to grams when
+    the same ingredient is also needed by weight and its average piece
+    weight is known. Items without a quantity ("druska") appear once,
+    unless the same item is also needed with one. Order follows the first
+    mention.
+    """
+    totals: Dict[Tuple[str, str], float] = {}
+    names: Dict[str, str] = {}  # lowercased -> first spelling
+    for text in ingredients:
+        parsed = parse_ingredient(text)
+        key = parsed.name.lower()
+        names.setdefault(key, parsed.name)
+        totals[(key, parsed.unit)] = totals.get((key, parsed.unit), 0.0) + parsed.amount
+
+    for (key, unit), amount in list(totals.items()):
+        if unit != "vnt" or (key, "g") not in totals:
+            continue
+        weight = estimate_piece_weight(key)
+        if weight is not None:
+            totals[(key, "g")] += amount * weight
+            del totals[(key, "vnt")]
+
+    shopping_list = []
+    for (key, unit), amount in totals.items():
+        if unit == "none":
+            if any(other == key and other_unit != "none" for other, other_unit in totals):
+                continue
+            shopping_list.append(names[key])
+        else:
+            shopping_list.append(f"{names[key]} {format_quantity(amount, unit)}")
+    return shopping_list
@@ -0,0 +1,245 @@
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Type, Union
+
+import orjson
+from pydantic import BaseModel, ValidationError
+
+from api.schemas import GeneratedMealPlan, Meal, MealOutline
+from tools.json_stream import MealPlanStreamParser
+from tools.metrics import PARSE_SECONDS, VALIDATE_SECONDS
+from tools.shopping_list import aggregate_shopping_list
+
+logger = logging.getLogger(__name__)
+
+# "morkos 2vnt, svogūnai 1vnt" but not the decimal comma in "1,5kg"
+_ITEM_SEPARATOR = re.compile(r"\s*(?:\n|;|,(?!\d))\s*")
+_STEP_SEPARATOR = re.compile(r"\s*\n\s*")
+_STEP_NUMBER = re.compile(r"^(?:\d+[.)]|[-*•])\s*")
+
+
+def gemini_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Convert a Pydantic model to a Gemini response schema.
+
+    Gemini accepts a subset of OpenAPI: no ``$ref``, ``title`` or
+    ``default``, and optional fields are ``nullable`` rather than
+    ``anyOf`` with null.
+    """
+    schema = model.model_json_schema()
+    return _convert_schema(schema, schema.get("$defs", {}))
+
+
+def _convert_schema(node: Dict[str, Any], defs: Dict[str, Any]) -> Dict[str, Any]:
+    if "$ref" in node:
+        node = defs[node["$ref"].rsplit("/", 1)[-1]]
+    if "anyOf" in node:
+        options = [option for option in node["anyOf"] if option.get("type") != "null"]
+        converted = _convert_schema(options[0], defs)
+        if len(options) < len(node["anyOf"]):
+            converted["nullable"] = True
+        return converted
+
+    converted: Dict[str, Any] = {"type": node["type"]}
+    for key in ("description", "enum"):
+        if key in node:
+            converted[key] = node[key]
+    if node["type"] == "object":
+        converted["properties"] = {
+            name: _convert_schema(child, defs) for name, child in node["properties"].items()
+        }
+        if node.get("required"):
+            converted["required"] = node["required"]
+    elif node["type"] == "array":
+        converted["items"] = _convert_schema(node["items"], defs)
+    return converted
+
+
+@lru_cache(maxsize=1)
+def meal_plan_response_schema() -> Dict[str, Any]:
+    """Response schema for meal plan generation."""
+    return gemini_schema(GeneratedMealPlan)
+
+
+@lru_cache(maxsize=1)
+def meal_response_schema() -> Dict[str, Any]:
+    """Response schema for generating a single meal."""
+    return gemini_schema(Meal)
+
+
+@lru_cache(maxsize=1)
+def meal_outline_response_schema() -> Dict[str, Any]:
+    """Response schema for the meal outline."""
+    return gemini_schema(MealOutline)
+
+
+def _text(value: Any) -> Optional[str]:
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if isinstance(value, list):
+        return _text(" ".join(str(item) for item in value if isinstance(item, (str, int, float))))
+    return None
+
+
+def _text_list(value: Any, separator: "re.Pattern[str]") -> List[str]:
+    if isinstance(value, str):
+        value = separator.split(value)
+    if not isinstance(value, list):
+        return []
+    items = (_text(item) if not isinstance(item, list) else None for item in value)
+    return [item for item in items if item]
+
+
+def repair_meal(raw: Any) -> Optional[Dict[str, Any]]:
+    """
+    Validate one meal, fixing what can be fixed locally.
+
+    Strings where lists belong are split ("morkos 2vnt, svogūnai 1vnt",
+    numbered recipe lines), numbers become strings and a missing
+    description becomes empty. A meal without a title or ingredients
+    can't be repaired.
+
+    Returns:
+        The meal as a dict, or None if it has to be dropped
+    """
+    if not isinstance(raw, dict):
+        return None
+    try:
+        return Meal.model_validate(raw).model_dump()
+    except ValidationError:
+        pass
+
+    title = _text(raw.get("title"))
+    ingredients = _text_list(raw.get("ingredients"), _ITEM_SEPARATOR)
+    if not title or not ingredients:
+        return None
+    recipe = [
+        _STEP_NUMBER.sub("", step) for step in _text_list(raw.get("recipe"), _STEP_SEPARATOR)
+    ]
+    return Meal(
+        title=title,
+        description=_text(raw.get("description")) or "",
+        ingredients=ingredients,
+        recipe=[step for step in recipe if step],
+        key_protein=_text(raw.get("key_protein")),
+    ).model_dump()
+
+
+def repair_meal_plan(document: Any) -> Dict[str, Any]:
+    """
+    Keep the valid and repairable meals of a decoded LLM response.
+
+    Meals that can't be repaired are dropped; a missing or invalid
+    shopping list is aggregated from the remaining meals' ingredients.
+
+    Raises:
+        ValueError: If no meal is usable
+    """
+    if not isinstance(document, dict):
+        raise ValueError("LLM response is not a JSON object")
+    raw_meals = document.get("meal_plan")
+    if not isinstance(raw_meals, list):
+        raw_meals = document.get("meals") if isinstance(document.get("meals"), list) else []
+
+    meals = [meal for meal in map(repair_meal, raw_meals) if meal is not None]
+    if not meals:
+        raise ValueError("No valid meals in LLM response")
+
+    shopping_list = _text_list(document.get("shopping_list"), _ITEM_SEPARATOR)
+    if not shopping_list:
+        shopping_list = aggregate_shopping_list(
+            ingredient for meal in meals for ingredient in meal["ingredients"]
+        )
+    if len(meals) < len(raw_meals):
+        logger.warning(f"Dropped {len(raw_meals) - len(meals)} invalid meal(s) from LLM response")
+    return {"meal_plan": meals, "shopping_list": shopping_list}
+
+
+def _load_document(text: Union[str, bytes]) -> Any:
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+    # Fenced or surrounded by commentary; if cut off, keep the meals that completed
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+    parser = MealPlanStreamParser()
+    meals = parser.feed(text)
+    if parser.done:
+        return parser.close()
+    if meals:
+        logger.warning("LLM response was cut off; keeping the complete meals")
+        return {"meal_plan": meals}
+    raise ValueError("No JSON object in LLM response")
+
+
+def parse_meal_plan(text: Union[str, bytes]) -> Dict[str, Any]:
+    """
+    Parse and validate a meal plan response.
+
+    A well-formed response is validated straight from the raw text in one
+    pass with ``model_validate_json`` (the "validate" stage). Anything else
+    (markdown fences, wrong types, missing fields, a truncated response) is
+    decoded with orjson or the stream parser (the "parse" stage) and goes
+    through ``repair_meal_plan`` instead of failing the whole request.
+
+    Args:
+        text: Raw LLM response text or bytes
+
+    Returns:
+        Dict with "meal_plan" and "shopping_list"
+
+    Raises:
+        ValueError: If no usable meal plan could be recovered
+    """
+    with VALIDATE_SECONDS.time():
+        try:
+            return GeneratedMealPlan.model_validate_json(text).model_dump()
+        except ValidationError:
+            logger.info("LLM response failed validation, repairing")
+    with PARSE_SECONDS.time():
+        document = _load_document(text)
+    with VALIDATE_SECONDS.time():
+        return repair_meal_plan(document)
+
+
+def parse_meal(text: Union[str, bytes]) -> Optional[Dict[str, Any]]:
+    """Parse one generated meal, repairing it if needed (None if unusable)."""
+    with VALIDATE_SECONDS.time():
+        try:
+            return Meal.model_validate_json(text).model_dump()
+        except ValidationError:
+            pass
+    try:
+        with PARSE_SECONDS.time():
+            document = _load_document(text)
+    except ValueError:
+        return None
+    with VALIDATE_SECONDS.time():
+        return repair_meal(document)
+
+
+def parse_meal_outline(text: Union[str, bytes]) -> List[Dict[str, Any]]:
+    """
+    Parse the meal outline (titles and main proteins).
+
+    Raises:
+        ValueError: If the response held no meal titles
+    """
+    try:
+        return [item.model_dump() for item in MealOutline.model_validate_json(text).meals]
+    except ValidationError:
+        pass
+    document = _load_document(text)
+    items = document.get("meals") or document.get("meal_plan") if isinstance(document, dict) else None
+    outline = [
+        {"title": _text(item.get("title")), "key_protein": _text(item.get("key_protein"))}
+        for item in (items if isinstance(items, list) else [])
+        if isinstance(item, dict) and _text(item.get("title"))
+    ]
+    if not outline:
+        raise ValueError("No meals in the LLM outline")
+    return outline
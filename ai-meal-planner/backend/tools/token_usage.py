@@ -0,0 +1,74 @@
+import logging
+import threading
+from typing import Any, Dict
+
+from tools.metrics import CACHED_PROMPT_TOKENS, PROMPT_TOKENS, RESPONSE_TOKENS
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCounter:
+    """
+    Running totals of Gemini token usage.
+
+    Fed from each response's ``usage_metadata``. ``cached_tokens`` are the
+    prompt tokens served from a context cache (billed at the cached rate);
+    they are included in ``prompt_tokens``, as Gemini reports them.
+    Thread-safe: LLM calls run on the executor's worker threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.response_tokens = 0
+
+    def record(self, usage: Any, label: str = "meal_plan") -> Dict[str, int]:
+        """
+        Add one response's usage and log it.
+
+        Args:
+            usage: ``response.usage_metadata`` (None if the model sent none)
+            label: Name of the call for the log line
+
+        Returns:
+            This request's prompt, cached and response token counts
+        """
+        counts = {
+            "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+            "cached_tokens": getattr(usage, "cached_content_token_count", 0) or 0,
+            "response_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+        }
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += counts["prompt_tokens"]
+            self.cached_tokens += counts["cached_tokens"]
+            self.response_tokens += counts["response_tokens"]
+        PROMPT_TOKENS.inc(counts["prompt_tokens"])
+        CACHED_PROMPT_TOKENS.inc(counts["cached_tokens"])
+        RESPONSE_TOKENS.inc(counts["response_tokens"])
+        logger.info(
+            f"{label} tokens: prompt={counts['prompt_tokens']} "
+            f"(cached={counts['cached_tokens']}) response={counts['response_tokens']}"
+        )
+        return counts
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals and per-request averages for /health."""
+        with self._lock:
+            n = self.requests
+            return {
+                "requests": n,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "response_tokens": self.response_tokens,
+                "avg_prompt_tokens": round(self.prompt_tokens / n, 1) if n else 0.0,
+                "avg_uncached_prompt_tokens": (
+                    round((self.prompt_tokens - self.cached_tokens) / n, 1) if n else 0.0
+                ),
+                "avg_response_tokens": round(self.response_tokens / n, 1) if n else 0.0,
+            }
+
+
+token_counter = TokenCounter()
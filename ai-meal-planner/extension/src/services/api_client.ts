@@ -83,6 +83,65 @@ export class BackendAPI {
         }
     }
 
+    /**
+     * Stream a meal plan; onMeal is called as soon as each meal is generated.
+     */
+    async generateMealPlanStream(
+        preferences: string,
+        days: number | undefined,
+        onMeal: (meal: MealPlanResponse['meal_plan']['meals'][number], index: number) => void
+    ): Promise<MealPlanResponse> {
+        logger.info('Requesting streamed meal plan generation');
+
+        const response = await fetch(`${this.baseUrl}/api/generate-plan/stream`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ preferences, days })
+        });
+
+        if (!response.ok || !response.body) {
+            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const meals: MealPlanResponse['meal_plan']['meals'] = [];
+        let shoppingList: string[] = [];
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let newline: number;
+            while ((newline = buffer.indexOf('\n')) >= 0) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (!line) continue;
+
+                const event = JSON.parse(line);
+                if (event.type === 'meal') {
+                    meals.push(event.meal);
+                    onMeal(event.meal, event.index);
+                } else if (event.type === 'shopping_list') {
+                    shoppingList = event.shopping_list;
+                } else if (event.type === 'error') {
+                    throw new Error(event.detail);
+                } else if (event.type === 'done') {
+                    logger.info(`Meal plan streamed with session: ${event.session_id}`);
+                    return {
+                        session_id: event.session_id,
+                        meal_plan: { meals, shopping_list: shoppingList },
+                        message: event.message
+                    };
+                }
+            }
+        }
+
+        throw new Error('Meal plan stream ended unexpectedly');
+    }
+
     async reportPrices(report: PriceReport): Promise<ShoppingDecision> {
         logger.info(`Reporting prices for session: ${report.session_id}`);
 
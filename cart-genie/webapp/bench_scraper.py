@@ -0,0 +1,176 @@
+# webapp/bench_scraper.py
+"""
+Benchmark the scraper's page loading modes against local HTML fixtures.
+
+Serves fixtures/*.html from a local stand-in for barbora.lt, together with
+heavy images, fonts, video and "third-party" scripts (served from a second
+host name), then scrapes the same items with fast-load mode off and on,
+and with the plain HTTP backend. Reports per-item latency and the bytes
+downloaded.
+
+The HTTP backend needs no browser: `python bench_scraper.py 20 50 http`
+runs only that part.
+
+Usage:
+    python bench_scraper.py [items] [asset_latency_ms] [http]
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import scraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Path prefix -> (content type, size in bytes) of generated assets
+ASSETS = {
+    "/img/": ("image/jpeg", 120_000),
+    "/fonts/": ("font/woff2", 60_000),
+    "/media/": ("video/mp4", 1_000_000),
+    "/static/": ("application/javascript", 2_000),
+    "/gtm.js": ("application/javascript", 250_000),
+    "/ads.js": ("application/javascript", 400_000),
+    "/pixel.gif": ("image/gif", 43),
+}
+
+# Search query -> fixture page; anything else gets search_results.html
+SEARCH_PAGES = {
+    "nėra": "not_found.html",
+    "kefyras": "embedded_products.html",
+    "tik naršyklėje": "client_rendered.html",
+}
+
+
+class FixtureServer:
+    """Local stand-in for the store plus a third-party host, counting bytes sent."""
+
+    def __init__(self, asset_latency: float = 0.05):
+        self.asset_latency = asset_latency
+        self.bytes_sent = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/paieska":
+                    query = parse_qs(url.query).get("q", [""])[0]
+                    name = SEARCH_PAGES.get(query, "search_results.html")
+                    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+                        html = f.read().replace("{THIRD_PARTY}", server.third_party_url)
+                    self._send("text/html; charset=utf-8", html.encode())
+                    return
+                for prefix, (content_type, size) in ASSETS.items():
+                    if url.path.startswith(prefix):
+                        time.sleep(server.asset_latency)
+                        body = b"/*" + b"x" * (size - 4) + b"*/" if "javascript" in content_type else b"\0" * size
+                        self._send(content_type, body)
+                        return
+                self.send_error(404)
+
+            def _send(self, content_type, body):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.bytes_sent += len(body)
+                    server.requests += 1
+
+            def log_message(self, *args):
+                pass
+
+        self._first_party = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._third_party = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._first_party.server_port}"
+        # A different host name makes it third-party to the browser
+        self.third_party_url = f"http://localhost:{self._third_party.server_port}"
+
+    def __enter__(self):
+        for httpd in (self._first_party, self._third_party):
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        for httpd in (self._first_party, self._third_party):
+            httpd.shutdown()
+
+    def reset(self):
+        with self._lock:
+            self.bytes_sent = 0
+            self.requests = 0
+
+
+async def bench_mode(server: FixtureServer, items, fast_load: bool):
+    latencies = []
+    server.reset()
+    async with scraper.create_pool(size=1, fast_load=fast_load) as pool:
+        for item_name in items:
+            async with pool.page() as page:
+                started = time.perf_counter()
+                price = await scraper.scrape_best_price(page, item_name, fast_load=fast_load)
+                latencies.append((time.perf_counter() - started) * 1000)
+            assert price == 1.09 or (item_name == "nėra" and price is None), price
+    return {
+        "mode": "fast" if fast_load else "full",
+        "items": len(items),
+        "latency_ms_median": round(statistics.median(latencies), 1),
+        "latency_ms_p95": round(sorted(latencies)[int(0.95 * (len(latencies) - 1))], 1),
+        "bytes_per_item": server.bytes_sent // len(items),
+        "requests_per_item": round(server.requests / len(items), 1),
+    }
+
+
+async def bench_http(server: FixtureServer, items):
+    latencies = []
+    server.reset()
+    async with scraper.create_http_client(max_connections=1) as http:
+        for item_name in items:
+            started = time.perf_counter()
+            price = await http.search(item_name)
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert price == 1.09 or (item_name == "nėra" and price is None), price
+    return {
+        "mode": "http",
+        "items": len(items),
+        "latency_ms_median": round(statistics.median(latencies), 1),
+        "latency_ms_p95": round(sorted(latencies)[int(0.95 * (len(latencies) - 1))], 1),
+        "bytes_per_item": server.bytes_sent // len(items),
+        "requests_per_item": round(server.requests / len(items), 1),
+    }
+
+
+async def main(n_items: int = 20, asset_latency_ms: float = 50, http_only: bool = False):
+    # Every tenth search has no results, to exercise the "not found" path
+    items = ["nėra" if i % 10 == 9 else f"pienas {i}" for i in range(n_items)]
+    with FixtureServer(asset_latency_ms / 1000) as server:
+        scraper.BARBORA_URL = server.url
+        results = [] if http_only else [
+            await bench_mode(server, items, fast_load) for fast_load in (False, True)
+        ]
+        results.append(await bench_http(server, items))
+
+    report = {"results": results}
+    if not http_only:
+        full, fast, http = results
+        report["latency_speedup"] = round(full["latency_ms_median"] / fast["latency_ms_median"], 2)
+        report["bytes_saved"] = round(1 - fast["bytes_per_item"] / full["bytes_per_item"], 3)
+        report["http_latency_speedup"] = round(full["latency_ms_median"] / http["latency_ms_median"], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        n_items=int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+        asset_latency_ms=float(sys.argv[2]) if len(sys.argv) > 2 else 50,
+        http_only=len(sys.argv) > 3 and sys.argv[3] == "http",
+    ))
@@ -0,0 +1,162 @@
+# webapp/browser_pool.py
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from playwright.async_api import Browser, BrowserContext, Page, Playwright, async_playwright
+
+
+class _Slot:
+    """A browser context with its single page and a use counter."""
+
+    def __init__(self, context: BrowserContext, page: Page):
+        self.context = context
+        self.page = page
+        self.uses = 0
+
+
+class BrowserPool:
+    """
+    A long-lived Chromium process with a warm pool of browser contexts.
+
+    Starting Playwright and Chromium costs 1-3 s, so the scraper keeps one
+    browser running and hands out pages from pre-created contexts. A
+    context is recycled after `max_uses` requests, or straight away if the
+    request using it raised, and the browser is relaunched if it crashes.
+    At most `size` pages are in use at once. A `lazy` pool starts the
+    browser on the first page request rather than on entry.
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        max_uses: int = 50,
+        headless: bool = True,
+        context_options: Optional[Dict] = None,
+        on_new_page: Optional[Callable[[Page], Awaitable[None]]] = None,
+        lazy: bool = False,
+    ):
+        self.size = size
+        self.max_uses = max_uses
+        self.headless = headless
+        self.context_options = context_options or {}
+        self.on_new_page = on_new_page
+        self.lazy = lazy
+
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._idle: List[_Slot] = []
+        self._semaphore = asyncio.Semaphore(size)
+        self._launch_lock = asyncio.Lock()
+        self._start_lock = asyncio.Lock()
+
+        # Counters
+        self.requests = 0
+        self.contexts_created = 0
+        self.contexts_recycled = 0
+        self.contexts_crashed = 0
+        self.browser_launches = 0
+
+    async def start(self, warm: Optional[int] = None) -> "BrowserPool":
+        """Launch the browser and pre-create `warm` contexts (default: size)."""
+        async with self._start_lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+        await self._ensure_browser()
+        slots = await asyncio.gather(*(self._new_slot() for _ in range(self.size if warm is None else warm)))
+        self._idle.extend(slots)
+        return self
+
+    async def close(self) -> None:
+        """Close every context, the browser and Playwright."""
+        for slot in self._idle:
+            await self._discard(slot)
+        self._idle.clear()
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self) -> "BrowserPool":
+        return self if self.lazy else await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _ensure_browser(self) -> Browser:
+        async with self._launch_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._browser is not None:
+                    print("Browser disconnected, relaunching.", file=sys.stderr)
+                    # Contexts of a dead browser are useless
+                    self._idle.clear()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+                self.browser_launches += 1
+            return self._browser
+
+    async def _new_slot(self) -> _Slot:
+        browser = await self._ensure_browser()
+        context = await browser.new_context(**self.context_options)
+        page = await context.new_page()
+        if self.on_new_page is not None:
+            await self.on_new_page(page)
+        self.contexts_created += 1
+        return _Slot(context, page)
+
+    async def _discard(self, slot: _Slot) -> None:
+        try:
+            await slot.context.close()
+        except Exception:
+            pass  # The browser may already be gone
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """
+        Borrow a page for one request.
+
+        Usage:
+            async with pool.page() as page:
+                await page.goto(url)
+        """
+        async with self._semaphore:
+            if self._playwright is None:
+                await self.start(warm=0)
+            self.requests += 1
+            slot = None
+            while self._idle and slot is None:
+                candidate = self._idle.pop()
+                if candidate.page.is_closed() or not self._browser.is_connected():
+                    await self._discard(candidate)
+                else:
+                    slot = candidate
+            if slot is None:
+                slot = await self._new_slot()
+
+            healthy = False
+            try:
+                yield slot.page
+                healthy = True
+            finally:
+                slot.uses += 1
+                if not healthy:
+                    self.contexts_crashed += 1
+                    await self._discard(slot)
+                elif slot.uses >= self.max_uses or slot.page.is_closed():
+                    self.contexts_recycled += 1
+                    await self._discard(slot)
+                else:
+                    self._idle.append(slot)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "requests": self.requests,
+            "contexts_created": self.contexts_created,
+            "contexts_recycled": self.contexts_recycled,
+            "contexts_crashed": self.contexts_crashed,
+            "browser_launches": self.browser_launches,
+        }
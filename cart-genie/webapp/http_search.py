@@ -0,0 +1,136 @@
+# webapp/http_search.py
+import re
+from typing import List, Optional, Tuple
+
+import httpx
+import orjson
+from selectolax.lexbor import LexborHTMLParser
+
+# Product data the store embeds in server-rendered search pages
+_EMBEDDED_PRODUCTS = re.compile(rb"window\.b_productList\s*=\s*(\[.*?\]);\s*(?:window\.|</script>)", re.S)
+
+
+class FastPathError(Exception):
+    """The HTTP response can't be turned into a price; use the browser instead."""
+
+
+def parse_unit_price(text: str) -> Optional[float]:
+    """"2,30 €/l" -> 2.30 (None if the text is not a price)."""
+    try:
+        return float(text.split("€")[0].replace(",", ".").strip())
+    except ValueError:
+        return None
+
+
+def parse_search_page(
+    body: bytes, price_selector: str, not_found_selector: str
+) -> Tuple[bool, List[float]]:
+    """
+    Unit prices from a search results page.
+
+    Reads the embedded product JSON when the page has it, otherwise the
+    server-rendered product cards.
+
+    Returns:
+        (found, unit prices); found is False when the page says nothing matched
+
+    Raises:
+        FastPathError: Neither prices nor a "not found" message are in the
+            HTML, e.g. because the page renders them client-side
+    """
+    match = _EMBEDDED_PRODUCTS.search(body)
+    if match is not None:
+        try:
+            products = orjson.loads(match.group(1))
+        except orjson.JSONDecodeError:
+            products = None
+        if isinstance(products, list):
+            prices = [
+                float(p["comparative_unit_price"])
+                for p in products
+                if isinstance(p, dict) and p.get("comparative_unit_price") is not None
+            ]
+            if prices:
+                return True, prices
+
+    tree = LexborHTMLParser(body)
+    texts = [node.text(strip=True) for node in tree.css(price_selector)]
+    prices = [price for price in map(parse_unit_price, texts) if price is not None]
+    if prices:
+        return True, prices
+    if tree.css_first(not_found_selector) is not None:
+        return False, []
+    raise FastPathError("No prices or 'not found' message in the HTML")
+
+
+class HttpSearchClient:
+    """
+    Gets search results over plain HTTP instead of rendering them in Chromium.
+
+    One pooled httpx client keeps connections alive (and uses HTTP/2 where
+    the server supports it), so a whole shopping list shares a handful of
+    TLS connections.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        price_selector: str,
+        not_found_selector: str,
+        max_connections: int = 8,
+        timeout: float = 10.0,
+        http2: bool = True,
+    ):
+        self.price_selector = price_selector
+        self.not_found_selector = not_found_selector
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            http2=http2,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            ),
+            headers={
+                "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                              "(KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+                "Accept": "text/html,application/xhtml+xml",
+                "Accept-Language": "lt-LT,lt;q=0.9,en;q=0.5",
+            },
+        )
+
+        # Counters
+        self.requests = 0
+        self.fallbacks = 0
+
+    async def search(self, item_name: str) -> Optional[float]:
+        """
+        Lowest unit price for an item, or None if the store has no results.
+
+        Raises:
+            FastPathError: The response was unusable (bad status, network
+                error or no parsable results)
+        """
+        self.requests += 1
+        try:
+            response = await self._client.get("/paieska", params={"q": item_name})
+            response.raise_for_status()
+            found, prices = parse_search_page(
+                response.content, self.price_selector, self.not_found_selector
+            )
+        except (httpx.HTTPError, FastPathError) as e:
+            self.fallbacks += 1
+            raise FastPathError(str(e)) from e
+        return min(prices) if found else None
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "HttpSearchClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def stats(self):
+        return {"requests": self.requests, "fallbacks": self.fallbacks}
@@ -0,0 +1,180 @@
+# webapp/price_cache.py
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, NamedTuple, Optional
+
+# Fresh lifetime (seconds) of a cached price per category
+CATEGORY_TTLS = {
+    "produce": 6 * 3600,  # Fruit and vegetables change price often
+    "fresh": 12 * 3600,
+    "default": 24 * 3600,
+    "pantry": 3 * 24 * 3600,
+}
+
+# Name stem -> category
+CATEGORY_STEMS = {
+    "bulv": "produce", "mork": "produce", "svogūn": "produce", "pomidor": "produce",
+    "agurk": "produce", "paprik": "produce", "obuol": "produce", "banan": "produce",
+    "pien": "fresh", "varšk": "fresh", "kiauš": "fresh", "jogurt": "fresh",
+    "mėsa": "fresh", "vištien": "fresh", "žuv": "fresh", "duon": "fresh",
+    "mil": "pantry", "ryž": "pantry", "makaron": "pantry", "cukr": "pantry",
+    "druska": "pantry", "aliej": "pantry", "kruop": "pantry",
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_item_name(item_name: str) -> str:
+    """"  Pienas  2,5% " -> "pienas 2,5%"."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", item_name).lower()).strip()
+
+
+def item_category(item_name: str) -> str:
+    for stem, category in CATEGORY_STEMS.items():
+        if stem in item_name:
+            return category
+    return "default"
+
+
+class CachedPrice(NamedTuple):
+    price: Optional[float]  # None is a cached "not found"
+    state: str  # "fresh" or "stale"
+    age: float  # Seconds since it was scraped
+
+
+class PriceCache:
+    """
+    SQLite price cache in front of the scraper, shared by every scraper process.
+
+    Entries are keyed by (store, normalized item name). A price is fresh for
+    its category's TTL and then stale for `stale_ttl` more seconds, during
+    which it is still served while one caller refreshes it. "Not found"
+    results are cached too, for `negative_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        path: str = "price_cache.sqlite3",
+        ttls: Optional[Dict[str, float]] = None,
+        stale_ttl: float = 3 * 24 * 3600,
+        negative_ttl: float = 6 * 3600,
+        refresh_lease: float = 120,
+    ):
+        self.path = path
+        self.ttls = {**CATEGORY_TTLS, **(ttls or {})}
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.refresh_lease = refresh_lease
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+        # Counters
+        self.hits = 0
+        self.stale_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # SQLite connections must not cross a fork, so reconnect per process
+        if self._connection is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None, timeout=30
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS prices (
+                    store TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    price REAL,
+                    scraped_at REAL NOT NULL,
+                    fresh_until REAL NOT NULL,
+                    stale_until REAL NOT NULL,
+                    refreshing_until REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (store, item)
+                )
+                """
+            )
+            self._connection, self._pid = conn, os.getpid()
+        return self._connection
+
+    def get(self, store: str, item_name: str) -> Optional[CachedPrice]:
+        """Cached price, or None on a miss (never scraped, or past its stale window)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT price, scraped_at, fresh_until, stale_until FROM prices "
+                "WHERE store = ? AND item = ?",
+                (store, normalize_item_name(item_name)),
+            ).fetchone()
+
+        if row is None or row[3] < now:
+            self.misses += 1
+            return None
+        price, scraped_at, fresh_until, _ = row
+        state = "fresh" if now < fresh_until else "stale"
+        if price is None:
+            self.negative_hits += 1
+        elif state == "fresh":
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return CachedPrice(price, state, now - scraped_at)
+
+    def set(self, store: str, item_name: str, price: Optional[float]) -> None:
+        """Store a scraped price (None for "not found")."""
+        item = normalize_item_name(item_name)
+        now = time.time()
+        if price is None:
+            fresh_until = stale_until = now + self.negative_ttl
+        else:
+            fresh_until = now + self.ttls.get(item_category(item), self.ttls["default"])
+            stale_until = fresh_until + self.stale_ttl
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (store, item, price, now, fresh_until, stale_until),
+            )
+
+    def claim_refresh(self, store: str, item_name: str) -> bool:
+        """
+        Take the lease to refresh a stale entry, so only one process
+        re-scrapes it. Returns False if another caller already holds it.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE prices SET refreshing_until = ? "
+                "WHERE store = ? AND item = ? AND refreshing_until < ?",
+                (now + self.refresh_lease, store, normalize_item_name(item_name), now),
+            )
+        return cursor.rowcount == 1
+
+    def purge_expired(self) -> int:
+        """Delete entries past their stale window; returns how many."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM prices WHERE stale_until < ?", (time.time(),))
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM prices")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+        }
@@ -1,69 +1,352 @@
 # workers/scraper.py
+import os
 import sys
 import json
-from playwright.sync_api import sync_playwright
+import time
+import asyncio
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, urlparse
 
-def get_best_price(item_name: str):
+from playwright.async_api import Page
+
+from browser_pool import BrowserPool
+from http_search import FastPathError, HttpSearchClient, parse_unit_price
+from price_cache import PriceCache
+
+BARBORA_URL = os.environ.get("BARBORA_URL", "https://barbora.lt")
+
+PRODUCT_CARD_SELECTOR = 'li[data-testid^="product-card"]'
+NOT_FOUND_SELECTOR = ".b-alert--warning"
+UNIT_PRICE_SELECTOR = "div.text-2xs"
+# The narrowest thing worth waiting for: a unit price inside a product card
+PRICE_SELECTOR = f"{PRODUCT_CARD_SELECTOR} {UNIT_PRICE_SELECTOR}"
+
+# Cache key for prices scraped by this module
+STORE = "barbora"
+
+# Fast-load mode: block heavy resources and don't wait for the DOM to finish
+FAST_LOAD = os.environ.get("SCRAPER_FAST_LOAD", "1") != "0"
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+# Client-rendered result lists keep growing after DOMContentLoaded: the
+# number of prices has to hold still this long before they are compared
+SETTLE_SECONDS = 0.1
+
+# Try plain HTTP first and only render in Chromium when that fails
+USE_HTTP = os.environ.get("SCRAPER_HTTP", "1") != "0"
+
+
+def is_first_party(url: str, site_url: Optional[str] = None) -> bool:
+    host = urlparse(url).hostname or ""
+    site_host = urlparse(site_url or BARBORA_URL).hostname or ""
+    return host == site_host or host.endswith("." + site_host)
+
+
+async def block_heavy_requests(page: Page) -> None:
+    """
+    Abort images, media, fonts and third-party scripts on this page.
+
+    The prices are plain text in first-party HTML, so nothing blocked here
+    is needed to read them; analytics and ad scripts are the bulk of the
+    bytes and CPU time of a search page.
+    """
+    async def handle(route):
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or (
+            request.resource_type == "script" and not is_first_party(request.url)
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route("**/*", handle)
+
+
+def create_pool(
+    size: int = 4, max_uses: int = 50, fast_load: Optional[bool] = None, lazy: bool = False
+) -> BrowserPool:
+    """A browser pool whose pages block heavy requests in fast-load mode."""
+    fast_load = FAST_LOAD if fast_load is None else fast_load
+    return BrowserPool(
+        size=size,
+        max_uses=max_uses,
+        on_new_page=block_heavy_requests if fast_load else None,
+        lazy=lazy,
+    )
+
+
+def create_http_client(max_connections: int = 8) -> Optional[HttpSearchClient]:
+    """The HTTP fast path, unless disabled with SCRAPER_HTTP=0."""
+    if not USE_HTTP:
+        return None
+    return HttpSearchClient(BARBORA_URL, PRICE_SELECTOR, NOT_FOUND_SELECTOR, max_connections)
+
+
+async def scrape_best_price(page: Page, item_name: str, fast_load: Optional[bool] = None):
     """
-    Launches a headless browser, searches for an item on Barbora,
+    Searches for an item on Barbora using an already open page
     and scrapes the unit price of the best-value product.
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        
+    fast_load = FAST_LOAD if fast_load is None else fast_load
+
+    # Navigate to the search results page directly. In fast-load mode don't
+    # wait for DOMContentLoaded before looking: "not found" pages stop here.
+    search_url = f"{BARBORA_URL}/paieska?q={quote(item_name)}"
+    await page.goto(search_url, wait_until="commit" if fast_load else "domcontentloaded")
+
+    # Wait for the first unit price, or for the "not found" message
+    found = await page.wait_for_selector(
+        f"{PRICE_SELECTOR}, {NOT_FOUND_SELECTOR}", state="attached", timeout=10000
+    )
+    if await found.evaluate(f"el => el.matches({json.dumps(NOT_FOUND_SELECTOR)})"):
+        print(f"Item '{item_name}' not found on Barbora.", file=sys.stderr)
+        return None
+
+    texts = await read_unit_prices(page)
+    prices = [price for price in map(parse_unit_price, texts) if price is not None]
+    return min(prices) if prices else None
+
+
+async def read_unit_prices(page: Page, timeout: float = 10.0) -> List[str]:
+    """
+    Unit price texts of every product card, once the result list is complete.
+
+    The first price can arrive long before the last: the rest of the HTML
+    may still be streaming, and client-rendered lists grow after that.
+    Waits for DOMContentLoaded, then until the number of prices stops
+    changing for SETTLE_SECONDS (or ``timeout`` runs out).
+    """
+    await page.wait_for_load_state("domcontentloaded", timeout=timeout * 1000)
+    deadline = asyncio.get_running_loop().time() + timeout
+
+    # Each read is one round trip (the selector engine pierces the Shadow DOM
+    # the prices live in)
+    texts = await page.eval_on_selector_all(PRICE_SELECTOR, "els => els.map(el => el.innerText)")
+    while asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(SETTLE_SECONDS)
+        again = await page.eval_on_selector_all(PRICE_SELECTOR, "els => els.map(el => el.innerText)")
+        if len(again) == len(texts):
+            return again
+        texts = again
+    return texts
+
+
+async def get_best_price_pooled(pool: BrowserPool, item_name: str):
+    """Scrape one item on a page borrowed from a warm browser pool."""
+    try:
+        async with pool.page() as page:
+            return await scrape_best_price(page, item_name)
+    except Exception as e:
+        print(f"An error occurred during scraping for '{item_name}': {e}", file=sys.stderr)
+        return None
+
+
+def default_cache() -> Optional[PriceCache]:
+    """The shared on-disk price cache, unless disabled with SCRAPER_CACHE=0."""
+    if os.environ.get("SCRAPER_CACHE", "1") == "0":
+        return None
+    return PriceCache(os.environ.get(
+        "SCRAPER_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "price_cache.sqlite3")
+    ))
+
+
+def get_best_price(item_name: str, cache: Optional[PriceCache] = None):
+    """
+    Searches for an item on Barbora and returns the unit price of the
+    best-value product, over plain HTTP when possible and in a headless
+    browser otherwise.
+
+    Fresh cached prices are returned without any request. One-off
+    convenience wrapper; use a long-lived BrowserPool (see `serve`) when
+    scraping more than one item.
+    """
+    cache = cache or default_cache()
+    if cache is not None:
+        cached = cache.get(STORE, item_name)
+        if cached is not None and cached.state == "fresh":
+            return cached.price
+
+    async def run():
+        http = create_http_client(max_connections=1)
         try:
-            # Navigate to the search results page directly
-            search_url = f"https://barbora.lt/paieska?q={item_name}"
-            page.goto(search_url, wait_until="domcontentloaded")
+            async with create_pool(size=1, lazy=http is not None) as pool:
+                async for result in scrape_shopping_list(
+                    [item_name], pool, cache=cache, revalidate=False, http=http
+                ):
+                    return result["price"]
+        finally:
+            if http is not None:
+                await http.close()
+
+    return asyncio.run(run())
+
 
-            # Wait for the product list to appear, or for the "not found" message
+async def scrape_shopping_list(
+    items: Iterable[str],
+    pool: BrowserPool,
+    concurrency: Optional[int] = None,
+    item_timeout: float = 30.0,
+    cache: Optional[PriceCache] = None,
+    revalidate: bool = True,
+    http: Optional[HttpSearchClient] = None,
+) -> AsyncIterator[Dict]:
+    """
+    Scrapes a whole shopping list concurrently and yields one result per
+    item as soon as it finishes (not in input order).
+
+    `concurrency` defaults to the pool size and is capped by it. An item
+    that takes longer than `item_timeout` seconds is reported with
+    status "timeout" instead of holding up the rest of the list.
+
+    With a `cache`, fresh prices and cached "not found" results are
+    returned without scraping. Stale prices are returned straight away
+    and refreshed in the background (`revalidate=True`), or re-scraped
+    inline with the stale price as a fallback if scraping fails.
+
+    With an `http` client, each item is first fetched over plain HTTP and
+    only rendered on a pool page when that fails.
+    """
+    items = list(dict.fromkeys(i.strip() for i in items if i.strip()))
+    semaphore = asyncio.Semaphore(min(concurrency or pool.size, pool.size))
+    refreshes = []
+
+    async def fetch(item_name: str) -> Tuple[Optional[float], str]:
+        """Price and the backend that produced it."""
+        if http is not None:
             try:
-                page.wait_for_selector('li[data-testid^="product-card"]', timeout=10000)
-            except Exception:
-                # If product cards don't appear, check for the warning message
-                not_found_element = page.query_selector(".b-alert--warning")
-                if not_found_element:
-                    print(f"Item '{item_name}' not found on Barbora.", file=sys.stderr)
-                    return None
-                else:
-                    raise # Re-raise the timeout error if neither is found
-
-            # Get all product cards
-            all_cards = page.query_selector_all('li[data-testid^="product-card"]')
-            
-            if not all_cards:
-                return None
-
-            lowest_price = float('inf')
-
-            for card in all_cards:
-                # The unit price is inside the Shadow DOM
-                unit_price_element = card.query_selector('div.text-2xs')
-                if unit_price_element:
-                    text = unit_price_element.inner_text()
-                    # "2,30 €/l" -> "2,30" -> "2.30" -> 2.30
-                    price_str = text.split('€')[0].replace(',', '.').strip()
-                    try:
-                        price = float(price_str)
-                        if price < lowest_price:
-                            lowest_price = price
-                    except ValueError:
-                        continue
-
-            return lowest_price if lowest_price != float('inf') else None
-
-        except Exception as e:
-            print(f"An error occurred during scraping for '{item_name}': {e}", file=sys.stderr)
-            return None
-        finally:
-            browser.close()
+                return await http.search(item_name), "http"
+            except FastPathError as e:
+                print(f"HTTP search for '{item_name}' failed ({e}), using the browser.", file=sys.stderr)
+        async with pool.page() as page:
+            return await scrape_best_price(page, item_name), "browser"
+
+    async def scrape_live(item_name: str) -> Dict:
+        async with semaphore:
+            started = time.perf_counter()
+            backend = None
+            try:
+                price, backend = await asyncio.wait_for(fetch(item_name), item_timeout)
+                status = "ok" if price is not None else "not_found"
+            except asyncio.TimeoutError:
+                print(f"Scraping '{item_name}' timed out after {item_timeout}s.", file=sys.stderr)
+                price, status = None, "timeout"
+            except Exception as e:
+                print(f"An error occurred during scraping for '{item_name}': {e}", file=sys.stderr)
+                price, status = None, "error"
+            if cache is not None and status in ("ok", "not_found"):
+                cache.set(STORE, item_name, price)
+            return {
+                "item": item_name,
+                "price": price,
+                "status": status,
+                "source": "live",
+                "backend": backend,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+
+    async def scrape(item_name: str) -> Dict:
+        cached = cache.get(STORE, item_name) if cache is not None else None
+        if cached is None:
+            return await scrape_live(item_name)
+
+        result = {
+            "item": item_name,
+            "price": cached.price,
+            "status": "ok" if cached.price is not None else "not_found",
+            "source": "cache" if cached.state == "fresh" else "stale",
+            "elapsed_ms": 0.0,
+        }
+        if cached.state == "stale" and cache.claim_refresh(STORE, item_name):
+            if revalidate:
+                refreshes.append(asyncio.create_task(scrape_live(item_name)))
+            else:
+                live = await scrape_live(item_name)
+                if live["status"] in ("ok", "not_found"):
+                    return live
+        return result
+
+    tasks = [asyncio.create_task(scrape(item_name)) for item_name in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+        # Let background refreshes of stale prices land in the cache
+        if refreshes:
+            await asyncio.gather(*refreshes)
+    finally:
+        # The consumer stopped early: don't leave scrapes running
+        for task in tasks + refreshes:
+            task.cancel()
+
+
+async def batch(items: Iterable[str], concurrency: int = 4, item_timeout: float = 30.0):
+    """Scrapes a shopping list and prints one JSON line per item (NDJSON)."""
+    cache = default_cache()
+    http = create_http_client(max_connections=concurrency)
+    try:
+        async with create_pool(size=concurrency, lazy=http is not None) as pool:
+            async for result in scrape_shopping_list(
+                items, pool, concurrency, item_timeout, cache, http=http
+            ):
+                print(json.dumps(result, ensure_ascii=False), flush=True)
+    finally:
+        if http is not None:
+            await http.close()
+    if cache is not None:
+        print(json.dumps({"cache": cache.stats()}), file=sys.stderr)
+    if http is not None:
+        print(json.dumps({"http": http.stats()}), file=sys.stderr)
+
+
+async def serve(pool_size: int = 4, max_uses: int = 50):
+    """
+    Long-lived scraper service: reads one item name per line from stdin
+    and prints one JSON result per line, reusing warm browser contexts.
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    cache = default_cache()
+    http = create_http_client(max_connections=pool_size)
+    async with create_pool(size=pool_size, max_uses=max_uses, lazy=http is not None) as pool:
+        pending = set()
+
+        async def handle(item_name: str):
+            async for result in scrape_shopping_list([item_name], pool, cache=cache, http=http):
+                print(json.dumps(result, ensure_ascii=False), flush=True)
+
+        while line := await reader.readline():
+            item_name = line.decode().strip()
+            if item_name:
+                task = asyncio.create_task(handle(item_name))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+        if pending:
+            await asyncio.wait(pending)
+        print(json.dumps({"pool": pool.stats()}), file=sys.stderr)
+    if http is not None:
+        await http.close()
+
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        # e.g. `python scraper.py --batch pienas bulvės kiaušiniai`
+        # or   `python scraper.py --batch < shopping_list.txt`
+        # Concurrency and per-item timeout via SCRAPER_CONCURRENCY / SCRAPER_ITEM_TIMEOUT
+        shopping_list = sys.argv[2:] or sys.stdin.read().splitlines()
+        asyncio.run(batch(
+            shopping_list,
+            concurrency=int(os.environ.get("SCRAPER_CONCURRENCY", 4)),
+            item_timeout=float(os.environ.get("SCRAPER_ITEM_TIMEOUT", 30)),
+        ))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        # e.g. `python scraper.py --serve 4 < items.txt`
+        asyncio.run(serve(pool_size=int(sys.argv[2]) if len(sys.argv) > 2 else 4))
+    elif len(sys.argv) > 1:
         item_to_search = sys.argv[1]
         best_price = get_best_price(item_to_search)
-        
+
         # The output of this script is a JSON string, which is easy for other programs to read.
         result = {"item": item_to_search, "price": best_price}
         print(json.dumps(result))
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+import browser_pool
+from browser_pool import BrowserPool
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+        self.page = FakePage()
+
+    async def new_page(self):
+        return self.page
+
+    async def close(self):
+        self.closed = self.page.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **options):
+        self.contexts.append(FakeContext())
+        return self.contexts[-1]
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.browsers = []
+        self.chromium = self
+
+    async def launch(self, headless=True):
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+    playwright = FakePlaywright()
+    monkeypatch.setattr(browser_pool, "async_playwright", lambda: playwright)
+    return playwright
+
+
+def run_pool(coroutine_function, **options):
+    async def run():
+        async with BrowserPool(**options) as pool:
+            await coroutine_function(pool)
+            return pool.stats()
+
+    return asyncio.run(run())
+
+
+def test_contexts_are_reused_then_recycled_after_max_uses(playwright):
+    pages = []
+
+    async def use(pool):
+        for _ in range(5):
+            async with pool.page() as page:
+                pages.append(page)
+
+    stats = run_pool(use, size=1, max_uses=2)
+
+    assert pages[0] is pages[1] and pages[2] is pages[3] and pages[1] is not pages[2]
+    assert stats["contexts_created"] == 3 and stats["contexts_recycled"] == 2
+    assert [c.closed for c in playwright.browsers[0].contexts] == [True, True, True]  # Closed on exit
+
+
+def test_context_is_discarded_when_the_request_fails_or_times_out(playwright):
+    async def use(pool):
+        with pytest.raises(RuntimeError):
+            async with pool.page():
+                raise RuntimeError("Target crashed")
+
+        async def hang():
+            async with pool.page():
+                await asyncio.sleep(10)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(hang(), 0.01)
+
+        async with pool.page() as page:
+            assert not page.is_closed()
+
+    stats = run_pool(use, size=1)
+
+    contexts = playwright.browsers[0].contexts
+    assert stats["contexts_crashed"] == 2 and stats["contexts_created"] == 3
+    assert contexts[0].closed and contexts[1].closed
+
+
+def test_at_most_size_pages_in_use(playwright):
+    in_use = peak = 0
+
+    async def borrow(pool):
+        nonlocal in_use, peak
+        async with pool.page():
+            in_use += 1
+            peak = max(peak, in_use)
+            await asyncio.sleep(0.01)
+            in_use -= 1
+
+    async def use(pool):
+        await asyncio.gather(*(borrow(pool) for _ in range(7)))
+
+    stats = run_pool(use, size=2)
+
+    assert peak == 2
+    assert stats["requests"] == 7 and stats["contexts_created"] == 2 and stats["idle"] == 2
+
+
+def test_lazy_pool_starts_on_first_page_and_relaunches_a_dead_browser(playwright):
+    async def use(pool):
+        assert playwright.browsers == []  # Lazy: nothing launched on entry
+        async with pool.page():
+            pass
+        playwright.browsers[0].connected = False  # Chromium crashed
+        async with pool.page() as page:
+            assert page in [c.page for c in playwright.browsers[1].contexts]
+
+    stats = run_pool(use, size=2, lazy=True)
+
+    assert stats["browser_launches"] == 2 and stats["contexts_created"] == 2
@@ -0,0 +1,94 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+import scraper
+from bench_scraper import FixtureServer
+from http_search import FastPathError, HttpSearchClient, parse_search_page
+
+SELECTORS = (scraper.PRICE_SELECTOR, scraper.NOT_FOUND_SELECTOR)
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FixtureServer(asset_latency=0) as server:
+        yield server
+
+
+def search_all(server, items):
+    """Search each item with one client; FastPathError is returned, not raised."""
+
+    async def run():
+        async with HttpSearchClient(server.url, *SELECTORS, max_connections=2) as client:
+            results = []
+            for item_name in items:
+                try:
+                    results.append(await client.search(item_name))
+                except FastPathError as e:
+                    results.append(e)
+            return results, client.stats()
+
+    return asyncio.run(run())
+
+
+def test_prices_from_cards_and_embedded_json(server):
+    (cards, embedded, missing), stats = search_all(server, ["pienas", "kefyras", "nėra"])
+
+    assert cards == 1.09  # Cheapest unit price among the product cards
+    assert embedded == 1.35  # From window.b_productList; null unit prices skipped
+    assert missing is None  # "Not found" message
+    assert stats == {"requests": 3, "fallbacks": 0}
+
+
+def test_page_without_prices_needs_the_browser(server):
+    (result,), stats = search_all(server, ["tik naršyklėje"])
+
+    assert isinstance(result, FastPathError)
+    assert stats == {"requests": 1, "fallbacks": 1}
+
+
+def test_http_errors_need_the_browser():
+    async def run():
+        # Nothing listens on port 9 (discard); the connection is refused
+        async with HttpSearchClient("http://127.0.0.1:9", *SELECTORS, timeout=1) as client:
+            with pytest.raises(FastPathError):
+                await client.search("pienas")
+            return client.stats()
+
+    assert asyncio.run(run())["fallbacks"] == 1
+
+
+def test_parse_search_page_ignores_broken_embedded_json():
+    body = (
+        b"<script>window.b_productList = [{broken;</script>"
+        b'<li data-testid="product-card-1"><div class="text-2xs">2,30 \xe2\x82\xac/kg</div></li>'
+    )
+    assert parse_search_page(body, *SELECTORS) == (True, [2.3])
+
+
+def test_shopping_list_falls_back_to_the_browser(server, monkeypatch):
+    class BrowserOnlyPool:
+        size = 2
+
+        @asynccontextmanager
+        async def page(self):
+            yield "page"
+
+    async def browser_price(page, item_name):
+        assert page == "page"
+        return 0.99
+
+    monkeypatch.setattr(scraper, "scrape_best_price", browser_price)
+
+    async def run():
+        async with HttpSearchClient(server.url, *SELECTORS) as client:
+            return [
+                result
+                async for result in scraper.scrape_shopping_list(
+                    ["pienas", "tik naršyklėje"], BrowserOnlyPool(), http=client
+                )
+            ]
+
+    results = {r["item"]: (r["price"], r["backend"]) for r in asyncio.run(run())}
+    assert results == {"pienas": (1.09, "http"), "tik naršyklėje": (0.99, "browser")}
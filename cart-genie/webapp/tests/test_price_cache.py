@@ -0,0 +1,89 @@
+import pytest
+
+import price_cache
+from price_cache import PriceCache, item_category, normalize_item_name
+
+HOUR = 3600
+
+
+class Clock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(price_cache.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return PriceCache(
+        str(tmp_path / "prices.sqlite3"), stale_ttl=2 * HOUR, negative_ttl=HOUR, refresh_lease=60
+    )
+
+
+def test_names_are_normalized_and_categorized():
+    assert normalize_item_name("  Pienas   2,5% ") == "pienas 2,5%"
+    assert item_category("morkos") == "produce"
+    assert item_category("ryžiai") == "pantry"
+    assert item_category("šokoladas") == "default"
+
+
+def test_category_ttls_then_stale_then_miss(cache, clock):
+    cache.set("rimi", "Morkos", 0.89)  # produce: fresh for 6 hours
+    cache.set("rimi", "ryžiai", 1.49)  # pantry: fresh for 3 days
+
+    assert cache.get("rimi", "morkos") == (0.89, "fresh", 0.0)
+    clock.now += 6 * HOUR + 1
+    assert cache.get("rimi", "MORKOS").state == "stale"
+    assert cache.get("rimi", "ryžiai").state == "fresh"
+    clock.now += 2 * HOUR
+    assert cache.get("rimi", "morkos") is None  # Past the stale window
+    assert cache.get("barbora", "morkos") is None  # Per store
+
+    assert cache.stats() == {
+        "entries": 2, "hits": 2, "stale_hits": 1, "negative_hits": 0, "misses": 2,
+    }
+
+
+def test_not_found_is_cached_for_negative_ttl(cache, clock):
+    cache.set("iki", "trumai", None)
+
+    assert cache.get("iki", "trumai") == (None, "fresh", 0.0)
+    clock.now += HOUR + 1
+    assert cache.get("iki", "trumai") is None
+    assert cache.stats()["negative_hits"] == 1
+
+
+def test_one_refresh_lease_per_stale_entry(cache, clock):
+    cache.set("rimi", "morkos", 0.89)
+    clock.now += 6 * HOUR + 1
+    other_process = PriceCache(cache.path, refresh_lease=60)
+
+    assert cache.claim_refresh("rimi", "morkos")
+    assert not other_process.claim_refresh("rimi", "Morkos")
+    clock.now += 61  # Lease expired: the refresher died
+    assert other_process.claim_refresh("rimi", "morkos")
+
+    cache.set("rimi", "morkos", 0.79)  # Refreshed: the lease is released
+    assert cache.get("rimi", "morkos") == (0.79, "fresh", 0.0)
+    assert cache.claim_refresh("rimi", "morkos")
+    assert not cache.claim_refresh("rimi", "bulvės")  # Nothing to refresh
+
+
+def test_purge_expired_keeps_servable_entries(cache, clock):
+    cache.set("rimi", "morkos", 0.89)  # Servable for 6 + 2 hours
+    cache.set("rimi", "trumai", None)  # Servable for 1 hour
+    cache.set("rimi", "ryžiai", 1.49)
+
+    clock.now += 2 * HOUR
+    assert cache.purge_expired() == 1
+    clock.now += 7 * HOUR
+    assert cache.purge_expired() == 1
+    assert len(cache) == 1 and cache.get("rimi", "ryžiai").state == "fresh"
@@ -0,0 +1,158 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+import scraper
+
+
+class FakePool:
+    """Hands out placeholder pages for the fake scrape_best_price."""
+
+    def __init__(self, size=4):
+        self.size = size
+
+    @asynccontextmanager
+    async def page(self):
+        yield "page"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+class FakeBrowser:
+    """Stands in for scrape_best_price: item -> (seconds, price or exception)."""
+
+    def __init__(self):
+        self.results = {}
+        self.active = 0
+        self.peak = 0
+
+    async def scrape_best_price(self, page, item_name):
+        seconds, result = self.results[item_name]
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.active -= 1
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class StreamingPage:
+    """
+    A search results page whose product cards arrive slowly.
+
+    ``cards`` are (seconds after navigation, unit price text); DOMContentLoaded
+    fires ``dom_ready`` seconds after navigation.
+    """
+
+    def __init__(self, cards, dom_ready):
+        self.cards = cards
+        self.dom_ready = dom_ready
+        self.start = None
+
+    def _elapsed(self):
+        return asyncio.get_running_loop().time() - self.start
+
+    async def goto(self, url, wait_until):
+        self.start = asyncio.get_running_loop().time()
+        if wait_until == "domcontentloaded":
+            await asyncio.sleep(self.dom_ready)
+
+    async def wait_for_selector(self, selector, state, timeout):
+        await asyncio.sleep(max(0.0, min(at for at, _ in self.cards) - self._elapsed()))
+        return SimpleNamespace(evaluate=self._not_found)
+
+    async def _not_found(self, expression):
+        return False
+
+    async def wait_for_load_state(self, state, timeout=None):
+        await asyncio.sleep(max(0.0, self.dom_ready - self._elapsed()))
+
+    async def eval_on_selector_all(self, selector, expression):
+        return [text for at, text in self.cards if at <= self._elapsed()]
+
+
+@pytest.mark.parametrize("dom_ready", [0.15, 0.0], ids=["streamed_html", "client_rendered"])
+def test_best_price_waits_for_every_card(dom_ready):
+    # The cheapest product is the last card to arrive
+    page = StreamingPage(
+        [(0.0, "2,49 €/kg"), (0.05, "1,99 €/kg"), (0.1, "2,19 €/kg"), (0.15, "0,99 €/kg")],
+        dom_ready=dom_ready,
+    )
+
+    price = asyncio.run(scraper.scrape_best_price(page, "bulvės", fast_load=True))
+
+    assert price == 0.99
+
+
+@pytest.fixture
+def browser(monkeypatch):
+    browser = FakeBrowser()
+    monkeypatch.setattr(scraper, "scrape_best_price", browser.scrape_best_price)
+    return browser
+
+
+def scrape(items, **options):
+    async def run():
+        return [result async for result in scraper.scrape_shopping_list(items, **options)]
+
+    return asyncio.run(run())
+
+
+def test_results_arrive_as_items_finish_with_per_item_status(browser):
+    browser.results.update({
+        "pienas": (0.03, 1.09),
+        "bulvės": (0.01, 0.89),
+        "nėra": (0.0, None),
+        "sugedęs": (0.0, RuntimeError("Target closed")),
+        "lėtas": (5.0, 2.0),
+    })
+    items = ["pienas", " bulvės ", "nėra", "sugedęs", "lėtas", "pienas", ""]
+
+    results = scrape(items, pool=FakePool(size=5), item_timeout=0.1)
+
+    assert [r["item"] for r in results] == ["nėra", "sugedęs", "bulvės", "pienas", "lėtas"]
+    assert {r["item"]: (r["price"], r["status"]) for r in results} == {
+        "pienas": (1.09, "ok"),
+        "bulvės": (0.89, "ok"),
+        "nėra": (None, "not_found"),
+        "sugedęs": (None, "error"),
+        "lėtas": (None, "timeout"),
+    }
+    slow = results[-1]
+    assert slow["backend"] is None and 100 <= slow["elapsed_ms"] < 1000
+
+
+def test_concurrency_is_capped_by_the_pool(browser):
+    browser.results.update({f"item {i}": (0.01, 1.0) for i in range(8)})
+
+    scrape(list(browser.results), pool=FakePool(size=2), concurrency=5)
+    assert browser.peak == 2
+
+    browser.peak = 0
+    scrape(list(browser.results), pool=FakePool(size=4), concurrency=3)
+    assert browser.peak == 3
+
+
+def test_batch_prints_one_json_line_per_item(browser, monkeypatch, capsys):
+    browser.results.update({"pienas": (0.0, 1.09), "lėtas": (5.0, 2.0)})
+    monkeypatch.setenv("SCRAPER_CACHE", "0")
+    monkeypatch.setattr(scraper, "USE_HTTP", False)
+    monkeypatch.setattr(scraper, "create_pool", lambda size, lazy=False: FakePool(size))
+
+    asyncio.run(scraper.batch(["pienas", "lėtas"], concurrency=2, item_timeout=0.05))
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(r["item"], r["status"], r["source"]) for r in lines] == [
+        ("pienas", "ok", "live"),
+        ("lėtas", "timeout", "live"),
+    ]